@@ -0,0 +1,121 @@
+"""
+Load test of the chat path: N simulated learners chat at the same time through Agent.stream_message,
+against the local stub server (llm.stub_server) unless --base-url points elsewhere. Reports time to
+first token and full reply latency (p50/p90/p99), throughput and errors.
+
+Run from the project root: `python -m benchmarks.chat_load --learners 50 --turns 3 --latency 0.3`
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+import llm.scheduler
+from benchmarks import data
+from benchmarks.suite import fresh_database, insert_users
+from llm.agent import Agent
+from llm.scheduler import InferenceScheduler
+from llm.stub_server import StubInferenceServer, lorem_tokens
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def learner(agent, turns, think_time, rng, first_tokens, replies, errors):
+    for turn in range(turns):
+        await asyncio.sleep(rng.uniform(0, think_time))
+        start = time.perf_counter()
+        first = None
+        try:
+            async for _ in agent.stream_message(f"Question {turn} from {agent.username}"):
+                if first is None:
+                    first = time.perf_counter() - start
+        except Exception as e:
+            errors.append(e)
+            continue
+
+        first_tokens.append(first if first is not None else time.perf_counter() - start)
+        replies.append(time.perf_counter() - start)
+
+
+async def simulate(agents, turns, think_time, seed):
+    first_tokens, replies, errors = [], [], []
+    rng = random.Random(seed)
+    await asyncio.gather(*[
+        learner(agent, turns, think_time, random.Random(rng.random()), first_tokens, replies, errors)
+        for agent in agents
+    ])
+    return first_tokens, replies, errors
+
+
+def run(learners, turns, base_url, think_time=0.0, llm_concurrency=8, seed=0):
+    """Returns a dict of the measured latencies (seconds), throughput and errors."""
+    # A scheduler of its own, so --llm-concurrency applies whatever the environment says
+    llm.scheduler._scheduler = InferenceScheduler(max_concurrency=llm_concurrency, per_user_concurrency=1)
+    try:
+        with fresh_database():
+            users = data.users(learners, seed)
+            insert_users(users)
+            agents = [Agent(username, base_url=base_url) for username, _, _ in users]
+            for agent in agents:
+                agent.system_prompt()
+
+            start = time.perf_counter()
+            first_tokens, replies, errors = asyncio.run(simulate(agents, turns, think_time, seed))
+            elapsed = time.perf_counter() - start
+    finally:
+        llm.scheduler._scheduler.close()
+        llm.scheduler._scheduler = None
+
+    return {
+        "learners": learners,
+        "messages": len(replies),
+        "errors": len(errors),
+        "elapsed": elapsed,
+        "throughput": len(replies) / elapsed if elapsed else 0.0,
+        **{f"first_token_p{int(q * 100)}": percentile(first_tokens, q) for q in (0.5, 0.9, 0.99)},
+        **{f"reply_p{int(q * 100)}": percentile(replies, q) for q in (0.5, 0.9, 0.99)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--learners", type=int, default=20, help="Simulated learners chatting at once")
+    parser.add_argument("--turns", type=int, default=3, help="Messages sent by each learner")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Max random pause before each message (s)")
+    parser.add_argument("--llm-concurrency", type=int, default=8, help="Provider calls in flight at once")
+    parser.add_argument("--base-url", default=None, help="OpenAI-compatible server to use instead of the stub")
+    parser.add_argument("--latency", type=float, default=0.3, help="Stub: seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Stub: pace of the following tokens")
+    parser.add_argument("--tokens", type=int, default=32, help="Stub: tokens per reply")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Stub: share of requests failing with a 503")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    def report(base_url):
+        result = run(args.learners, args.turns, base_url, args.think_time, args.llm_concurrency, args.seed)
+        print(f"{result['learners']} learners, {result['messages']} replies, {result['errors']} errors "
+              f"in {result['elapsed']:.1f}s -> {result['throughput']:.1f} replies/s")
+        for name in ("first_token", "reply"):
+            print(f"{name:>12}: " + "  ".join(f"p{q} {1000 * result[f'{name}_p{q}']:8.1f} ms" for q in (50, 90, 99)))
+
+    if args.base_url:
+        report(args.base_url)
+        return
+
+    stub = StubInferenceServer(
+        chunks=lorem_tokens(args.tokens), delay=args.latency, tokens_per_second=args.tokens_per_second or None,
+        error_rate=args.error_rate, seed=args.seed, record_requests=False,
+    )
+    with stub:
+        report(stub.base_url + "/v1")
+    print(f"Stub served {stub.received} requests, {stub.errors} errors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Synthetic, seeded data for the benchmarks: the same seed always gives the same users and profiles.
+Answers are drawn from the options offered by the Gradio forms and the Tkinter profile window.
+"""
+
+import random
+
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+
+BACKGROUNDS = ["Software Engineering", "Biology", "Physics", "Chemistry", "Medicine", "Economics"]
+SUPPORT_NEEDS = ["Project problematic", "Mathematics", "Statistics", "Programming", "Biological Sciences",
+                 "Biomedical Sciences", "Chemistry", "Physics", "Astronomy", "Environmental Sciences",
+                 "Computer Sciences", "Engineering", "Medical Sciences"]
+EXPLANATION_STYLES = ["Step-by-step", "Analogy-driven", "Big-picture-first", "Details-first"]
+MAIN_FIELDS = ["Chimie", "Physique", "Mathématiques", "Informatique", "Sciences des matériaux", "Biologie",
+               "Économie", "Autre"]
+
+
+def knowledge_profile(rng, name):
+    return KnowledgeProfile(
+        name=name,
+        age=str(rng.randint(18, 65)),
+        background=rng.choice(BACKGROUNDS),
+        familiarity_kw=rng.choice(["None", "Basic", "Intermediate", "Advanced"]),
+        math_eq=rng.randint(0, 10),
+        programming_comfort=rng.randint(0, 10),
+        confidence_asking=rng.randint(0, 10),
+        support_needs=rng.sample(SUPPORT_NEEDS, rng.randint(0, 3)),
+    )
+
+
+def learner_profile(rng):
+    return LearnerProfile(
+        problematic="Understand the project's goals",
+        goal_understanding=rng.randint(0, 10),
+        precision_level=rng.randint(0, 10),
+        analogies=rng.randint(0, 10),
+        conciseness=rng.randint(0, 10),
+        learning_mode=rng.randint(0, 10),
+        explanation_style=rng.choice(EXPLANATION_STYLES),
+        interactivity=rng.choice(["No", "Yes"]),
+        tone=rng.choice(["Formal", "Casual"]),
+        humor=rng.choice(["Playful/Humorous", "Serious/Focused"]),
+        motivation=rng.choice(["No", "Yes"]),
+        adaptability=rng.choice(["No", "Yes"]),
+    )
+
+
+def users(n, seed=0):
+    """[(username, KnowledgeProfile, LearnerProfile)] for n learners."""
+    rng = random.Random(seed)
+    return [(f"learner_{i}", knowledge_profile(rng, f"Learner {i}"), learner_profile(rng)) for i in range(n)]
+
+
+def project_profiles(n, seed=0):
+    """[(learner_id, profile dict)] as stored by the Tkinter projects, for n learners."""
+    rng = random.Random(seed)
+    return [(i + 1, {
+        "name": f"Expert {i}",
+        "prereq_level": round(rng.random(), 3),
+        "granularity": round(rng.random(), 3),
+        "cognitive_load_tol": round(rng.random(), 3),
+        "formalism_first": round(rng.random(), 3),
+        "checkpoint_freq": round(rng.random(), 3),
+        "main_field": rng.choice(MAIN_FIELDS),
+        "domain_expertise": "",
+    }) for i in range(n)]
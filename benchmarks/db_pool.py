@@ -0,0 +1,78 @@
+"""
+Compare ops/sec of db.db_table_management with the connection pool against the previous
+connect-per-call behaviour.
+
+Run from the project root: `python -m benchmarks.db_pool [--ops 2000] [--threads 4]`
+"""
+
+import argparse
+import os
+import sqlite3 as sql
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import db.db_table_management as tm
+from db import constants
+from db.connection_pool import close_all_pools, get_connection
+from db.db_management import init_db
+from profiles.knowledge_profile import KnowledgeProfile
+
+
+@contextmanager
+def unpooled_connection(db_path=None):
+    conn = sql.connect(db_path or constants.DB_PATH)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def user_session(index):
+    username = f"user_{index}"
+    tm.create_user(username)
+    tm.create_knowledge_profile(username, KnowledgeProfile(name=username, age="20", support_needs=["Mathematics"]))
+    tm.get_user_id_by_username(username)
+    tm.get_knowledge_profile_by_username(username)
+
+
+def run(label, connection_factory, ops, threads):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        constants.DB_PATH = os.path.join(tmp_dir, f"{label}.db")
+        init_db()
+        tm.get_connection = connection_factory
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(user_session, range(ops)))
+        elapsed = time.perf_counter() - start
+
+        close_all_pools()
+
+    # Each session runs 4 public calls (create user, create profile, 2 lookups)
+    ops_per_sec = ops * 4 / elapsed
+    print(f"{label:>10}: {ops * 4} ops in {elapsed:.3f}s -> {ops_per_sec:,.0f} ops/sec")
+    return ops_per_sec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=2000, help="Number of user sessions to simulate")
+    parser.add_argument("--threads", type=int, default=4, help="Number of concurrent worker threads")
+    args = parser.parse_args()
+
+    original_path = constants.DB_PATH
+    try:
+        before = run("unpooled", unpooled_connection, args.ops, args.threads)
+        after = run("pooled", get_connection, args.ops, args.threads)
+    finally:
+        constants.DB_PATH = original_path
+        tm.get_connection = get_connection
+
+    print(f"Speed-up: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
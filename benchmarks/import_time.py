@@ -0,0 +1,80 @@
+"""
+Import-time profile of the app: runs `python -X importtime` in a fresh interpreter and prints the slowest
+imports, the self time per top-level package, and the time to build the Gradio app.
+
+Run from the project root: `python -m benchmarks.import_time [--module ui.gradio.app] [--top 25]`
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUILD_APP = """
+import time
+start = time.perf_counter()
+from ui.gradio.app import build_app
+build_app()
+print(time.perf_counter() - start)
+"""
+
+
+def parse_importtime(output):
+    """
+    Rows of `-X importtime` output as (module, self_us, cumulative_us, depth), in import order.
+    Depth is the nesting level of the import (0 for modules imported by the script itself).
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+
+    return rows
+
+
+def self_time_by_package(rows):
+    totals = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        totals[module.split(".")[0]] += self_us
+
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def run_python(code, *flags):
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="ui.gradio.app", help="Module whose import is profiled")
+    parser.add_argument("--top", type=int, default=25, help="Rows shown in each table")
+    args = parser.parse_args()
+
+    rows = parse_importtime(run_python(f"import {args.module}", "-X", "importtime").stderr)
+    total = next((cumulative for module, _, cumulative, _ in rows if module == args.module), 0)
+    print(f"import {args.module}: {total / 1000:.1f} ms, {len(rows)} modules")
+
+    print(f"\n{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, self_us, cumulative_us, depth in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {'  ' * depth}{module}")
+
+    print(f"\n{'self ms':>9}  package")
+    for package, self_us in self_time_by_package(rows)[:args.top]:
+        print(f"{self_us / 1000:>9.1f}  {package}")
+
+    if args.module == "ui.gradio.app":
+        build = float(run_python(BUILD_APP).stdout.strip().splitlines()[-1])
+        print(f"\nCold start to built app (all routes): {build * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Benchmarks of the database, agent and visualization hot paths, compared against a saved baseline.
+
+Each benchmark runs on a fresh temporary database with seeded synthetic data (see benchmarks.data) and
+reports microseconds per operation, the median of `--repeat` runs. A result slower than the baseline by
+more than `--threshold` is flagged as a regression and the exit code is 1.
+
+Run from the project root:
+    python -m benchmarks.suite                 # run all, compare with benchmarks/baseline.json
+    python -m benchmarks.suite db_lookup --repeat 5
+    python -m benchmarks.suite --save          # run all and save the results as the new baseline
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks import data
+from db import constants
+from db.connection_pool import close_all_pools
+from db.db_table_management import (
+    create_knowledge_profile, create_learner_profile, create_user, get_knowledge_profile_by_username,
+    get_learner_profile_by_username, load_full_user_context,
+)
+from db.projects import ProjectRegistry
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+BENCHMARKS = {}  # name -> (function, sizes)
+
+
+def benchmark(name, sizes):
+    """Registers fn(size) -> {result name: (operations, seconds)} to run once per size."""
+    def register(fn):
+        BENCHMARKS[name] = (fn, sizes)
+        return fn
+
+    return register
+
+
+class fresh_database:
+    """Points db.constants.DB_PATH at a new temporary database for the duration of the block."""
+
+    def __enter__(self):
+        self._tmp_dir = tempfile.TemporaryDirectory()
+        self._original_path = constants.DB_PATH
+        constants.DB_PATH = ProjectRegistry().open(os.path.join(self._tmp_dir.name, "bench.db"))
+        return constants.DB_PATH
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        from llm.prompt_cache import close_prompt_caches
+        from llm.response_cache import clear_response_caches
+        from llm.transcripts import close_transcript_stores
+
+        close_transcript_stores()
+        close_prompt_caches()
+        clear_response_caches()
+        close_all_pools()
+        constants.DB_PATH = self._original_path
+        self._tmp_dir.cleanup()
+
+
+def insert_users(users):
+    for username, knowledge_profile, learner_profile in users:
+        create_user(username)
+        create_knowledge_profile(username, knowledge_profile)
+        create_learner_profile(username, learner_profile)
+
+
+@benchmark("db_insert", sizes=[1000])
+def bench_db_insert(size):
+    users = data.users(size)
+    with fresh_database():
+        start = time.perf_counter()
+        insert_users(users)
+        elapsed = time.perf_counter() - start
+
+    return {"db_insert": (3 * size, elapsed)}
+
+
+@benchmark("db_lookup", sizes=[1000])
+def bench_db_lookup(size):
+    users = data.users(size)
+    usernames = [username for username, _, _ in users]
+    random.Random(1).shuffle(usernames)
+
+    with fresh_database():
+        insert_users(users)
+        results = {}
+        for lookup in (get_knowledge_profile_by_username, get_learner_profile_by_username, load_full_user_context):
+            start = time.perf_counter()
+            for username in usernames:
+                lookup(username)
+            results[f"db_lookup.{lookup.__name__}"] = (size, time.perf_counter() - start)
+
+    return results
+
+
+@benchmark("agent_construct", sizes=[200])
+def bench_agent_construct(size):
+    from llm.agent import Agent
+
+    users = data.users(size)
+    with fresh_database():
+        insert_users(users)
+        results = {}
+        # An agent with its system prompt: the first pass renders and stores every prompt, the second
+        # finds them in the prompt cache
+        for label in ("cold", "warm"):
+            start = time.perf_counter()
+            for username, _, _ in users:
+                Agent(username, base_url="http://127.0.0.1:9/v1").system_prompt()
+            results[f"agent_construct.{label}"] = (size, time.perf_counter() - start)
+
+    return results
+
+
+@benchmark("agent_chat", sizes=[20])
+def bench_agent_chat(size, turns=5):
+    """`size` learners each have a `turns`-message conversation with a local fake server (no network delay)."""
+    from llm.agent import Agent
+    from llm.stub_server import StubInferenceServer
+
+    users = data.users(size)
+    with fresh_database(), StubInferenceServer(chunks=["A", " short", " reply", "."]) as server:
+        insert_users(users)
+        agents = [Agent(username, base_url=server.base_url + "/v1") for username, _, _ in users]
+        for agent in agents:
+            agent.system_prompt()
+
+        async def stream(agent, message):
+            return [token async for token in agent.stream_message(message)]
+
+        start = time.perf_counter()
+        for turn in range(turns):
+            for agent in agents:
+                agent.send_message(f"Question {turn} from {agent.username}")
+        send_elapsed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for agent in agents:
+            asyncio.run(stream(agent, f"Streamed question from {agent.username}"))
+        stream_elapsed = time.perf_counter() - start
+
+    return {"agent_chat.send_message": (size * turns, send_elapsed), "agent_chat.stream_message": (size, stream_elapsed)}
+
+
+@benchmark("create_graph", sizes=[100, 1000, 10000])
+def bench_create_graph(size):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    from llm.graphvisualization import create_graph
+
+    profiles = data.project_profiles(size)
+    start = time.perf_counter()
+    fig = create_graph(profiles, "Benchmark")
+    elapsed = time.perf_counter() - start
+    plt.close(fig)
+
+    return {"create_graph": (1, elapsed)}
+
+
+def run(names, repeat=3, sizes=None):
+    """{"<result>[<size>]": median microseconds per operation} for the given benchmarks."""
+    results = {}
+    for name in names:
+        fn, default_sizes = BENCHMARKS[name]
+        for size in sizes or default_sizes:
+            runs = {}
+            for _ in range(repeat):
+                for result, (operations, seconds) in fn(size).items():
+                    runs.setdefault(result, []).append(1e6 * seconds / operations)
+
+            for result, us_per_op in runs.items():
+                key = f"{result}[{size}]"
+                results[key] = round(statistics.median(us_per_op), 2)
+                print(f"{key:<55} {results[key]:>12,.2f} us/op", flush=True)
+
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """[(key, baseline us/op, current us/op)] for the results slower than baseline * (1 + threshold)."""
+    return [(key, baseline[key], value) for key, value in results.items()
+            if key in baseline and value > baseline[key] * (1 + threshold)]
+
+
+def environment():
+    return {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.suite", description="Hot path benchmarks.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run, among {list(BENCHMARKS)} (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark, the median is kept")
+    parser.add_argument("--sizes", type=int, nargs="+", help="Override the sizes of the selected benchmarks")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline file to compare with or save to")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown before a result is flagged (0.25 = 25%%)")
+    parser.add_argument("--save", action="store_true", help="Save the results as the new baseline")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks {unknown}")
+
+    results = run(args.names or list(BENCHMARKS), args.repeat, args.sizes)
+
+    if args.save:
+        baseline = {"environment": environment(), "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline["results"] = json.load(f)["results"]
+        baseline["results"].update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, run with --save to create one")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment") != environment():
+        print("Note: the baseline was recorded on a different environment, differences may not be regressions")
+
+    regressions = compare(results, baseline["results"], args.threshold)
+    for key, before, after in regressions:
+        print(f"REGRESSION {key}: {before:,.2f} -> {after:,.2f} us/op ({after / before - 1:+.0%})")
+    if not regressions:
+        print(f"No regression above {args.threshold:.0%}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Bulk import/export of users with their knowledge and learner profiles.
+
+Rows are flat records: `username` plus any KnowledgeProfile and LearnerProfile fields. CSV and JSONL
+are both streamed, so files of any size are processed in constant memory. In CSV files `support_needs`
+is a ';'-separated list.
+
+    python -m db.bulk import learners.csv [--chunk-size 1000] [--db path/to/project.db]
+    python -m db.bulk export learners.jsonl [--db path/to/project.db]
+"""
+
+import argparse
+import csv
+import json
+import sys
+from dataclasses import asdict, dataclass, field, fields
+from typing import List, Tuple
+
+from db.connection_pool import get_connection
+from db.db_table_management import (
+    KNOWLEDGE_PROFILE_INSERT, LEARNER_PROFILE_INSERT, MAX_USERNAMES_PER_QUERY, USER_CONTEXT_QUERY,
+    knowledge_profile_params, learner_profile_params, save_support_needs, user_context_from_row
+)
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+
+KNOWLEDGE_FIELDS = [f.name for f in fields(KnowledgeProfile)]
+LEARNER_FIELDS = [f.name for f in fields(LearnerProfile)]
+COLUMNS = ["username"] + KNOWLEDGE_FIELDS + LEARNER_FIELDS
+
+SLIDER_FIELDS = {
+    "math_eq", "programming_comfort", "confidence_asking",
+    "goal_understanding", "precision_level", "analogies", "conciseness", "learning_mode",
+}
+
+CSV_LIST_SEPARATOR = ";"
+DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass
+class BulkReport:
+    rows: int = 0
+    users_created: int = 0
+    knowledge_profiles: int = 0
+    learner_profiles: int = 0
+    errors: List[Tuple[int, str, str]] = field(default_factory=list)  # (row number, username, message)
+
+
+def read_rows(path):
+    """
+    Yields (row number, row) from a .csv or .jsonl file, one row at a time. CSV rows are dicts; JSONL lines
+    are yielded undecoded, so import_rows can report a malformed line as a row error.
+    """
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for number, row in enumerate(csv.DictReader(f), start=1):
+                yield number, row
+    elif path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for number, line in enumerate(f, start=1):
+                if line.strip():
+                    yield number, line
+    else:
+        raise ValueError(f"Unsupported file type '{path}', expected .csv or .jsonl.")
+
+
+def parse_row(row):
+    """Validates a raw row into (username, KnowledgeProfile or None, LearnerProfile or None)."""
+    if not isinstance(row, dict):
+        raise TypeError(f"Expected an object, got {type(row).__name__}.")
+
+    username = str(row.get("username") or "").strip()
+    if not username:
+        raise ValueError("Missing username.")
+
+    values = {}
+    for name in KNOWLEDGE_FIELDS + LEARNER_FIELDS:
+        value = row.get(name)
+        if value is None or value == "":
+            continue
+
+        if name in SLIDER_FIELDS:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"'{name}' must be an integer, got {value!r}.")
+            if not 0 <= value <= 10:
+                raise ValueError(f"'{name}' must be between 0 and 10, got {value}.")
+        elif name == "support_needs":
+            if isinstance(value, str):
+                value = [need.strip() for need in value.split(CSV_LIST_SEPARATOR) if need.strip()]
+            elif not isinstance(value, list) or not all(isinstance(need, str) and need.strip() for need in value):
+                raise ValueError(f"'support_needs' must be a list of non-empty strings, got {value!r}.")
+        else:
+            value = str(value)
+
+        values[name] = value
+
+    knowledge = {k: v for k, v in values.items() if k in KNOWLEDGE_FIELDS}
+    learner = {k: v for k, v in values.items() if k in LEARNER_FIELDS}
+
+    return (
+        username,
+        KnowledgeProfile(**knowledge) if knowledge else None,
+        LearnerProfile(**learner) if learner else None
+    )
+
+
+def import_rows(rows, chunk_size=DEFAULT_CHUNK_SIZE, db_path=None):
+    """
+    Imports (row number, dict or JSON line) pairs in chunked transactions. Invalid rows, and profiles for
+    users that already have one, are reported in the returned BulkReport instead of aborting the import.
+    """
+    report = BulkReport()
+    chunk = []
+    for number, row in rows:
+        report.rows += 1
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            chunk.append((number,) + parse_row(row))
+        except (ValueError, TypeError) as e:  # json.JSONDecodeError is a ValueError
+            username = row.get("username", "") if isinstance(row, dict) else ""
+            report.errors.append((number, str(username), str(e)))
+
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, report, db_path)
+            chunk = []
+
+    if chunk:
+        _import_chunk(chunk, report, db_path)
+
+    return report
+
+
+def _import_chunk(chunk, report, db_path):
+    usernames = list(dict.fromkeys(username for _, username, _, _ in chunk))
+
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+
+        before = conn.total_changes
+        cur.executemany("INSERT OR IGNORE INTO users (username) VALUES (?)", [(u,) for u in usernames])
+        report.users_created += conn.total_changes - before
+
+        # IN lists are capped like in db_table_management, whatever the chunk size
+        user_ids, has_knowledge, has_learner = {}, set(), set()
+        for start in range(0, len(usernames), MAX_USERNAMES_PER_QUERY):
+            batch = usernames[start:start + MAX_USERNAMES_PER_QUERY]
+            placeholders = ", ".join("?" for _ in batch)
+            cur.execute(f"SELECT username, user_id FROM users WHERE username IN ({placeholders})", batch)
+            batch_ids = dict(cur.fetchall())
+            user_ids.update(batch_ids)
+
+            ids = list(batch_ids.values())
+            id_placeholders = ", ".join("?" for _ in ids)
+            cur.execute(f"SELECT user_id FROM knowledge_profiles WHERE user_id IN ({id_placeholders})", ids)
+            has_knowledge.update(row[0] for row in cur.fetchall())
+            cur.execute(f"SELECT user_id FROM learner_profiles WHERE user_id IN ({id_placeholders})", ids)
+            has_learner.update(row[0] for row in cur.fetchall())
+
+        knowledge_rows, learner_rows, support_needs = [], [], {}
+        for number, username, knowledge_profile, learner_profile in chunk:
+            user_id = user_ids[username]
+
+            if knowledge_profile is not None:
+                if user_id in has_knowledge:
+                    report.errors.append((number, username, "User already has a knowledge profile."))
+                else:
+                    has_knowledge.add(user_id)
+                    knowledge_rows.append(knowledge_profile_params(user_id, knowledge_profile))
+                    support_needs[user_id] = knowledge_profile.support_needs
+
+            if learner_profile is not None:
+                if user_id in has_learner:
+                    report.errors.append((number, username, "User already has a learner profile."))
+                else:
+                    has_learner.add(user_id)
+                    learner_rows.append(learner_profile_params(user_id, learner_profile))
+
+        cur.executemany(KNOWLEDGE_PROFILE_INSERT, knowledge_rows)
+        save_support_needs(cur, support_needs)
+        cur.executemany(LEARNER_PROFILE_INSERT, learner_rows)
+
+    report.knowledge_profiles += len(knowledge_rows)
+    report.learner_profiles += len(learner_rows)
+
+
+def import_file(path, chunk_size=DEFAULT_CHUNK_SIZE, db_path=None):
+    return import_rows(read_rows(path), chunk_size=chunk_size, db_path=db_path)
+
+
+def iter_export_rows(db_path=None):
+    """Yields one flat dict per user, reading the database cursor lazily."""
+    with get_connection(db_path) as conn:
+        cur = conn.cursor()
+        cur.execute(USER_CONTEXT_QUERY + " ORDER BY u.user_id")
+
+        for row in cur:
+            context = user_context_from_row(row)
+            record = {"username": context.username}
+            if context.knowledge_profile is not None:
+                record.update(asdict(context.knowledge_profile))
+            if context.learner_profile is not None:
+                record.update(asdict(context.learner_profile))
+
+            yield record
+
+
+def export_file(path, db_path=None):
+    count = 0
+    if path.endswith(".csv"):
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            for record in iter_export_rows(db_path):
+                if "support_needs" in record:
+                    record["support_needs"] = CSV_LIST_SEPARATOR.join(record["support_needs"])
+                writer.writerow(record)
+                count += 1
+    elif path.endswith(".jsonl"):
+        with open(path, "w", encoding="utf-8") as f:
+            for record in iter_export_rows(db_path):
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+    else:
+        raise ValueError(f"Unsupported file type '{path}', expected .csv or .jsonl.")
+
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m db.bulk", description="Bulk import/export of users and profiles.")
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path", help="A .csv or .jsonl file")
+    parser.add_argument("--db", dest="db_path", default=None, help="Database file (defaults to db.constants.DB_PATH)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per transaction")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        count = export_file(args.path, db_path=args.db_path)
+        print(f"Exported {count} users to {args.path}")
+        return 0
+
+    report = import_file(args.path, chunk_size=args.chunk_size, db_path=args.db_path)
+    print(f"Read {report.rows} rows: {report.users_created} users, {report.knowledge_profiles} knowledge profiles, "
+          f"{report.learner_profiles} learner profiles created, {len(report.errors)} errors")
+    for number, username, message in report.errors:
+        print(f"  row {number} ({username or '?'}): {message}", file=sys.stderr)
+
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+import queue
+import sqlite3 as sql
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from db import constants
+
+
+DEFAULT_PRAGMAS = {
+    "synchronous": "NORMAL",
+    "cache_size": -8000,  # negative value is in KiB, so ~8 MB of page cache per connection
+    "mmap_size": 268435456,  # 256 MB
+    "temp_store": "MEMORY",
+}
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections for a single database file.
+
+    A thread borrows one connection for the outermost `connection()` block; nested blocks in the same
+    thread reuse it, so helper calls such as `get_user_id_by_username` run on the caller's connection and
+    inside the caller's transaction. The outermost block commits on success and rolls back on error.
+    """
+
+    def __init__(self, db_path, size=constants.DB_POOL_SIZE, timeout=constants.DB_TIMEOUT, pragmas=None):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = {**DEFAULT_PRAGMAS, **(pragmas or {})}
+
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._local = threading.local()
+        self._closed = False
+        self.borrowed = 0
+        self.reserved = 0  # get_connection calls between the LRU lookup and the borrow, guarded by _pools_lock
+        self._borrowed_lock = threading.Lock()
+
+    def _connect(self):
+        conn = sql.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+
+        return conn
+
+    @contextmanager
+    def connection(self):
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+
+        if self._closed:
+            raise RuntimeError(f"Connection pool for '{self.db_path}' is closed.")
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection available after {self.timeout}s.")
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self._connect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+        self._local.conn = conn
+        with self._borrowed_lock:
+            self.borrowed += 1
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            with self._borrowed_lock:
+                self.borrowed -= 1
+            self._local.conn = None
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            self._slots.release()
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+_pools = OrderedDict()  # db_path -> ConnectionPool, least recently used first
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path=None, reserve=False, **kwargs):
+    """
+    The pool of `db_path`, created on first use. With `reserve`, the pool is marked in use before the lock
+    is released, so it cannot be evicted before the caller borrows a connection (see get_connection).
+    """
+    db_path = db_path or constants.DB_PATH
+
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path, **kwargs)
+            _pools[db_path] = pool
+        _pools.move_to_end(db_path)
+        if reserve:
+            pool.reserved += 1
+
+        # Close the least recently used projects, but never one with a connection in use: a nested block
+        # would otherwise get a second connection to the same file and could deadlock on its write lock
+        idle = [path for path, p in _pools.items() if p.borrowed == 0 and p.reserved == 0 and path != db_path]
+        for path in idle[:max(len(_pools) - constants.DB_MAX_OPEN_PROJECTS, 0)]:
+            _pools.pop(path).close()
+
+    return pool
+
+
+@contextmanager
+def get_connection(db_path=None):
+    pool = get_pool(db_path, reserve=True)
+    try:
+        with pool.connection() as conn:
+            yield conn
+    finally:
+        with _pools_lock:
+            pool.reserved -= 1
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close()
@@ -1,5 +1,10 @@
 import os
 
 root_dir = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(root_dir, "database.db")
-print("Database path: ", DB_PATH)
\ No newline at end of file
+DB_PATH = os.path.abspath(os.environ.get("MINDMESH_DB_PATH", os.path.join(root_dir, "database.db")))
+DB_POOL_SIZE = int(os.environ.get("MINDMESH_DB_POOL_SIZE", 8))
+DB_TIMEOUT = float(os.environ.get("MINDMESH_DB_TIMEOUT", 30))
+# Project databases with an open connection pool at the same time; the least recently used are closed
+DB_MAX_OPEN_PROJECTS = int(os.environ.get("MINDMESH_DB_MAX_OPEN_PROJECTS", 8))
+# Exported profile maps (.json) the Admin page may show; files outside this directory are refused
+MAP_EXPORT_DIR = os.path.abspath(os.environ.get("MINDMESH_MAP_EXPORT_DIR", os.path.join(root_dir, "maps")))
@@ -1,67 +1,103 @@
+import json
 import sqlite3 as sql
 from sqlite3 import Cursor
-from db.constants import DB_PATH
+from db import constants
+from db.connection_pool import get_connection
+from db.db_table_management import save_support_needs
 
 
-def clear_db_data():
+def clear_db_data(db_path=None):
     try:
-        conn = sql.connect(DB_PATH)
-        cur = conn.cursor()
+        with get_connection(db_path) as conn:
+            cur = conn.cursor()
 
-        cur.execute("DELETE FROM admins")
-        cur.execute("DELETE FROM users")
-        cur.execute("DELETE FROM knowledge_profiles")
-        cur.execute("DELETE FROM learner_profiles")
-
-        conn.commit()
+            cur.execute("DELETE FROM admins")
+            cur.execute("DELETE FROM users")
+            cur.execute("DELETE FROM knowledge_profiles")
+            cur.execute("DELETE FROM learner_profiles")
+            cur.execute("DELETE FROM knowledge_profile_support_needs")
+            cur.execute("DELETE FROM support_needs")
+            cur.execute("DELETE FROM transcripts")
 
         print("Database data cleared")
 
     except sql.Error as e:
         print("Error clearing database's data: ", e)
 
-    finally:
-        if conn:
-            conn.close()
-
 
-def clear_db():
+def clear_db(db_path=None):
     try:
-        conn = sql.connect(DB_PATH)
-        cur = conn.cursor()
-
-        cur.execute("DROP TABLE IF EXISTS admins")
-        cur.execute("DROP TABLE IF EXISTS users")
-        cur.execute("DROP TABLE IF EXISTS knowledge_profiles")
-        cur.execute("DROP TABLE IF EXISTS learner_profiles")
-
-        conn.commit()
+        with get_connection(db_path) as conn:
+            cur = conn.cursor()
+
+            cur.execute("DROP TABLE IF EXISTS admins")
+            cur.execute("DROP TABLE IF EXISTS users")
+            cur.execute("DROP TABLE IF EXISTS knowledge_profiles")
+            cur.execute("DROP TABLE IF EXISTS learner_profiles")
+            cur.execute("DROP TABLE IF EXISTS knowledge_profile_support_needs")
+            cur.execute("DROP TABLE IF EXISTS support_needs")
+            cur.execute("DROP TABLE IF EXISTS transcripts")
+            cur.execute("PRAGMA user_version = 0")
 
         print("Database cleared")
 
     except sql.Error as e:
         print("Error clearing database: ", e)
 
-    finally:
-        if conn:
-            conn.close()
+
+def init_db(db_path=None):
+    db_path = db_path or constants.DB_PATH
+    print("Initializing database at: ", db_path)
+
+    with get_connection(db_path) as conn:
+        applied = migrate(conn)
+        print(f"Database schema at version {get_schema_version(conn)} ({len(applied)} migrations applied)")
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
 
-def init_db():
-    print("Initializing database at: ", DB_PATH)
+def migrate(conn, migrations=None):
+    """
+    Applies the migrations newer than the database's `PRAGMA user_version`, in order, in one transaction.
+    Returns the versions applied. BEGIN IMMEDIATE takes the write lock before the version is read, so two
+    processes starting at once cannot both apply the same migration.
+    """
+    migrations = MIGRATIONS if migrations is None else migrations
 
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+    # Up-to-date databases, the common case, are checked without taking the write lock
+    if not migrations or get_schema_version(conn) >= migrations[-1][0]:
+        return []
 
-    print("Creating tables")
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+
+    current = get_schema_version(conn)
+    applied = []
+    for version, description, apply in migrations:
+        if version <= current:
+            continue
+
+        apply(conn.cursor())
+        conn.execute(f"PRAGMA user_version = {int(version)}")
+        applied.append(version)
+
+    return applied
+
+
+def create_tables(cur: Cursor):
+    # Tables created before versioning existed are left as they are
     initialize_admins_table(cur)
     initialize_users_table(cur)
     initialize_knowledge_profiles_table(cur)
     initialize_learner_profiles_table(cur)
-    print("Tables created successfully")
 
-    conn.commit()
-    conn.close()
+
+def create_profile_indexes(cur: Cursor):
+    # Lookups by username and by user_id already use the UNIQUE constraints' automatic indexes
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_knowledge_profiles_name ON knowledge_profiles (name)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_knowledge_profiles_background ON knowledge_profiles (background)")
 
 
 def initialize_admins_table(cur: Cursor):
@@ -120,3 +156,64 @@ def initialize_learner_profiles_table(cur: Cursor):
             FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
             )
     """)
+
+
+def normalize_support_needs(cur: Cursor):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS support_needs (
+            tag_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tag TEXT NOT NULL UNIQUE
+        )
+    """)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS knowledge_profile_support_needs (
+            user_id INTEGER NOT NULL,
+            tag_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, tag_id),
+            FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE,
+            FOREIGN KEY (tag_id) REFERENCES support_needs(tag_id) ON DELETE CASCADE
+        ) WITHOUT ROWID
+    """)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_knowledge_profile_support_needs_tag
+        ON knowledge_profile_support_needs (tag_id, user_id)
+    """)
+
+    # Older rows hold the needs as one ", "-joined string: store them as a JSON list and fill the tag tables
+    cur.execute("SELECT user_id, support_needs FROM knowledge_profiles")
+    support_needs_by_user = {}
+    for user_id, value in cur.fetchall():
+        if value.startswith("["):
+            support_needs_by_user[user_id] = json.loads(value)
+        else:
+            support_needs_by_user[user_id] = [need for need in value.split(", ") if need]
+
+    cur.executemany(
+        "UPDATE knowledge_profiles SET support_needs = ? WHERE user_id = ?",
+        [(json.dumps(needs), user_id) for user_id, needs in support_needs_by_user.items()]
+    )
+    save_support_needs(cur, support_needs_by_user)
+
+
+def create_transcripts_table(cur: Cursor):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS transcripts (
+            message_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+    """)
+    # Tail reads walk this index backwards from the newest message of one user
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_username ON transcripts (username, message_id)")
+
+
+# (version, description, function taking a cursor). Append new migrations with the next version; never edit
+# or reorder the ones already released, since databases in the wild record the last version they applied.
+MIGRATIONS = [
+    (1, "Create tables", create_tables),
+    (2, "Index knowledge profiles by name and background", create_profile_indexes),
+    (3, "Move support needs to a tag table", normalize_support_needs),
+    (4, "Add chat transcripts", create_transcripts_table),
+]
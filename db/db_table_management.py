@@ -1,37 +1,46 @@
-import sqlite3 as sql
+import json
+
 from profiles.knowledge_profile import KnowledgeProfile
 from profiles.learner_profile import LearnerProfile
-from db.constants import DB_PATH
+from profiles.user_context import UserContext
+from db.connection_pool import get_connection
+from instrumentation.metrics import timed
 
+# Every public query below is timed into this histogram, labelled with the function's name
+query_timed = timed("mindmesh_db_query_seconds", "Duration of db_table_management calls", label="query")
 
-def create_admin(username: str):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+# Callables taking a username, run after that user's profiles are written (e.g. to drop cached prompts)
+profile_change_listeners = []
 
-    cur.execute("INSERT INTO admins (admin_username) VALUES (?)", (username,))
 
-    conn.commit()
-    conn.close()
+def notify_profile_change(username):
+    for listener in profile_change_listeners:
+        listener(username)
 
 
-def create_user(username: str):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+@query_timed
+def create_admin(username: str):
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute("INSERT INTO users (username) VALUES (?)", (username,))
+        cur.execute("INSERT INTO admins (admin_username) VALUES (?)", (username,))
 
-    conn.commit()
-    conn.close()
 
+@query_timed
+def create_user(username: str):
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-def get_user_id_by_username(username: str):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+        cur.execute("INSERT INTO users (username) VALUES (?)", (username,))
 
-    cur.execute("SELECT user_id FROM users WHERE username = ?", (username,))
-    row = cur.fetchone()
 
-    conn.close()
+@query_timed
+def get_user_id_by_username(username: str):
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("SELECT user_id FROM users WHERE username = ?", (username,))
+        row = cur.fetchone()
 
     if row:
         return row[0]  # Return user_id
@@ -39,19 +48,22 @@ def get_user_id_by_username(username: str):
     return None
 
 
-def create_knowledge_profile(username, knowledge_profile: KnowledgeProfile):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+KNOWLEDGE_PROFILE_INSERT = """
+    INSERT INTO knowledge_profiles (
+        user_id, name, age, background, familiarity_kw, math_eq, programming_comfort, confidence_asking, support_needs
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-    user_id = get_user_id_by_username(username)
-    if user_id is None:
-        raise ValueError(f"User '{username}' does not exist.")
+LEARNER_PROFILE_INSERT = """
+    INSERT INTO learner_profiles (
+        user_id, problematic, goal_understanding, precision_level, analogies, conciseness,
+        learning_mode, explanation_style, interactivity, tone, humor, motivation, adaptability
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-    cur.execute("""
-                INSERT INTO knowledge_profiles (
-                    user_id, name, age, background, familiarity_kw, math_eq, programming_comfort, confidence_asking, support_needs
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
+
+def knowledge_profile_params(user_id, knowledge_profile: KnowledgeProfile):
+    return (
         user_id,
         knowledge_profile.name,
         knowledge_profile.age,
@@ -60,27 +72,129 @@ def create_knowledge_profile(username, knowledge_profile: KnowledgeProfile):
         knowledge_profile.math_eq,
         knowledge_profile.programming_comfort,
         knowledge_profile.confidence_asking,
-        ", ".join(knowledge_profile.support_needs)
-    ))
+        json.dumps(list(knowledge_profile.support_needs))
+    )
 
-    conn.commit()
-    conn.close()
 
+def learner_profile_params(user_id, learner_profile: LearnerProfile):
+    return (
+        user_id,
+        learner_profile.problematic,
+        learner_profile.goal_understanding,
+        learner_profile.precision_level,
+        learner_profile.analogies,
+        learner_profile.conciseness,
+        learner_profile.learning_mode,
+        learner_profile.explanation_style,
+        learner_profile.interactivity,
+        learner_profile.tone,
+        learner_profile.humor,
+        learner_profile.motivation,
+        learner_profile.adaptability
+    )
 
-def get_knowledge_profile_by_username(username):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
 
-    user_id = get_user_id_by_username(username)
+@query_timed
+def create_knowledge_profile(username, knowledge_profile: KnowledgeProfile):
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        user_id = get_user_id_by_username(username)
+        if user_id is None:
+            raise ValueError(f"User '{username}' does not exist.")
 
-    cur.execute("SELECT * FROM knowledge_profiles WHERE user_id = ?", (user_id,))
-    row = cur.fetchone()
+        cur.execute(KNOWLEDGE_PROFILE_INSERT, knowledge_profile_params(user_id, knowledge_profile))
+        save_support_needs(cur, {user_id: knowledge_profile.support_needs})
 
-    conn.close()
+    notify_profile_change(username)
+
+
+def save_support_needs(cur, support_needs_by_user):
+    """
+    Replaces the support need tags of each user_id in `support_needs_by_user` ({user_id: [tag, ...]}).
+    The JSON list in knowledge_profiles.support_needs keeps the order for round-trips; the tag tables are
+    what queries by tag go through.
+    """
+    user_ids = list(support_needs_by_user)
+    cur.executemany("DELETE FROM knowledge_profile_support_needs WHERE user_id = ?", [(u,) for u in user_ids])
+
+    tags = list(dict.fromkeys(tag for needs in support_needs_by_user.values() for tag in needs))
+    cur.executemany("INSERT OR IGNORE INTO support_needs (tag) VALUES (?)", [(tag,) for tag in tags])
+
+    tag_ids = {}
+    for start in range(0, len(tags), MAX_USERNAMES_PER_QUERY):
+        chunk = tags[start:start + MAX_USERNAMES_PER_QUERY]
+        placeholders = ", ".join("?" for _ in chunk)
+        cur.execute(f"SELECT tag, tag_id FROM support_needs WHERE tag IN ({placeholders})", chunk)
+        tag_ids.update(cur.fetchall())
+
+    cur.executemany(
+        "INSERT OR IGNORE INTO knowledge_profile_support_needs (user_id, tag_id) VALUES (?, ?)",
+        [(user_id, tag_ids[tag]) for user_id, needs in support_needs_by_user.items() for tag in needs]
+    )
+
+
+@query_timed
+def get_usernames_by_support_need(tag):
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT u.username
+            FROM support_needs t
+            JOIN knowledge_profile_support_needs s ON s.tag_id = t.tag_id
+            JOIN users u ON u.user_id = s.user_id
+            WHERE t.tag = ?
+            ORDER BY u.username
+        """, (tag,))
+        rows = cur.fetchall()
+
+    return [row[0] for row in rows]
+
+
+@query_timed
+def rank_users_by_support_needs(tags, limit=10):
+    """Returns [(username, number of shared tags)], most shared tags first."""
+    tags = list(dict.fromkeys(tags))[:MAX_USERNAMES_PER_QUERY]
+    if not tags:
+        return []
+
+    placeholders = ", ".join("?" for _ in tags)
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute(f"""
+            SELECT u.username, COUNT(*) AS overlap
+            FROM support_needs t
+            JOIN knowledge_profile_support_needs s ON s.tag_id = t.tag_id
+            JOIN users u ON u.user_id = s.user_id
+            WHERE t.tag IN ({placeholders})
+            GROUP BY s.user_id
+            ORDER BY overlap DESC, u.username
+            LIMIT ?
+        """, tags + [limit])
+        rows = cur.fetchall()
+
+    return rows
+
+
+@query_timed
+def get_knowledge_profile_by_username(username):
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        user_id = get_user_id_by_username(username)
+
+        cur.execute("SELECT * FROM knowledge_profiles WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
 
     if row is None:
         raise ValueError(f"User '{username}' does not exist.")
 
+    return knowledge_profile_from_row(row)
+
+
+def knowledge_profile_from_row(row):
     knowledge_profile = KnowledgeProfile(
         name=row[2],
         age=row[3],
@@ -89,59 +203,43 @@ def get_knowledge_profile_by_username(username):
         math_eq=row[6],
         programming_comfort=row[7],
         confidence_asking=row[8],
-        support_needs=row[9]
+        support_needs=json.loads(row[9])
     )
 
     return knowledge_profile
 
 
+@query_timed
 def create_learner_profile(username, learner_profile: LearnerProfile):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-    user_id = get_user_id_by_username(username)
-    if user_id is None:
-        raise ValueError(f"User '{username}' does not exist.")
+        user_id = get_user_id_by_username(username)
+        if user_id is None:
+            raise ValueError(f"User '{username}' does not exist.")
 
-    cur.execute("""
-                INSERT INTO learner_profiles (
-                    user_id, problematic, goal_understanding, precision_level, analogies, conciseness, 
-                    learning_mode, explanation_style, interactivity, tone, humor, motivation, adaptability
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-        user_id,
-        learner_profile.problematic,
-        learner_profile.goal_understanding,
-        learner_profile.precision_level,
-        learner_profile.analogies,
-        learner_profile.conciseness,
-        learner_profile.learning_mode,
-        learner_profile.explanation_style,
-        learner_profile.interactivity,
-        learner_profile.tone,
-        learner_profile.humor,
-        learner_profile.motivation,
-        learner_profile.adaptability
-    ))
+        cur.execute(LEARNER_PROFILE_INSERT, learner_profile_params(user_id, learner_profile))
 
-    conn.commit()
-    conn.close()
+    notify_profile_change(username)
 
 
+@query_timed
 def get_learner_profile_by_username(username):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-    user_id = get_user_id_by_username(username)
+        user_id = get_user_id_by_username(username)
 
-    cur.execute("SELECT * FROM learner_profiles WHERE user_id = ?", (user_id,))
-    row = cur.fetchone()
-
-    conn.close()
+        cur.execute("SELECT * FROM learner_profiles WHERE user_id = ?", (user_id,))
+        row = cur.fetchone()
 
     if row is None:
         raise ValueError(f"User '{username}' does not exist.")
 
+    return learner_profile_from_row(row)
+
+
+def learner_profile_from_row(row):
     learner_profile = LearnerProfile(
         problematic=row[2],
         goal_understanding=row[3],
@@ -160,6 +258,71 @@ def get_learner_profile_by_username(username):
     return learner_profile
 
 
+# Column layout of the users/knowledge_profiles/learner_profiles JOIN used by the context loaders
+USER_COLUMNS = 2
+KNOWLEDGE_PROFILE_COLUMNS = 10
+LEARNER_PROFILE_COLUMNS = 14
+
+USER_CONTEXT_QUERY = """
+    SELECT u.user_id, u.username, kp.*, lp.*
+    FROM users u
+    LEFT JOIN knowledge_profiles kp ON kp.user_id = u.user_id
+    LEFT JOIN learner_profiles lp ON lp.user_id = u.user_id
+"""
+
+# Stay well below SQLite's default limit on bound parameters per statement
+MAX_USERNAMES_PER_QUERY = 500
+
+
+def user_context_from_row(row):
+    kp_start = USER_COLUMNS
+    lp_start = kp_start + KNOWLEDGE_PROFILE_COLUMNS
+
+    kp_row = row[kp_start:lp_start]
+    lp_row = row[lp_start:lp_start + LEARNER_PROFILE_COLUMNS]
+
+    return UserContext(
+        user_id=row[0],
+        username=row[1],
+        knowledge_profile=knowledge_profile_from_row(kp_row) if kp_row[0] is not None else None,
+        learner_profile=learner_profile_from_row(lp_row) if lp_row[0] is not None else None
+    )
+
+
+@query_timed
+def load_full_user_context(username):
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute(USER_CONTEXT_QUERY + " WHERE u.username = ?", (username,))
+        row = cur.fetchone()
+
+    if row is None:
+        return None
+
+    return user_context_from_row(row)
+
+
+@query_timed
+def load_full_user_contexts(usernames):
+    usernames = list(dict.fromkeys(usernames))
+    contexts = {}
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        for start in range(0, len(usernames), MAX_USERNAMES_PER_QUERY):
+            chunk = usernames[start:start + MAX_USERNAMES_PER_QUERY]
+            placeholders = ", ".join("?" for _ in chunk)
+
+            cur.execute(USER_CONTEXT_QUERY + f" WHERE u.username IN ({placeholders})", chunk)
+            for row in cur.fetchall():
+                context = user_context_from_row(row)
+                contexts[context.username] = context
+
+    return contexts
+
+
 # def set_kp_value_by_username(username, field, value):
 #     conn = sql.connect(DB_PATH)
 #     cur = conn.cursor()
@@ -197,49 +360,142 @@ def get_learner_profile_by_username(username):
 #     conn.close()
 
 
+@query_timed
 def get_all_users():
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-    cur.execute("SELECT * FROM users")
-    rows = cur.fetchall()
-
-    conn.close()
+        cur.execute("SELECT * FROM users")
+        rows = cur.fetchall()
 
     return rows
 
 
+@query_timed
 def get_all_knowledge_profiles():
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
-
-    cur.execute("SELECT * FROM knowledge_profiles")
-    rows = cur.fetchall()
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-    conn.close()
+        cur.execute("SELECT * FROM knowledge_profiles")
+        rows = cur.fetchall()
 
     return rows
 
 
+@query_timed
 def get_all_learner_profiles():
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("SELECT * FROM learner_profiles")
+        rows = cur.fetchall()
+
+    return rows
+
+
+# Keyset pagination: pages are ordered by user_id and the next page starts after the last user_id seen,
+# so every page is an index range scan whatever its position, and no connection stays open between pages
+DEFAULT_PAGE_SIZE = 200
 
-    cur.execute("SELECT * FROM learner_profiles")
-    rows = cur.fetchall()
 
-    conn.close()
+@query_timed
+def get_users_page(after_user_id=0, limit=DEFAULT_PAGE_SIZE):
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("SELECT user_id, username FROM users WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                    (after_user_id, limit))
+        rows = cur.fetchall()
 
     return rows
 
 
-def get_user_by_username(username):
-    conn = sql.connect(DB_PATH)
-    cur = conn.cursor()
+@query_timed
+def get_knowledge_profiles_page(after_user_id=0, limit=DEFAULT_PAGE_SIZE):
+    """Returns a list of (user_id, username, KnowledgeProfile)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT u.user_id, u.username, kp.*
+            FROM knowledge_profiles kp
+            JOIN users u ON u.user_id = kp.user_id
+            WHERE kp.user_id > ?
+            ORDER BY kp.user_id
+            LIMIT ?
+        """, (after_user_id, limit))
+        rows = cur.fetchall()
+
+    return [(row[0], row[1], knowledge_profile_from_row(row[2:])) for row in rows]
+
+
+@query_timed
+def get_learner_profiles_page(after_user_id=0, limit=DEFAULT_PAGE_SIZE):
+    """Returns a list of (user_id, username, LearnerProfile)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute("""
+            SELECT u.user_id, u.username, lp.*
+            FROM learner_profiles lp
+            JOIN users u ON u.user_id = lp.user_id
+            WHERE lp.user_id > ?
+            ORDER BY lp.user_id
+            LIMIT ?
+        """, (after_user_id, limit))
+        rows = cur.fetchall()
+
+    return [(row[0], row[1], learner_profile_from_row(row[2:])) for row in rows]
+
+
+@query_timed
+def get_user_contexts_page(after_user_id=0, limit=DEFAULT_PAGE_SIZE):
+    with get_connection() as conn:
+        cur = conn.cursor()
+
+        cur.execute(USER_CONTEXT_QUERY + " WHERE u.user_id > ? ORDER BY u.user_id LIMIT ?", (after_user_id, limit))
+        rows = cur.fetchall()
 
-    cur.execute("SELECT * FROM users WHERE username = ?", (username,))
-    row = cur.fetchone()
+    return [user_context_from_row(row) for row in rows]
+
+
+def _iter_pages(get_page, page_size, user_id):
+    after_user_id = 0
+    while True:
+        page = get_page(after_user_id, page_size)
+        yield from page
+
+        if len(page) < page_size:
+            return
+        after_user_id = user_id(page[-1])
+
+
+def iter_users(page_size=DEFAULT_PAGE_SIZE):
+    """Lazily yields (user_id, username) for every user."""
+    return _iter_pages(get_users_page, page_size, lambda row: row[0])
+
+
+def iter_knowledge_profiles(page_size=DEFAULT_PAGE_SIZE):
+    """Lazily yields (user_id, username, KnowledgeProfile) for every knowledge profile."""
+    return _iter_pages(get_knowledge_profiles_page, page_size, lambda row: row[0])
+
+
+def iter_learner_profiles(page_size=DEFAULT_PAGE_SIZE):
+    """Lazily yields (user_id, username, LearnerProfile) for every learner profile."""
+    return _iter_pages(get_learner_profiles_page, page_size, lambda row: row[0])
+
+
+def iter_user_contexts(page_size=DEFAULT_PAGE_SIZE):
+    """Lazily yields a UserContext for every user, profiles included."""
+    return _iter_pages(get_user_contexts_page, page_size, lambda context: context.user_id)
+
+
+@query_timed
+def get_user_by_username(username):
+    with get_connection() as conn:
+        cur = conn.cursor()
 
-    conn.close()
+        cur.execute("SELECT * FROM users WHERE username = ?", (username,))
+        row = cur.fetchone()
 
     return row
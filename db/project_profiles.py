@@ -0,0 +1,129 @@
+"""
+Profiles of the desktop (Tkinter) projects. Each project is its own database file whose learner_profiles
+table stores one JSON document per learner (name, prereq_level, main_field, ...).
+"""
+
+import json
+import sqlite3 as sql
+from dataclasses import asdict, is_dataclass
+
+from db.connection_pool import get_connection
+
+
+def initialize_project_profiles_table(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS learner_profiles (
+            learner_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            profile_json TEXT NOT NULL
+        )
+    """)
+
+
+def initialize_graph_layout_table(cur):
+    # Node positions of the project's profile map, reused by llm.graphvisualization.create_graph
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS graph_layout (
+            node_key TEXT PRIMARY KEY,
+            x REAL NOT NULL,
+            y REAL NOT NULL
+        )
+    """)
+
+
+def initialize_profile_revision(cur):
+    # Bumped by every write to learner_profiles, so ProjectProfiles.refresh can ignore writes to other tables
+    cur.execute("CREATE TABLE IF NOT EXISTS profile_revision (revision INTEGER NOT NULL)")
+    cur.execute("INSERT INTO profile_revision SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM profile_revision)")
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS learner_profiles_{event.lower()} AFTER {event} ON learner_profiles
+            BEGIN
+                UPDATE profile_revision SET revision = revision + 1;
+            END
+        """)
+
+
+# Schema versions of desktop project files, applied by db.projects like db_management.MIGRATIONS
+PROJECT_MIGRATIONS = [
+    (1, "Create learner profiles", initialize_project_profiles_table),
+    (2, "Add graph layouts", initialize_graph_layout_table),
+    (3, "Count profile revisions", initialize_profile_revision),
+]
+
+
+def profile_to_json(profile):
+    return json.dumps(asdict(profile) if is_dataclass(profile) else profile, ensure_ascii=False)
+
+
+def load_profiles(db_path):
+    """All the profiles of a project, as a list of (learner_id, profile dict)."""
+    with get_connection(db_path) as conn:
+        rows = conn.execute("SELECT learner_id, profile_json FROM learner_profiles ORDER BY learner_id").fetchall()
+
+    return [(rid, json.loads(profile_json)) for rid, profile_json in rows]
+
+
+def save_profile(profile, db_path):
+    with get_connection(db_path) as conn:
+        cur = conn.execute("INSERT INTO learner_profiles (profile_json) VALUES (?)", (profile_to_json(profile),))
+
+    return cur.lastrowid
+
+
+class ProjectProfiles:
+    """
+    In-memory list of an open project's profiles, read from the database once.
+
+    The model keeps its own connection, so `PRAGMA data_version` on it changes only when another
+    connection (another window, process or tool) writes to the file. `refresh` reloads in that case
+    only, and only if the write touched the profiles (a saved graph layout does not); profiles added
+    through `add` are written on the model's connection and appended in place.
+    The project's schema must already be initialized (see db.projects.open_project_profiles).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sql.connect(db_path, check_same_thread=False)
+
+        self.profiles = []  # [(learner_id, profile dict)], in learner_id order
+        self._data_version = None
+        self._revision = None
+        self.reloads = 0
+        self.refresh()
+
+    def __len__(self):
+        return len(self.profiles)
+
+    def __getitem__(self, index):
+        return self.profiles[index]
+
+    def refresh(self):
+        """Reloads the profiles if the file was changed by someone else. Returns True if it did."""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return False
+
+        self._data_version = data_version
+        revision = self._conn.execute("SELECT revision FROM profile_revision").fetchone()[0]
+        if revision == self._revision:
+            return False
+
+        rows = self._conn.execute("SELECT learner_id, profile_json FROM learner_profiles ORDER BY learner_id")
+        self.profiles = [(rid, json.loads(profile_json)) for rid, profile_json in rows]
+        self._revision = revision
+        self.reloads += 1
+        return True
+
+    def add(self, profile):
+        """Saves a new profile (dict or dataclass) and appends it to the list. Returns its learner_id."""
+        cur = self._conn.execute("INSERT INTO learner_profiles (profile_json) VALUES (?)", (profile_to_json(profile),))
+        self._conn.commit()
+        # If someone else wrote in between, the revisions no longer match and the next refresh reloads
+        self._revision += 1
+
+        profile = asdict(profile) if is_dataclass(profile) else dict(profile)
+        self.profiles.append((cur.lastrowid, profile))
+        return cur.lastrowid
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,81 @@
+import os
+import threading
+
+from db import constants
+from db.connection_pool import _pools, _pools_lock, get_connection
+from db.db_management import MIGRATIONS, migrate
+from db.project_profiles import PROJECT_MIGRATIONS, ProjectProfiles
+
+# Kinds of project databases: the Gradio app's full schema, or a desktop project's learner profiles
+WEB_PROJECT = "web"
+DESKTOP_PROJECT = "desktop"
+
+SCHEMAS = {
+    WEB_PROJECT: MIGRATIONS,
+    DESKTOP_PROJECT: PROJECT_MIGRATIONS,
+}
+
+
+class ProjectRegistry:
+    """
+    Project database files opened by this process, shared by the Gradio and Tkinter apps.
+
+    The schema of a file is brought up to date the first time it is opened and remembered afterwards,
+    so switching back to a project only borrows a pooled connection. The pools themselves are kept in
+    an LRU (see db.connection_pool.get_pool) bounded by constants.DB_MAX_OPEN_PROJECTS.
+    """
+
+    def __init__(self):
+        self._schemas = {}  # absolute path -> kind whose migrations have run
+        self._lock = threading.Lock()
+        self.migrations_applied = 0
+
+    def open(self, db_path=None, kind=WEB_PROJECT):
+        """Initializes the project's schema if not done yet in this process. Returns its absolute path."""
+        db_path = os.path.abspath(db_path or constants.DB_PATH)
+        if kind not in SCHEMAS:
+            raise ValueError(f"Unknown project kind '{kind}'.")
+
+        with self._lock:
+            opened = self._schemas.get(db_path)
+            if opened is not None and opened != kind:
+                raise ValueError(f"'{db_path}' is already open as a {opened} project.")
+
+            if opened is None:
+                with get_connection(db_path) as conn:
+                    self.migrations_applied += len(migrate(conn, SCHEMAS[kind]))
+                self._schemas[db_path] = kind
+
+        return db_path
+
+    def connection(self, db_path=None, kind=WEB_PROJECT):
+        return get_connection(self.open(db_path, kind))
+
+    def forget(self, db_path):
+        """Makes the next `open` check the schema again, e.g. after the file was replaced or deleted."""
+        with self._lock:
+            self._schemas.pop(os.path.abspath(db_path), None)
+
+    def stats(self):
+        with _pools_lock:
+            open_pools = {path: pool.borrowed for path, pool in _pools.items()}
+
+        return {
+            "projects": len(self._schemas),
+            "open": len(open_pools),
+            "max_open": constants.DB_MAX_OPEN_PROJECTS,
+            "borrowed": sum(open_pools.values()),
+            "migrations_applied": self.migrations_applied,
+        }
+
+
+_registry = ProjectRegistry()
+
+
+def get_project_registry():
+    return _registry
+
+
+def open_project_profiles(db_path):
+    """The in-memory profiles of a desktop project, with its schema initialized once per file."""
+    return ProjectProfiles(_registry.open(db_path, DESKTOP_PROJECT))
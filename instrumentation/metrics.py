@@ -0,0 +1,273 @@
+"""
+Process-wide counters and latency histograms, exported as Prometheus text or JSON.
+
+Metrics are created once at import (`counter`, `histogram`) and updated on the hot path; `timed` and
+`timer` observe the duration of a function or block in seconds. With MINDMESH_METRICS=0 metrics are
+no-ops and `timed` returns the function unchanged, so instrumented code runs as if it were not.
+"""
+
+import bisect
+import contextlib
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+
+ENABLED = os.environ.get("MINDMESH_METRICS", "1") != "0"
+
+# Upper bounds in seconds, from sub-millisecond queries to slow LLM replies
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Counter:
+    def __init__(self, labels):
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def snapshot(self):
+        return {"labels": dict(self.labels), "value": self.value}
+
+
+class Histogram:
+    def __init__(self, labels, buckets=DEFAULT_BUCKETS):
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        """Estimate of the q-quantile, interpolated linearly inside its bucket."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if count == 0:
+            return 0.0
+
+        rank = q * count
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def snapshot(self):
+        with self._lock:
+            count, total = self.count, self.sum
+        return {
+            "labels": dict(self.labels),
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else 0.0,
+            "p50": round(self.quantile(0.5), 6),
+            "p90": round(self.quantile(0.9), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+
+class _NullMetric:
+    def inc(self, amount=1):
+        pass
+
+    def observe(self, value):
+        pass
+
+
+_NULL_METRIC = _NullMetric()
+_families = {}  # name -> (type, help)
+_metrics = {}  # (name, labels) -> Counter | Histogram
+_lock = threading.Lock()
+
+
+def _get(kind, name, help, labels, factory):
+    if not ENABLED:
+        return _NULL_METRIC
+
+    labels = tuple(sorted(labels.items()))
+    with _lock:
+        family = _families.setdefault(name, (kind, help))
+        if family[0] != kind:
+            raise ValueError(f"Metric '{name}' is already a {family[0]}.")
+
+        metric = _metrics.get((name, labels))
+        if metric is None:
+            metric = _metrics[(name, labels)] = factory(labels)
+
+    return metric
+
+
+def counter(name, help="", **labels):
+    return _get("counter", name, help, labels, Counter)
+
+
+def histogram(name, help="", buckets=DEFAULT_BUCKETS, **labels):
+    return _get("histogram", name, help, labels, lambda labels: Histogram(labels, buckets))
+
+
+@contextlib.contextmanager
+def _timer(metric):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric.observe(time.perf_counter() - start)
+
+
+def timer(name, help="", **labels):
+    """Context manager observing the duration of its block in the `name` histogram."""
+    if not ENABLED:
+        return contextlib.nullcontext()
+    return _timer(histogram(name, help, **labels))
+
+
+def timed(name, help="", label=None, **labels):
+    """
+    Decorator observing each call's duration in the `name` histogram. With `label`, the function's name
+    is added as that label (e.g. `label="query"`). Async generators are timed until they are exhausted.
+    """
+    def decorator(fn):
+        if not ENABLED:
+            return fn
+
+        metric = histogram(name, help, **({label: fn.__name__} if label else {}), **labels)
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    async for value in fn(*args, **kwargs):
+                        yield value
+                finally:
+                    metric.observe(time.perf_counter() - start)
+        elif inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    metric.observe(time.perf_counter() - start)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    metric.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+def _series():
+    with _lock:
+        families = dict(_families)
+        metrics = sorted(_metrics.items(), key=lambda item: item[0])
+    return families, metrics
+
+
+def snapshot():
+    """Every metric as JSON-ready dicts: {name: {"type", "help", "series": [...]}}."""
+    families, metrics = _series()
+    result = {name: {"type": kind, "help": help, "series": []} for name, (kind, help) in sorted(families.items())}
+    for (name, _), metric in metrics:
+        result[name]["series"].append(metric.snapshot())
+    return result
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return "+Inf" if value == math.inf else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def prometheus_text():
+    """Every metric in the Prometheus text exposition format."""
+    families, metrics = _series()
+    lines = []
+    current = None
+    for (name, labels), metric in metrics:
+        if name != current:
+            kind, help = families[name]
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            current = name
+
+        if isinstance(metric, Counter):
+            lines.append(f"{name}{_format_labels(labels)} {metric.value}")
+            continue
+
+        with metric._lock:
+            counts, total, count = list(metric.counts), metric.sum, metric.count
+        cumulative = 0
+        for bound, n in zip(metric.buckets + (math.inf,), counts):
+            cumulative += n
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write(path):
+    """Writes the metrics to `path`, in Prometheus format for a .prom file and JSON otherwise."""
+    text = prometheus_text() if path.endswith(".prom") else json.dumps(snapshot(), indent=2)
+    # Written next to the target then renamed, so a scraper never reads a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def start_file_export(path, interval=15.0):
+    """Rewrites `path` every `interval` seconds from a daemon thread (e.g. for a node_exporter textfile)."""
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                write(path)
+            except OSError as e:
+                print("Error writing metrics: ", e)
+
+    thread = threading.Thread(target=run, name="metrics-export", daemon=True)
+    thread.start()
+    return thread
+
+
+def reset():
+    with _lock:
+        for metric in _metrics.values():
+            with metric._lock:
+                if isinstance(metric, Counter):
+                    metric.value = 0
+                else:
+                    metric.counts = [0] * len(metric.counts)
+                    metric.sum = 0.0
+                    metric.count = 0
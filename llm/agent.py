@@ -1,24 +1,73 @@
-import os
-from huggingface_hub import InferenceClient
-from db.db_table_management import get_knowledge_profile_by_username, get_learner_profile_by_username
+import asyncio
+import time
+
+from db.db_table_management import load_full_user_context
 from dotenv import load_dotenv
+from instrumentation.metrics import counter, histogram, timed
+from llm.chat_history import ChatHistory
+from llm.prompt_cache import get_prompt_cache, profile_revision
+from llm.response_cache import get_response_cache, prompt_fingerprint
+from llm.scheduler import get_scheduler
+from llm.transcripts import get_transcript_store
+
+# Turns (a user message and its reply) reloaded from the transcript when an agent is resumed
+RESUME_TURNS = 10
+
+# Where a chat reply's time goes: profile_load, prompt, llm (whole provider call), llm_first_token
+CHAT_STAGE_SECONDS = "mindmesh_chat_stage_seconds"
+CHAT_STAGE_HELP = "Duration of each stage of a chat reply"
+llm_seconds = histogram(CHAT_STAGE_SECONDS, CHAT_STAGE_HELP, stage="llm")
+first_token_seconds = histogram(CHAT_STAGE_SECONDS, CHAT_STAGE_HELP, stage="llm_first_token")
+replies = {source: counter("mindmesh_chat_replies_total", "Chat replies by source", source=source)
+           for source in ("cache", "llm")}
+# LLM replies that never completed: the provider call failed, or the caller stopped the stream
+unfinished_replies = {reason: counter("mindmesh_chat_unfinished_replies_total", "LLM replies that did not complete",
+                                      reason=reason)
+                      for reason in ("error", "stopped")}
 
 
 class Agent:
-    def __init__(self, username, model="openai/gpt-oss-120b"):
+    def __init__(self, username, model="openai/gpt-oss-120b", base_url=None, history_token_budget=4096):
         load_dotenv()
 
         self.username = username
-        self.knowledge_profile = get_knowledge_profile_by_username(username)
-        self.learning_profile = get_learner_profile_by_username(username)
-        self.chat_history = []
-        self.client = InferenceClient(
-            provider="cerebras",
-            api_key=os.environ.get("HF_TOKEN")
-        )
+        self.prompt_cache = get_prompt_cache()
+        self.response_cache = get_response_cache()
+        self.transcripts = get_transcript_store()
+        self._context = None
+        self._revision = None
+        self._fingerprint = None
+        # One JOIN query: validates the user and gives the revision the cached prompt must match
+        self.load_context()
+        self.chat_history = ChatHistory(token_budget=history_token_budget)
+        # Provider calls go through the shared scheduler and its pooled clients; an explicit base_url
+        # targets an OpenAI-compatible server instead of the provider (e.g. a local fake for tests)
+        self.scheduler = get_scheduler()
+        self.base_url = base_url
         self.model = model
 
 
+    @timed(CHAT_STAGE_SECONDS, CHAT_STAGE_HELP, stage="profile_load")
+    def load_context(self):
+        context = load_full_user_context(self.username)
+        if context is None or context.knowledge_profile is None or context.learner_profile is None:
+            raise ValueError(f"User '{self.username}' does not exist.")
+
+        self._context = context
+        self._revision = profile_revision(context.knowledge_profile, context.learner_profile)
+        return context
+
+
+    @property
+    def knowledge_profile(self):
+        return (self._context or self.load_context()).knowledge_profile
+
+
+    @property
+    def learning_profile(self):
+        return (self._context or self.load_context()).learner_profile
+
+
     def build_knowledge_profile_description(self):
         if not self.knowledge_profile:
             return "No knowledge profile available."
@@ -59,31 +108,172 @@ class Agent:
         return description
 
 
+    @timed(CHAT_STAGE_SECONDS, CHAT_STAGE_HELP, stage="prompt")
     def system_prompt(self):
-        context_prompt = f"""
+        # A prompt rendered for older profiles is a miss, even if no invalidation reached this process
+        context_prompt = self.prompt_cache.get(self.username, self._revision)
+        if context_prompt is None:
+            context_prompt = f"""
         You are an AI assistant for a user named {self.username}.
         \n\nThey have the following knowledge profile: {self.build_knowledge_profile_description()}
         \n\nThey have the following learning profile: {self.build_learning_profile_description()}
         \n\nUse this information to tailor your responses.
         """
+            self.prompt_cache.put(self.username, self._revision, context_prompt)
+
         self.chat_history.append({"role": "system", "content": context_prompt})
 
 
+    def resume(self, turns=RESUME_TURNS):
+        """Reloads the last `turns` exchanges of the user's transcript into the chat history."""
+        for message in self.transcripts.tail(self.username, 2 * turns):
+            self.chat_history.append(message)
+
+
+    def record(self, user_input, assistant_output):
+        # Queued for the transcript writer thread, never written on the request path
+        self.transcripts.append(self.username, "user", user_input)
+        self.transcripts.append(self.username, "assistant", assistant_output)
+
+
+    def cacheable_fingerprint(self):
+        # Only opening questions are answered from the shared cache: later turns depend on the conversation
+        if any(message["role"] != "system" for message in self.chat_history):
+            return None
+
+        if self._fingerprint is None:
+            system_prompt = "".join(message["content"] for message in self.chat_history)
+            self._fingerprint = prompt_fingerprint(system_prompt, self.model)
+
+        return self._fingerprint
+
+
     def send_message(self, user_input):
+        fingerprint = self.cacheable_fingerprint()
         self.chat_history.append({"role": "user", "content": user_input})
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=self.chat_history,
-            max_tokens=512
-        )
+        if fingerprint is not None:
+            cached = self.response_cache.get(fingerprint, user_input)
+            if cached is not None:
+                self.chat_history.append({"role": "assistant", "content": cached})
+                self.record(user_input, cached)
+                replies["cache"].inc()
+                return cached
+
+        start = time.perf_counter()
+        try:
+            assistant_output = self.scheduler.complete_sync(
+                self.username,
+                self.chat_history.window(),
+                model=self.model,
+                base_url=self.base_url,
+                max_tokens=512
+            )
+        except Exception:
+            unfinished_replies["error"].inc()
+            raise
+        llm_seconds.observe(time.perf_counter() - start)
+        replies["llm"].inc()
 
-        assistant_output = response.choices[0].message['content']
         self.chat_history.append({"role": "assistant", "content": assistant_output})
+        self.record(user_input, assistant_output)
+        if fingerprint is not None:
+            self.response_cache.put(fingerprint, user_input, assistant_output)
 
         return assistant_output
 
 
+    async def stream_message(self, user_input):
+        fingerprint = self.cacheable_fingerprint()
+        self.chat_history.append({"role": "user", "content": user_input})
+
+        if fingerprint is not None:
+            cached = self.response_cache.get(fingerprint, user_input)
+            if cached is not None:
+                self.chat_history.append({"role": "assistant", "content": cached})
+                self.record(user_input, cached)
+                replies["cache"].inc()
+                yield cached
+                return
+
+        start = time.perf_counter()
+        stream = self.scheduler.stream(
+            self.username,
+            self.chat_history.window(),
+            model=self.model,
+            base_url=self.base_url,
+            max_tokens=512
+        )
+
+        parts = []
+        completed = False
+        try:
+            async for token in stream:
+                if not parts:
+                    first_token_seconds.observe(time.perf_counter() - start)
+                parts.append(token)
+                yield token
+            completed = True
+        except (GeneratorExit, asyncio.CancelledError):
+            unfinished_replies["stopped"].inc()
+            raise
+        except BaseException:
+            unfinished_replies["error"].inc()
+            raise
+        finally:
+            # Only complete replies count as LLM replies and in the llm latency histogram
+            if completed:
+                llm_seconds.observe(time.perf_counter() - start)
+                replies["llm"].inc()
+            # Keep whatever was generated, even if the caller stopped consuming the stream early
+            if parts:
+                self.chat_history.append({"role": "assistant", "content": "".join(parts)})
+                self.record(user_input, "".join(parts))
+                # A reply cut short by the caller is never cached
+                if completed and fingerprint is not None:
+                    self.response_cache.put(fingerprint, user_input, "".join(parts))
+            else:
+                self.chat_history.pop()
+
+
     def delete_chat_history(self):
-        self.chat_history = []
+        self.chat_history.clear()
         self.system_prompt()
+
+
+# Desktop (Tkinter) projects keep their learner profiles as plain dicts instead of database users
+def project_profile_prompt(profile):
+    details = "\n".join(f"{key}: {value}" for key, value in profile.items())
+    return f"""
+        You are an AI assistant for a learner named {profile.get('name', '')}.
+        \n\nThey have the following learner profile: {details}
+        \n\nUse this information to tailor your responses.
+        """
+
+
+async def stream_reply(profile, messages, user=None, model="openai/gpt-oss-120b", base_url=None):
+    """
+    Streams the reply to `messages` (the conversation so far, without system prompt) for a project
+    profile dict. `user` is the key the scheduler uses to share capacity fairly between conversations.
+    """
+    load_dotenv()
+    stream = get_scheduler().stream(
+        user or profile.get("name", ""),
+        [{"role": "system", "content": project_profile_prompt(profile)}] + list(messages),
+        model=model,
+        base_url=base_url,
+        max_tokens=512
+    )
+    async for token in stream:
+        yield token
+
+
+def reply(profile, message, model="openai/gpt-oss-120b", base_url=None):
+    load_dotenv()
+    return get_scheduler().complete_sync(
+        profile.get("name", ""),
+        [{"role": "system", "content": project_profile_prompt(profile)}, {"role": "user", "content": message}],
+        model=model,
+        base_url=base_url,
+        max_tokens=512
+    )
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+
+from llm.agent import Agent
+
+
+class AgentRegistry:
+    """
+    Session-scoped store of chat agents (keyed by Gradio session hash or username).
+
+    Agents are evicted least-recently-used first when there are more than `max_agents`, when one has been
+    idle for longer than `ttl_seconds`, or when the chat histories together exceed `max_memory_bytes`.
+    An evicted agent is rebuilt lazily from the database on its next message, replaying the history the
+    client still holds, or the end of the user's stored transcript when the client's history is empty.
+    """
+
+    def __init__(self, max_agents=500, ttl_seconds=30 * 60, max_memory_bytes=64 * 1024 * 1024,
+                 factory=Agent, clock=time.monotonic):
+        self.max_agents = max_agents
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_bytes = max_memory_bytes
+        self.factory = factory
+        self.clock = clock
+
+        self._agents = OrderedDict()  # key -> [agent, last_used]
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rehydrations = 0
+
+    def create(self, key, username, resume=False):
+        """A new agent for the session; with `resume`, it continues the end of the user's saved transcript."""
+        agent = self.factory(username)
+        agent.system_prompt()
+        if resume:
+            agent.resume()
+        self._store(key, agent)
+
+        return agent
+
+    def get(self, key, username=None, history=None):
+        with self._lock:
+            entry = self._agents.get(key)
+            if entry is not None and self.clock() - entry[1] <= self.ttl_seconds:
+                entry[1] = self.clock()
+                self._agents.move_to_end(key)
+                self.hits += 1
+                # Histories grow with every reply, so the memory cap is checked on each message too
+                self._evict()
+                return entry[0]
+
+            self.misses += 1
+
+        if not username:
+            raise KeyError(f"No agent for session '{key}'.")
+
+        # A new tab sends an empty history: continue from the saved transcript instead
+        agent = self.create(key, username, resume=not history)
+        for message in history or []:
+            if message.get("role") in ("user", "assistant"):
+                agent.chat_history.append({"role": message["role"], "content": message["content"]})
+        self.rehydrations += 1
+        with self._lock:
+            self._evict()
+
+        return agent
+
+    def remove(self, key):
+        with self._lock:
+            self._agents.pop(key, None)
+
+    def __len__(self):
+        return len(self._agents)
+
+    def memory_usage(self):
+        with self._lock:
+            return sum(self._agent_size(agent) for agent, _ in self._agents.values())
+
+    def stats(self):
+        return {
+            "agents": len(self._agents),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "rehydrations": self.rehydrations,
+            "memory_bytes": self.memory_usage(),
+            "history_tokens_saved": sum(
+                agent.chat_history.tokens_saved for agent, _ in list(self._agents.values())
+            ),
+        }
+
+    def _store(self, key, agent):
+        with self._lock:
+            self._agents[key] = [agent, self.clock()]
+            self._agents.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        # Least recently used first, so the expired agents are at the front
+        now = self.clock()
+        while self._agents and now - next(iter(self._agents.values()))[1] > self.ttl_seconds:
+            self._agents.popitem(last=False)
+            self.evictions += 1
+
+        while len(self._agents) > self.max_agents:
+            self._agents.popitem(last=False)
+            self.evictions += 1
+
+        memory = sum(self._agent_size(agent) for agent, _ in self._agents.values())
+        # Never evict the most recent agent: it is the one the caller is about to use
+        while memory > self.max_memory_bytes and len(self._agents) > 1:
+            _, (agent, _) = self._agents.popitem(last=False)
+            memory -= self._agent_size(agent)
+            self.evictions += 1
+
+    @staticmethod
+    def _agent_size(agent):
+        # Approximation: one byte per character of message content
+        return agent.chat_history.content_chars
@@ -0,0 +1,64 @@
+import os
+
+from huggingface_hub import AsyncInferenceClient
+
+
+class LLMBackend:
+    """
+    What the InferenceScheduler needs from a model provider: a chat completion, returned whole or streamed
+    token by token. One backend is created per target (base_url) and shared by every agent talking to it.
+    Errors carrying a `response.status_code` (429, 5xx, ...) and httpx transport errors (refused
+    connections, timeouts) are retried by the scheduler.
+    """
+
+    async def complete(self, model, messages, **params):
+        raise NotImplementedError
+
+    async def stream(self, model, messages, **params):
+        raise NotImplementedError
+        yield
+
+    async def close(self):
+        pass
+
+
+class HuggingFaceBackend(LLMBackend):
+    """Hugging Face inference providers, or any OpenAI-compatible server when `base_url` is given."""
+
+    def __init__(self, base_url=None, provider="cerebras", api_key=None):
+        api_key = api_key or os.environ.get("HF_TOKEN")
+        if base_url:
+            self.client = AsyncInferenceClient(base_url=base_url, api_key=api_key)
+        else:
+            self.client = AsyncInferenceClient(provider=provider, api_key=api_key)
+
+    async def complete(self, model, messages, **params):
+        response = await self.client.chat.completions.create(model=model, messages=messages, **params)
+        return response.choices[0].message["content"]
+
+    async def stream(self, model, messages, **params):
+        stream = await self.client.chat.completions.create(model=model, messages=messages, stream=True, **params)
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def close(self):
+        await self.client.close()
+
+
+# Name -> callable taking the base_url (None for the default provider) and returning an LLMBackend
+BACKENDS = {
+    "huggingface": HuggingFaceBackend,
+}
+
+
+def create_backend(base_url=None):
+    """
+    The backend named by MINDMESH_LLM_BACKEND (default "huggingface"). Without an explicit base_url,
+    MINDMESH_LLM_BASE_URL redirects every agent, e.g. to a local llm.stub_server for offline load tests.
+    """
+    name = os.environ.get("MINDMESH_LLM_BACKEND", "huggingface")
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}', expected one of {list(BACKENDS)}.")
+
+    return BACKENDS[name](base_url or os.environ.get("MINDMESH_LLM_BASE_URL") or None)
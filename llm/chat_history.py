@@ -0,0 +1,142 @@
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Longest excerpt kept per folded message in the rolling summary
+SUMMARY_EXCERPT_CHARS = 200
+
+
+def count_tokens(text):
+    # Cheap local estimate (words + punctuation), close enough to tune a budget without a tokenizer
+    return len(TOKEN_PATTERN.findall(text))
+
+
+class ChatHistory:
+    """
+    List-like chat history that sends the model a bounded window instead of the full conversation.
+
+    `window()` returns the system messages, a rolling summary of turns that no longer fit, and the most
+    recent turns that fit in `token_budget`. Token counts are computed once per message and cached.
+    """
+
+    def __init__(self, token_budget=4096, summary_budget=512):
+        self.token_budget = token_budget
+        self.summary_budget = summary_budget
+
+        self.messages = []
+        self._token_counts = []
+        self._total_tokens = 0
+        self.content_chars = 0  # total length of the messages' content, kept for memory accounting
+        self._folded = 0  # number of leading non-system messages folded into the summary
+        self._summary_lines = []
+        self._summary_tokens = 0
+
+        self.tokens_sent = 0
+        self.tokens_saved = 0
+        self.compactions = 0
+
+    def append(self, message):
+        count = count_tokens(message["content"])
+        self.messages.append(message)
+        self._token_counts.append(count)
+        self._total_tokens += count
+        self.content_chars += len(message["content"])
+
+    def pop(self, index=-1):
+        index = index % len(self.messages)
+        if self.messages[index]["role"] != "system":
+            turn = sum(1 for m in self.messages[:index] if m["role"] != "system")
+            if turn < self._folded:
+                # The summary quotes the popped turn: drop it, the next window() folds again
+                self._clear_summary()
+
+        self._total_tokens -= self._token_counts.pop(index)
+        self.content_chars -= len(self.messages[index]["content"])
+        return self.messages.pop(index)
+
+    def clear(self):
+        self.messages = []
+        self._token_counts = []
+        self._total_tokens = 0
+        self.content_chars = 0
+        self._clear_summary()
+
+    def _clear_summary(self):
+        self._folded = 0
+        self._summary_lines = []
+        self._summary_tokens = 0
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def __getitem__(self, index):
+        return self.messages[index]
+
+    def tokens(self, index):
+        return self._token_counts[index]
+
+    @property
+    def summary(self):
+        return "\n".join(self._summary_lines)
+
+    def window(self):
+        system_indexes = [i for i, m in enumerate(self.messages) if m["role"] == "system"]
+        turn_indexes = [i for i, m in enumerate(self.messages) if m["role"] != "system"]
+
+        available = self.token_budget - sum(self.tokens(i) for i in system_indexes) - self.summary_budget
+
+        # Walk back from the newest turn; always keep the latest one even if it alone exceeds the budget
+        kept = []
+        used = 0
+        for i in reversed(turn_indexes[self._folded:]):
+            cost = self.tokens(i)
+            if kept and used + cost > available:
+                break
+            kept.append(i)
+            used += cost
+        kept.reverse()
+
+        newly_folded = turn_indexes[self._folded:len(turn_indexes) - len(kept)]
+        if newly_folded:
+            self._fold(newly_folded)
+
+        window = [self.messages[i] for i in system_indexes]
+        if self._summary_lines:
+            window.append({"role": "system", "content": "Summary of the earlier conversation:\n" + self.summary})
+        window.extend(self.messages[i] for i in kept)
+
+        sent = sum(self._token_counts[i] for i in system_indexes) + self._summary_tokens + used
+        self.tokens_sent += sent
+        self.tokens_saved += max(self._total_tokens - sent, 0)
+
+        return window
+
+    def _fold(self, indexes):
+        for i in indexes:
+            message = self.messages[i]
+            speaker = "User" if message["role"] == "user" else "Assistant"
+            excerpt = " ".join(message["content"].split())
+            if len(excerpt) > SUMMARY_EXCERPT_CHARS:
+                excerpt = excerpt[:SUMMARY_EXCERPT_CHARS].rsplit(" ", 1)[0] + "…"
+            self._summary_lines.append(f"- {speaker}: {excerpt}")
+
+        # Roll the summary: forget the oldest lines once it outgrows its own budget
+        self._summary_tokens = count_tokens(self.summary)
+        while len(self._summary_lines) > 1 and self._summary_tokens > self.summary_budget:
+            self._summary_lines.pop(0)
+            self._summary_tokens = count_tokens(self.summary)
+
+        self._folded += len(indexes)
+        self.compactions += 1
+
+    def metrics(self):
+        return {
+            "messages": len(self.messages),
+            "folded_messages": self._folded,
+            "compactions": self.compactions,
+            "tokens_sent": self.tokens_sent,
+            "tokens_saved": self.tokens_saved,
+        }
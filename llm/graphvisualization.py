@@ -6,31 +6,172 @@ Created on Thu Sep 11 14:30:19 2025
 """
 
 import networkx as nx
+import numpy as np
 import matplotlib.pyplot as plt
 
-def create_graph(profiles, project_name="Projet"):
+from db.connection_pool import get_connection
+from llm.profile_clusters import build_cluster_map, create_cluster_graph
+
+LAYOUT_K = 0.5
+COLD_ITERATIONS = 500
+WARM_ITERATIONS = 50
+CONVERGENCE_THRESHOLD = 1e-4
+# Lignes de la matrice de forces calculées à la fois, pour borner la mémoire sur les grands graphes
+FORCE_CHUNK_ROWS = 512
+# Au-delà, la carte passe en vue agrégée par domaine (voir llm.profile_clusters)
+SCALABLE_THRESHOLD = 300
+
+
+def load_layout(db_path):
+    """Positions enregistrées pour le projet: {node_key: (x, y)}."""
+    with get_connection(db_path) as conn:
+        rows = conn.execute("SELECT node_key, x, y FROM graph_layout").fetchall()
+
+    return {key: (x, y) for key, x, y in rows}
+
+
+def save_layout(db_path, pos):
+    """Remplace les positions enregistrées par celles du graphe courant."""
+    with get_connection(db_path) as conn:
+        conn.execute("DELETE FROM graph_layout")
+        conn.executemany(
+            "INSERT INTO graph_layout (node_key, x, y) VALUES (?, ?, ?)",
+            [(key, float(x), float(y)) for key, (x, y) in pos.items()]
+        )
+
+
+def spring_layout(edges, pos, movable, k=LAYOUT_K, iterations=COLD_ITERATIONS, threshold=CONVERGENCE_THRESHOLD):
+    """
+    Fruchterman-Reingold vectorisé avec NumPy.
+    edges: paires d'indices, pos: tableau (n, 2) de départ, movable: masque des noeuds à déplacer.
+    Seules les lignes mobiles de la matrice de forces sont calculées, donc ajouter quelques profils à un
+    graphe déjà placé coûte O(nouveaux x n) par itération.
+    """
+    pos = np.array(pos, dtype=float)
+    n = len(pos)
+    moving = np.flatnonzero(movable)
+    if n < 2 or len(moving) == 0:
+        return pos
+
+    edges = np.asarray(edges, dtype=int).reshape(-1, 2)
+
+    t = max(np.ptp(pos[:, 0]), np.ptp(pos[:, 1])) * 0.1 or 0.1
+    dt = t / (iterations + 1)
+
+    for _ in range(iterations):
+        # Répulsion entre toutes les paires (par blocs de lignes), attraction le long des arêtes seulement
+        # sum_j (p_i - p_j) * w_ij s'écrit p_i * sum_j w_ij - (W @ p)_i: aucun tenseur (n, n, 2) à construire
+        # (calculs en float32: deux fois plus rapides, largement assez précis pour un dessin)
+        pos32 = pos.astype(np.float32)
+        displacement = np.empty((len(moving), 2))
+        for start in range(0, len(moving), FORCE_CHUNK_ROWS):
+            rows = moving[start:start + FORCE_CHUNK_ROWS]
+            dx = pos32[rows, 0, None] - pos32[None, :, 0]
+            dy = pos32[rows, 1, None] - pos32[None, :, 1]
+            weights = np.float32(k * k) / np.maximum(dx * dx + dy * dy, np.float32(1e-4))
+            weights[np.arange(len(rows)), rows] = 0.0
+            displacement[start:start + len(rows)] = pos32[rows] * weights.sum(axis=1)[:, None] - weights @ pos32
+
+        if len(edges):
+            delta = pos[edges[:, 0]] - pos[edges[:, 1]]
+            pull = delta * (np.linalg.norm(delta, axis=-1) / k)[:, None]
+            attraction = np.zeros_like(pos)
+            np.add.at(attraction, edges[:, 0], -pull)
+            np.add.at(attraction, edges[:, 1], pull)
+            displacement += attraction[moving]
+
+        length = np.maximum(np.linalg.norm(displacement, axis=-1), 0.01)
+        step = displacement * (t / length)[:, None]
+        pos[moving] += step
+        t -= dt
+
+        if np.linalg.norm(step) / len(moving) < threshold:
+            break
+
+    return pos
+
+
+def compute_layout(G, cached=None, center_node="Projet"):
+    """
+    Positions des noeuds de G, en repartant des positions en cache quand elles existent.
+    Les noeuds déjà placés restent fixes; seuls les nouveaux sont placés, près de leur noeud parent.
+    """
+    cached = cached or {}
+    nodes = list(G.nodes())
+    if set(nodes) == set(cached):
+        return {n: tuple(cached[n]) for n in nodes}
+
+    index = {n: i for i, n in enumerate(nodes)}
+    rng = np.random.default_rng(0)
+    warm = any(n in cached for n in nodes)
+
+    pos = np.empty((len(nodes), 2))
+    movable = np.ones(len(nodes), dtype=bool)
+    for n in nodes:
+        i = index[n]
+        if n in cached:
+            pos[i] = cached[n]
+            movable[i] = False
+        elif warm:
+            # Départ à chaud: à côté d'un voisin déjà placé s'il y en a un
+            anchor = next((cached[m] for m in G.neighbors(n) if m in cached), (0.0, 0.0))
+            pos[i] = np.asarray(anchor) + rng.normal(scale=0.05, size=2)
+        else:
+            pos[i] = rng.random(2) * 2 - 1
+
+    if center_node in index:
+        pos[index[center_node]] = (0.0, 0.0)
+        movable[index[center_node]] = False
+
+    edges = [(index[a], index[b]) for a, b in G.edges()]
+    pos = spring_layout(edges, pos, movable, iterations=WARM_ITERATIONS if warm else COLD_ITERATIONS)
+
+    if not warm:
+        # Même échelle que nx.spring_layout: coordonnées dans [-1, 1] autour du noeud central
+        scale = np.abs(pos).max()
+        if scale > 0:
+            pos /= scale
+
+    return {n: (float(pos[index[n]][0]), float(pos[index[n]][1])) for n in nodes}
+
+
+def create_graph(profiles, project_name="Projet", db_path=None, scalable=None):
     """
     Retourne une figure matplotlib représentant les profils.
     profiles: liste (id, profil_dict)
+    db_path: base du projet où garder les positions entre deux affichages (optionnel)
+    scalable: force (True) ou interdit (False) la vue agrégée; par défaut selon le nombre de profils
     """
+    if scalable is None:
+        scalable = len(profiles) > SCALABLE_THRESHOLD
+    if scalable:
+        return create_cluster_graph(build_cluster_map(profiles, project_name))
+
     G = nx.Graph()
     G.add_node("Projet", size=5000, group="Projet")
+    labels = {"Projet": "Projet"}
 
     domain_nodes = {}
-    for _, prof in profiles:
+    for rid, prof in profiles:
         domain = prof["main_field"] or "Autre"
+        # Clés stables par domaine et par profil pour le cache de positions; le texte affiché ne change pas
+        domain_node = f"domaine:{domain}"
         if domain not in domain_nodes:
             domain_nodes[domain] = []
-            G.add_node(domain, size=4000, group="Domaine")
-            G.add_edge("Projet", domain)
+            G.add_node(domain_node, size=4000, group="Domaine")
+            G.add_edge("Projet", domain_node)
+            labels[domain_node] = domain
 
+        node = f"profil:{rid}"
         size = 100 + prof["prereq_level"] * 2500
-        label = f"{prof['name']}\n({prof['prereq_level']:.2f})"
-        G.add_node(label, size=size, group="Profil")
-        G.add_edge(domain, label)
+        G.add_node(node, size=size, group="Profil")
+        G.add_edge(domain_node, node)
+        labels[node] = f"{prof['name']}\n({prof['prereq_level']:.2f})"
 
-    pos = nx.spring_layout(G, k=0.5, iterations=500, center=(0,0))
-    pos["Projet"] = (0,0)
+    cached = load_layout(db_path) if db_path else None
+    pos = compute_layout(G, cached)
+    if db_path and pos != cached:
+        save_layout(db_path, pos)
 
     fig, ax = plt.subplots(figsize=(8,6))
     ax.set_title(f"Carte des profils - {project_name}")
@@ -47,6 +188,7 @@ def create_graph(profiles, project_name="Projet"):
     nx.draw_networkx(
         G, pos, ax=ax,
         with_labels=True,
+        labels=labels,
         node_size=sizes,
         node_color=colors,
         font_size=7,
@@ -54,4 +196,4 @@ def create_graph(profiles, project_name="Projet"):
         edge_color="gray",
         alpha=0.8
     )
-    return fig
\ No newline at end of file
+    return fig
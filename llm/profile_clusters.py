@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Vue agrégée de la carte des profils, pour les projets avec beaucoup d'apprenants.
+
+Les profils sont regroupés par domaine: chaque domaine devient un disque dont la taille suit le nombre
+de profils, avec l'histogramme des niveaux de prérequis dessous. Tous les profils sont dessinés en un
+seul appel `scatter`, et leurs noms n'apparaissent qu'une fois le zoom assez fort.
+La carte peut aussi être exportée en JSON ou en SVG, lisibles sans matplotlib (page admin Gradio).
+"""
+
+import json
+import math
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+HISTOGRAM_BINS = 10
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+# Largeur de vue (unités de données) en dessous de laquelle les noms des profils sont affichés
+LABEL_ZOOM_WIDTH = 0.8
+MAX_LABELS = 200
+
+
+def build_cluster_map(profiles, project_name="Projet", bins=HISTOGRAM_BINS):
+    """
+    Agrège les profils par domaine et calcule leurs positions.
+    profiles: liste (id, profil_dict). Retourne un dict sérialisable en JSON.
+    """
+    names = [prof["name"] for _, prof in profiles]
+    domains = [prof["main_field"] or "Autre" for _, prof in profiles]
+    prereq = np.array([prof["prereq_level"] for _, prof in profiles], dtype=float)
+
+    domain_names, domain_index = np.unique(np.array(domains, dtype=object), return_inverse=True)
+    counts = np.bincount(domain_index, minlength=len(domain_names))
+    edges = np.linspace(0.0, 1.0, bins + 1)
+
+    # Domaines répartis sur un cercle autour du projet, rayon du disque ~ racine du nombre de profils
+    angles = 2 * np.pi * np.arange(len(domain_names)) / max(len(domain_names), 1)
+    centers = np.column_stack([np.cos(angles), np.sin(angles)])
+    radii = 0.12 + 0.28 * np.sqrt(counts / counts.max()) if len(counts) else np.zeros(0)
+
+    # Dans chaque disque, spirale de Vogel triée par prérequis: rang du profil dans son domaine
+    order = np.lexsort((prereq, domain_index))
+    rank = np.empty(len(order), dtype=int)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]]) if len(counts) else np.zeros(0, dtype=int)
+    rank[order] = np.arange(len(order)) - np.repeat(starts, counts)
+
+    radius = radii[domain_index] * np.sqrt((rank + 0.5) / counts[domain_index])
+    theta = rank * GOLDEN_ANGLE
+    x = centers[domain_index, 0] + radius * np.cos(theta)
+    y = centers[domain_index, 1] + radius * np.sin(theta)
+
+    clusters = []
+    for i, domain in enumerate(domain_names):
+        levels = prereq[domain_index == i]
+        histogram, _ = np.histogram(levels, bins=edges)
+        clusters.append({
+            "domain": str(domain),
+            "count": int(counts[i]),
+            "mean_prereq": float(levels.mean()),
+            "histogram": histogram.tolist(),
+            "x": float(centers[i, 0]),
+            "y": float(centers[i, 1]),
+            "radius": float(radii[i]),
+        })
+
+    return {
+        "project": project_name,
+        "bins": edges.tolist(),
+        "clusters": clusters,
+        "points": {
+            "name": names,
+            "x": x.round(4).tolist(),
+            "y": y.round(4).tolist(),
+            "prereq": prereq.round(4).tolist(),
+            "cluster": domain_index.tolist(),
+        },
+    }
+
+
+def histogram_bars(cluster_map, height=0.25):
+    """Rectangles (x, y, largeur, hauteur) des histogrammes, placés sous chaque disque."""
+    bars = []
+    for cluster in cluster_map["clusters"]:
+        histogram = np.asarray(cluster["histogram"], dtype=float)
+        width = 2 * cluster["radius"] / len(histogram)
+        heights = height * histogram / max(histogram.max(), 1)
+        left = cluster["x"] - cluster["radius"] + width * np.arange(len(histogram))
+        bottom = cluster["y"] - cluster["radius"] - height - 0.08
+        bars.extend((float(l), bottom, width, float(h)) for l, h in zip(left, heights))
+
+    return bars
+
+
+def create_cluster_graph(cluster_map):
+    """Figure matplotlib de la vue agrégée (un seul scatter pour tous les profils)."""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(8,6))
+    ax.set_title(f"Carte des profils - {cluster_map['project']} ({len(cluster_map['points']['x'])} profils)")
+    ax.axis("off")
+    ax.set_aspect("equal")
+
+    for cluster in cluster_map["clusters"]:
+        ax.add_patch(plt.Circle((cluster["x"], cluster["y"]), cluster["radius"], color="lightblue", alpha=0.4))
+        ax.annotate(
+            f"{cluster['domain']}\n{cluster['count']} profils, moy. {cluster['mean_prereq']:.2f}",
+            (cluster["x"], cluster["y"] + cluster["radius"] + 0.03),
+            ha="center", va="bottom", fontsize=8, fontweight="bold"
+        )
+
+    bars = histogram_bars(cluster_map)
+    if bars:
+        left, bottom, width, height = map(list, zip(*bars))
+        ax.bar(left, height, width=width, bottom=bottom, align="edge", color="gray", alpha=0.7)
+
+    points = cluster_map["points"]
+    x, y = np.asarray(points["x"]), np.asarray(points["y"])
+    ax.scatter(x, y, c=points["prereq"], cmap="viridis", vmin=0, vmax=1, s=8, linewidths=0)
+    ax.plot([0], [0], "o", color="red", markersize=12)
+    ax.autoscale_view()
+
+    labels = []
+
+    def update_labels(axes):
+        for text in labels:
+            text.remove()
+        labels.clear()
+
+        (x0, x1), (y0, y1) = axes.get_xlim(), axes.get_ylim()
+        if x1 - x0 > LABEL_ZOOM_WIDTH:
+            return
+
+        visible = np.flatnonzero((x >= x0) & (x <= x1) & (y >= y0) & (y <= y1))[:MAX_LABELS]
+        for i in visible:
+            labels.append(axes.annotate(points["name"][i], (x[i], y[i]), fontsize=6, xytext=(2, 2),
+                                        textcoords="offset points"))
+
+    ax.callbacks.connect("xlim_changed", update_labels)
+    ax.callbacks.connect("ylim_changed", update_labels)
+
+    return fig
+
+
+def cluster_map_svg(cluster_map, width=800, height=600):
+    """SVG autonome de la vue agrégée; le nom de chaque profil est dans son infobulle (<title>)."""
+    points = cluster_map["points"]
+    extent = max([1.0] + [abs(c["x"]) + c["radius"] for c in cluster_map["clusters"]]
+                 + [abs(c["y"]) + c["radius"] + 0.4 for c in cluster_map["clusters"]]) * 1.1
+    scale = min(width, height) / (2 * extent)
+
+    def sx(value):
+        return width / 2 + value * scale
+
+    def sy(value):
+        return height / 2 - value * scale
+
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<title>Carte des profils - {escape(str(cluster_map["project"]))}</title>',
+    ]
+    for cluster in cluster_map["clusters"]:
+        parts.append(f'<circle cx="{sx(cluster["x"]):.1f}" cy="{sy(cluster["y"]):.1f}" '
+                     f'r="{cluster["radius"] * scale:.1f}" fill="lightblue" fill-opacity="0.4"/>')
+        parts.append(f'<text x="{sx(cluster["x"]):.1f}" y="{sy(cluster["y"] + cluster["radius"] + 0.03):.1f}" '
+                     f'text-anchor="middle" font-size="11" font-weight="bold">'
+                     f'{escape(str(cluster["domain"]))} ({int(cluster["count"])}, moy. {cluster["mean_prereq"]:.2f})</text>')
+
+    for left, bottom, bar_width, bar_height in histogram_bars(cluster_map):
+        parts.append(f'<rect x="{sx(left):.1f}" y="{sy(bottom + bar_height):.1f}" width="{bar_width * scale:.1f}" '
+                     f'height="{bar_height * scale:.1f}" fill="gray"/>')
+
+    parts.append('<g fill-opacity="0.8">')
+    for name, x, y, level in zip(points["name"], points["x"], points["y"], points["prereq"]):
+        # Du violet (prérequis faible) au jaune (prérequis élevé), comme la palette viridis
+        color = f"rgb({int(68 + 185 * level)},{int(1 + 230 * level)},{int(84 - 47 * level)})"
+        parts.append(f'<circle cx="{sx(x):.1f}" cy="{sy(y):.1f}" r="2" fill="{color}">'
+                     f'<title>{escape(str(name))} ({level:.2f})</title></circle>')
+    parts.append('</g>')
+
+    parts.append(f'<circle cx="{sx(0):.1f}" cy="{sy(0):.1f}" r="8" fill="red"/>')
+    parts.append('</svg>')
+
+    return "\n".join(parts)
+
+
+def export_cluster_map(cluster_map, path):
+    """Écrit la carte en .json ou .svg selon l'extension du fichier."""
+    if path.lower().endswith(".svg"):
+        content = cluster_map_svg(cluster_map)
+    elif path.lower().endswith(".json"):
+        content = json.dumps(cluster_map, ensure_ascii=False)
+    else:
+        raise ValueError(f"Format d'export non supporté: '{path}' (attendu: .json ou .svg)")
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def load_cluster_map(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
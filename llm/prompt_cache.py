@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3 as sql
+import threading
+from dataclasses import asdict
+
+from db import constants
+from db.db_table_management import profile_change_listeners
+
+
+def profile_revision(knowledge_profile, learner_profile):
+    payload = repr((asdict(knowledge_profile), asdict(learner_profile)))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class PromptCache:
+    """
+    Rendered system prompts keyed by (username, profile revision), kept in memory and in a small SQLite
+    file so several processes can share them.
+
+    The in-memory layer is dropped whenever `PRAGMA data_version` reports that another process wrote to
+    the store, so an invalidation anywhere is seen everywhere.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = sql.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS prompts (
+                username TEXT PRIMARY KEY,
+                revision TEXT NOT NULL,
+                prompt TEXT NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+        self._lock = threading.Lock()
+        self._memory = {}  # username -> (revision, prompt)
+        self._data_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username, revision):
+        """The prompt rendered for `revision` of the user's profiles, None if missing or rendered for another."""
+        with self._lock:
+            self._sync()
+
+            entry = self._memory.get(username)
+            if entry is None:
+                entry = self._conn.execute(
+                    "SELECT revision, prompt FROM prompts WHERE username = ?", (username,)
+                ).fetchone()
+                if entry is not None:
+                    self._memory[username] = entry
+
+            if entry is None or entry[0] != revision:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return entry[1]
+
+    def put(self, username, revision, prompt):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prompts (username, revision, prompt) VALUES (?, ?, ?)",
+                (username, revision, prompt)
+            )
+            self._conn.commit()
+            self._memory[username] = (revision, prompt)
+
+    def invalidate(self, username):
+        with self._lock:
+            self._conn.execute("DELETE FROM prompts WHERE username = ?", (username,))
+            self._conn.commit()
+            self._memory.pop(username, None)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _sync(self):
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._memory.clear()
+            self._data_version = data_version
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_prompt_cache(db_path=None):
+    # One prompt store per project database, kept next to it
+    db_path = db_path or constants.DB_PATH
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            root, _ = os.path.splitext(db_path)
+            cache = PromptCache(root + ".prompts.db")
+            _caches[db_path] = cache
+
+    return cache
+
+
+def close_prompt_caches():
+    with _caches_lock:
+        caches = list(_caches.values())
+        _caches.clear()
+
+    for cache in caches:
+        cache.close()
+
+
+def invalidate_prompt(username):
+    get_prompt_cache().invalidate(username)
+
+
+profile_change_listeners.append(invalidate_prompt)
@@ -0,0 +1,168 @@
+import hashlib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from db import constants
+from llm.chat_history import count_tokens
+
+try:
+    import numpy as np
+except ImportError:  # the similarity index is optional, exact lookups work without NumPy
+    np = None
+
+
+WORD_PATTERN = re.compile(r"[^\W_]+")
+EMBEDDING_DIM = 512
+
+
+def normalize_question(text):
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def prompt_fingerprint(system_prompt, model=""):
+    # The rendered prompt names the user and their project: only identical prompts may share answers
+    return hashlib.sha1(f"{model}\0{system_prompt}".encode()).hexdigest()[:16]
+
+
+def embed(normalized_question):
+    # Hashed bag of unigrams and bigrams, L2-normalised so a dot product is the cosine similarity
+    words = normalized_question.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for feature in features:
+        vector[zlib.crc32(feature.encode()) % EMBEDDING_DIM] += 1.0
+
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ResponseCache:
+    """
+    LRU cache of assistant answers keyed by (prompt fingerprint, normalized question).
+
+    Lookups try the exact key first and then, when NumPy is available and `similarity_threshold` is set,
+    the most similar cached question for the same fingerprint.
+    """
+
+    def __init__(self, max_entries=1000, similarity_threshold=0.9):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold if np is not None else None
+
+        self._entries = OrderedDict()  # (fingerprint, question) -> (response, slot)
+        self._lock = threading.Lock()
+        if self.similarity_threshold is not None:
+            self._vectors = np.zeros((max_entries, EMBEDDING_DIM), dtype=np.float32)
+            self._slot_keys = [None] * max_entries
+            self._slot_fingerprints = np.full(max_entries, -1, dtype=np.int64)
+            self._fingerprint_ids = {}
+            self._free_slots = list(range(max_entries - 1, -1, -1))
+
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tokens_saved = 0
+
+    def get(self, fingerprint, question):
+        key = (fingerprint, normalize_question(question))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return self._hit(entry[0])
+
+            if self.similarity_threshold is not None and key[1]:
+                match = self._most_similar(key)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.similar_hits += 1
+                    return self._hit(self._entries[match][0])
+
+            self.misses += 1
+            return None
+
+    def put(self, fingerprint, question, response):
+        key = (fingerprint, normalize_question(question))
+
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (response, self._entries[key][1])
+                self._entries.move_to_end(key)
+                return
+
+            if len(self._entries) >= self.max_entries:
+                _, (_, slot) = self._entries.popitem(last=False)
+                self._release(slot)
+                self.evictions += 1
+
+            slot = None
+            if self.similarity_threshold is not None:
+                slot = self._free_slots.pop()
+                self._vectors[slot] = embed(key[1])
+                self._slot_keys[slot] = key
+                self._slot_fingerprints[slot] = self._fingerprint_ids.setdefault(fingerprint, len(self._fingerprint_ids))
+
+            self._entries[key] = (response, slot)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "tokens_saved": self.tokens_saved,
+        }
+
+    def _hit(self, response):
+        self.tokens_saved += count_tokens(response)
+        return response
+
+    def _most_similar(self, key):
+        fingerprint, question = key
+        fingerprint_id = self._fingerprint_ids.get(fingerprint)
+        if fingerprint_id is None:
+            return None
+
+        scores = self._vectors @ embed(question)
+        scores[self._slot_fingerprints != fingerprint_id] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+
+        return self._slot_keys[best]
+
+    def _release(self, slot):
+        if slot is not None:
+            self._slot_keys[slot] = None
+            self._slot_fingerprints[slot] = -1
+            self._free_slots.append(slot)
+
+
+_response_caches = {}
+_response_caches_lock = threading.Lock()
+
+
+def get_response_cache(db_path=None):
+    # One cache per project database: same-named users of two projects must not share answers
+    db_path = os.path.abspath(db_path or constants.DB_PATH)
+    with _response_caches_lock:
+        cache = _response_caches.get(db_path)
+        if cache is None:
+            cache = _response_caches[db_path] = ResponseCache()
+
+    return cache
+
+
+def clear_response_caches():
+    with _response_caches_lock:
+        _response_caches.clear()
@@ -0,0 +1,297 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+from llm.backends import create_backend
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+# An idle user's served count is forgotten once it has decayed below this
+FORGOTTEN_SERVED_COUNT = 0.01
+
+_END_OF_STREAM = object()
+
+
+class _StreamError:
+    def __init__(self, error):
+        self.error = error
+
+
+def is_retryable(error):
+    status_code = getattr(getattr(error, "response", None), "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+
+    # httpx.TransportError covers the provider client's connection failures and timeouts
+    return isinstance(error, (httpx.TransportError, ConnectionError, TimeoutError, asyncio.TimeoutError))
+
+
+class InferenceScheduler:
+    """
+    Central queue through which every Agent reaches the inference provider.
+
+    Requests run on the scheduler's own event loop thread with at most `max_concurrency` in flight and
+    `per_user_concurrency` per user. Waiting requests are served by priority, then by how few requests
+    their user has had served recently, then first come first served. Served counts halve every
+    `fairness_half_life` seconds, so pausing between messages does not reset a heavy user's share. Retryable failures (429, 5xx,
+    connection errors) are retried with full-jitter exponential backoff, and identical non-streaming
+    requests already in flight share a single provider call.
+    """
+
+    def __init__(self, max_concurrency=8, per_user_concurrency=1, max_retries=3, base_delay=0.5, max_delay=8.0,
+                 fairness_half_life=60.0, backend_factory=create_backend, clock=time.monotonic):
+        self.max_concurrency = max_concurrency
+        self.per_user_concurrency = per_user_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.fairness_half_life = fairness_half_life
+        self.backend_factory = backend_factory
+        self.clock = clock
+
+        self._backends = {}
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._active = 0
+        self._active_by_user = {}
+        self._served_by_user = {}  # user -> (decayed served count, when it was computed)
+        self._last_sweep = clock()
+        self._in_flight = {}
+
+        self.completed = 0
+        self.failed = 0
+        self.retries = 0
+        self.coalesced = 0
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="inference-scheduler", daemon=True)
+        self._thread.start()
+
+    # ---- public API, callable from any thread or event loop ----
+
+    def complete_sync(self, user, messages, model, base_url=None, priority=PRIORITY_NORMAL, **params):
+        future = asyncio.run_coroutine_threadsafe(
+            self._complete(user, messages, model, base_url, priority, params), self._loop
+        )
+        return future.result()
+
+    async def complete(self, user, messages, model, base_url=None, priority=PRIORITY_NORMAL, **params):
+        future = asyncio.run_coroutine_threadsafe(
+            self._complete(user, messages, model, base_url, priority, params), self._loop
+        )
+        return await asyncio.wrap_future(future)
+
+    async def stream(self, user, messages, model, base_url=None, priority=PRIORITY_NORMAL, **params):
+        caller_loop = asyncio.get_running_loop()
+        tokens = asyncio.Queue()
+
+        def emit(item):
+            caller_loop.call_soon_threadsafe(tokens.put_nowait, item)
+
+        future = asyncio.run_coroutine_threadsafe(
+            self._stream(user, messages, model, base_url, priority, params, emit), self._loop
+        )
+        try:
+            while True:
+                item = await tokens.get()
+                if item is _END_OF_STREAM:
+                    return
+                if isinstance(item, _StreamError):
+                    raise item.error
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def stats(self):
+        return {
+            "active": self._active,
+            "queued": len(self._waiting),
+            "completed": self.completed,
+            "failed": self.failed,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+        }
+
+    def close(self):
+        async def shutdown():
+            for backend in self._backends.values():
+                await backend.close()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    # ---- everything below runs on the scheduler loop ----
+
+    def _backend(self, base_url):
+        # One backend (and its pooled HTTP client) per target, shared by every agent talking to it
+        backend = self._backends.get(base_url)
+        if backend is None:
+            backend = self.backend_factory(base_url)
+            self._backends[base_url] = backend
+
+        return backend
+
+    async def _complete(self, user, messages, model, base_url, priority, params):
+        key = hashlib.sha1(json.dumps([model, base_url, messages, params], sort_keys=True).encode()).hexdigest()
+
+        shared = self._in_flight.get(key)
+        if shared is not None:
+            self.coalesced += 1
+            return await asyncio.shield(shared)
+
+        shared = self._loop.create_future()
+        self._in_flight[key] = shared
+        try:
+            result = await self._with_retries(user, priority, lambda: self._request(model, base_url, messages, params))
+            shared.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as error:
+            shared.set_exception(error)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            shared.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def _request(self, model, base_url, messages, params):
+        return await self._backend(base_url).complete(model, messages, **params)
+
+    async def _stream(self, user, messages, model, base_url, priority, params, emit):
+        started = False
+
+        async def attempt():
+            nonlocal started
+            async for token in self._backend(base_url).stream(model, messages, **params):
+                started = True
+                emit(token)
+
+        try:
+            # Once tokens reached the caller a retry would duplicate them, so only failures before that retry
+            await self._with_retries(user, priority, attempt, retry_if=lambda: not started)
+            emit(_END_OF_STREAM)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            emit(_StreamError(error))
+
+    async def _with_retries(self, user, priority, call, retry_if=lambda: True):
+        attempt = 0
+        while True:
+            async with self._slot(user, priority):
+                try:
+                    result = await call()
+                    self.completed += 1
+                    return result
+                except Exception as error:
+                    if attempt >= self.max_retries or not is_retryable(error) or not retry_if():
+                        self.failed += 1
+                        raise
+                    delay = self._backoff(attempt, error)
+
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt, error):
+        retry_after = getattr(getattr(error, "response", None), "headers", {}).get("Retry-After")
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_delay)
+            except ValueError:
+                pass
+
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    @asynccontextmanager
+    async def _slot(self, user, priority):
+        waiter = self._loop.create_future()
+        heapq.heappush(self._waiting, (priority, self._served(user, self.clock()), next(self._sequence), user, waiter))
+        self._dispatch()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(user)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(user)
+
+    def _release(self, user):
+        self._active -= 1
+        self._active_by_user[user] -= 1
+        if self._active_by_user[user] == 0:
+            del self._active_by_user[user]
+            self._forget_idle_users()
+        self._dispatch()
+
+    def _served(self, user, now):
+        count, since = self._served_by_user.get(user, (0.0, now))
+        return count * 0.5 ** ((now - since) / self.fairness_half_life)
+
+    def _forget_idle_users(self):
+        # Swept at most once per half-life, so the table only holds users seen recently
+        now = self.clock()
+        if now - self._last_sweep < self.fairness_half_life:
+            return
+
+        self._last_sweep = now
+        for user in [user for user in self._served_by_user
+                     if user not in self._active_by_user and self._served(user, now) < FORGOTTEN_SERVED_COUNT]:
+            del self._served_by_user[user]
+
+    def _dispatch(self):
+        now = self.clock()
+        blocked = []
+        while self._waiting and self._active < self.max_concurrency:
+            entry = heapq.heappop(self._waiting)
+            user, waiter = entry[3], entry[4]
+            if waiter.done():
+                continue
+            if self._active_by_user.get(user, 0) >= self.per_user_concurrency:
+                blocked.append(entry)
+                continue
+
+            self._active += 1
+            self._active_by_user[user] = self._active_by_user.get(user, 0) + 1
+            self._served_by_user[user] = (self._served(user, now) + 1, now)
+            waiter.set_result(None)
+
+        for entry in blocked:
+            heapq.heappush(self._waiting, entry)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = InferenceScheduler(
+                max_concurrency=int(os.environ.get("MINDMESH_LLM_CONCURRENCY", 8)),
+                per_user_concurrency=int(os.environ.get("MINDMESH_LLM_PER_USER_CONCURRENCY", 1)),
+            )
+
+    return _scheduler
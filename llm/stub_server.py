@@ -0,0 +1,182 @@
+"""
+Local OpenAI-compatible chat completions server, for tests and offline load tests of the chat path.
+
+Run from the project root: `python -m llm.stub_server --port 8099 --latency 0.3 --tokens-per-second 40`,
+then point the app at it with `MINDMESH_LLM_BASE_URL=http://127.0.0.1:8099/v1`.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def lorem_tokens(count):
+    words = "the learner asks and the agent explains each step with a short example".split()
+    return [("" if i == 0 else " ") + words[i % len(words)] for i in range(count)]
+
+
+class StubInferenceServer:
+    """
+    Chat completions server answering canned `chunks`, streamed over SSE or returned whole.
+
+    `delay` seconds pass before the first token (or the whole reply), then chunks are paced at
+    `tokens_per_second` when set. The first `fail_first` requests get a 429, and any other request fails
+    with a 503 with probability `error_rate`. With `record_requests`, every request body is kept in
+    `requests` so tests can assert on what the client sent.
+    """
+
+    def __init__(self, chunks=("Hello", ", ", "learner", "!"), delay=0.0, fail_first=0, tokens_per_second=None,
+                 error_rate=0.0, seed=None, host="127.0.0.1", port=0, record_requests=True):
+        self.chunks = list(chunks)
+        self.delay = delay
+        self.fail_first = fail_first
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.record_requests = record_requests
+        self.requests = []
+        self.received = 0
+        self.errors = 0
+        self.active = 0
+        self.max_active = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _error_status(self):
+        # Called with the lock held
+        if self.received <= self.fail_first:
+            return 429
+        if self.error_rate and self._random.random() < self.error_rate:
+            return 503
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server._lock:
+                    server.received += 1
+                    if server.record_requests:
+                        server.requests.append({"path": self.path, "body": body})
+                    status = server._error_status()
+                    if status is not None:
+                        server.errors += 1
+                    server.active += 1
+                    server.max_active = max(server.max_active, server.active)
+
+                try:
+                    if status is not None:
+                        self.send_json(status, {"error": {"message": "stub error", "code": status}})
+                        return
+
+                    time.sleep(server.delay)
+                    self.respond(body)
+                finally:
+                    with server._lock:
+                        server.active -= 1
+
+            def send_json(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def pace(self):
+                if server.tokens_per_second:
+                    time.sleep(1 / server.tokens_per_second)
+
+            def respond(self, body):
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for i, chunk in enumerate(server.chunks):
+                        if i:
+                            self.pace()
+                        payload = {
+                            "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                            "system_fingerprint": "stub",
+                            "choices": [{"index": 0, "delta": {"role": "assistant", "content": chunk},
+                                         "finish_reason": None, "logprobs": None}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(payload)}\n\n".encode())
+                        self.wfile.flush()
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.close_connection = True
+                    return
+
+                for _ in server.chunks[1:]:
+                    self.pace()
+                self.send_json(200, {
+                    "id": "stub", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "system_fingerprint": "stub",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(server.chunks)},
+                                 "finish_reason": "stop", "logprobs": None}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": len(server.chunks),
+                              "total_tokens": len(server.chunks)},
+                })
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m llm.stub_server", description="Stub chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=40.0, help="Pace of the following tokens (0: no pacing)")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per reply")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    server = StubInferenceServer(
+        chunks=lorem_tokens(args.tokens), delay=args.latency, tokens_per_second=args.tokens_per_second or None,
+        error_rate=args.error_rate, seed=args.seed, host=args.host, port=args.port, record_requests=False,
+    )
+    print(f"Stub inference server on {server.base_url}/v1 (Ctrl+C to stop)")
+    with server:
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+    print(f"Served {server.received} requests, {server.errors} errors")
+
+
+if __name__ == "__main__":
+    main()
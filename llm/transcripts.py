@@ -0,0 +1,168 @@
+import argparse
+import threading
+import time
+
+from db import constants
+from db.connection_pool import get_connection
+
+DEFAULT_FLUSH_INTERVAL = 0.2
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_KEEP_MESSAGES = 200
+
+
+class TranscriptStore:
+    """
+    Append-only log of chat messages in the project database (`transcripts` table).
+
+    `append` only queues the message; a writer thread commits everything queued in one transaction every
+    `flush_interval` seconds, or as soon as `batch_size` messages are waiting. A chat request therefore
+    never waits on a disk sync, and a busy server writes many messages per commit. Messages still queued
+    when the process dies are lost, at most `flush_interval` seconds of them.
+    """
+
+    def __init__(self, db_path=None, flush_interval=DEFAULT_FLUSH_INTERVAL, batch_size=DEFAULT_BATCH_SIZE):
+        self.db_path = db_path or constants.DB_PATH
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._pending = []
+        self._condition = threading.Condition()
+        self._flushed = threading.Condition(self._condition)
+        self._queued = 0
+        self._written = 0
+        self._flush_requested = False
+        self._closed = False
+
+        self.commits = 0
+        self.dropped = 0
+        self._writer = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, username, role, content):
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Transcript store is closed.")
+
+            self._pending.append((username, role, content, time.time()))
+            self._queued += 1
+            if len(self._pending) >= self.batch_size:
+                self._condition.notify()
+
+    def flush(self):
+        """Blocks until every message appended so far is committed."""
+        with self._condition:
+            target = self._queued
+            if self._written < target:
+                self._flush_requested = True
+                self._condition.notify()
+            while self._written < target:
+                self._flushed.wait()
+
+    def tail(self, username, limit=20):
+        """The last `limit` messages of a user, oldest first, as {"role", "content"} dicts."""
+        self.flush()
+        with get_connection(self.db_path) as conn:
+            rows = conn.execute("""
+                SELECT role, content FROM transcripts
+                WHERE username = ?
+                ORDER BY message_id DESC
+                LIMIT ?
+            """, (username, limit)).fetchall()
+
+        return [{"role": role, "content": content} for role, content in reversed(rows)]
+
+    def compact(self, keep=DEFAULT_KEEP_MESSAGES):
+        """Deletes all but the last `keep` messages of every user. Returns the number of messages deleted."""
+        self.flush()
+        with get_connection(self.db_path) as conn:
+            cur = conn.execute("""
+                DELETE FROM transcripts WHERE message_id IN (
+                    SELECT message_id FROM (
+                        SELECT message_id, ROW_NUMBER() OVER (PARTITION BY username ORDER BY message_id DESC) AS age
+                        FROM transcripts
+                    )
+                    WHERE age > ?
+                )
+            """, (keep,))
+
+        return cur.rowcount
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+
+        self._writer.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                # Group commit: wait for a full batch, a flush or close, or the end of the interval
+                if len(self._pending) < self.batch_size and not self._flush_requested and not self._closed:
+                    self._condition.wait(self.flush_interval)
+                batch, self._pending = self._pending, []
+                self._flush_requested = False
+                closed = self._closed
+
+            if batch:
+                try:
+                    with get_connection(self.db_path) as conn:
+                        conn.executemany(
+                            "INSERT INTO transcripts (username, role, content, created_at) VALUES (?, ?, ?, ?)", batch
+                        )
+                    self.commits += 1
+                except Exception as e:
+                    # A transcript is not worth crashing a chat for: drop the batch and keep the writer alive
+                    self.dropped += len(batch)
+                    print("Error writing chat transcripts: ", e)
+
+            with self._condition:
+                self._written += len(batch)
+                self._flushed.notify_all()
+
+            if closed:
+                return
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_transcript_store(db_path=None):
+    db_path = db_path or constants.DB_PATH
+    with _stores_lock:
+        store = _stores.get(db_path)
+        if store is None:
+            store = _stores[db_path] = TranscriptStore(db_path)
+
+    return store
+
+
+def close_transcript_stores():
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+
+    for store in stores:
+        store.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m llm.transcripts", description="Chat transcript maintenance.")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--keep", type=int, default=DEFAULT_KEEP_MESSAGES, help="Messages kept per user")
+    parser.add_argument("--db", dest="db_path", default=None, help="Database file (defaults to db.constants.DB_PATH)")
+    args = parser.parse_args(argv)
+
+    store = TranscriptStore(args.db_path)
+    try:
+        deleted = store.compact(args.keep)
+    finally:
+        store.close()
+    print(f"Deleted {deleted} messages, kept the last {args.keep} per user")
+
+
+if __name__ == "__main__":
+    main()
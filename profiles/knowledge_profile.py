@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import List, Tuple
 
-@dataclass
+@dataclass(slots=True)
 class KnowledgeProfile:
     name: str = ""
     age: str = ""
@@ -11,3 +11,22 @@ class KnowledgeProfile:
     programming_comfort: int = 0
     confidence_asking: int = 0
     support_needs: List[str] = field(default_factory=list)
+
+    def freeze(self):
+        return FrozenKnowledgeProfile(
+            self.name, self.age, self.background, self.familiarity_kw, self.math_eq, self.programming_comfort,
+            self.confidence_asking, tuple(self.support_needs)
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenKnowledgeProfile:
+    """Immutable, hashable KnowledgeProfile, for sharing between threads or using as a dict key."""
+    name: str = ""
+    age: str = ""
+    background: str = ""
+    familiarity_kw: str = ""
+    math_eq: int = 0
+    programming_comfort: int = 0
+    confidence_asking: int = 0
+    support_needs: Tuple[str, ...] = ()
@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, astuple
 
-@dataclass
+@dataclass(slots=True)
 class LearnerProfile:
     goal_understanding: int = 0
     problematic: str = ""
@@ -14,3 +14,23 @@ class LearnerProfile:
     motivation: str = ""
     learning_mode: int = 0
     adaptability: str = ""
+
+    def freeze(self):
+        return FrozenLearnerProfile(*astuple(self))
+
+
+@dataclass(frozen=True, slots=True)
+class FrozenLearnerProfile:
+    """Immutable, hashable LearnerProfile, for sharing between threads or using as a dict key."""
+    goal_understanding: int = 0
+    problematic: str = ""
+    explanation_style: str = ""
+    precision_level: int = 0
+    analogies: int = 0
+    conciseness: int = 0
+    interactivity: str = ""
+    tone: str = ""
+    humor: str = ""
+    motivation: str = ""
+    learning_mode: int = 0
+    adaptability: str = ""
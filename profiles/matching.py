@@ -0,0 +1,255 @@
+import threading
+import zlib
+
+import numpy as np
+
+from db import constants
+from db.db_table_management import get_user_contexts_page, load_full_user_context, load_full_user_contexts, \
+    profile_change_listeners
+from profiles.profile_table import CATEGORICAL_FIELDS, NUMERIC_FIELDS, ProfileTable
+
+# Categorical answers and support needs are hashed into fixed-size one-hot blocks, so a new answer or tag
+# never changes the width of the feature matrix and existing rows never need recomputing
+CATEGORY_BUCKETS = 64
+TAG_BUCKETS = 32
+CATEGORY_WEIGHT = 0.5
+TAG_WEIGHT = 0.5
+
+FEATURE_DIM = len(NUMERIC_FIELDS) + CATEGORY_BUCKETS + TAG_BUCKETS
+# Rows of the score matrix computed at a time by batched queries
+QUERY_CHUNK_ROWS = 1024
+
+
+def _bucket(key, buckets):
+    return zlib.crc32(key.encode()) % buckets
+
+
+class MatchingIndex:
+    """
+    L2-normalised feature vector for every complete profile, kept alongside a ProfileTable.
+
+    Sliders contribute their value / 10, categorical answers and support needs a hashed one-hot block,
+    so the dot product of two rows is their cosine similarity. Adding or updating a user only computes
+    that user's row; `sync` appends the users created since the last sync, one keyset page at a time, and
+    the users it saw before they had both profiles.
+    """
+
+    def __init__(self, table=None):
+        self.table = table or ProfileTable()
+        self._features = np.zeros((max(len(self.table), 1024), FEATURE_DIM), dtype=np.float32)
+        self._features[:len(self.table)] = self._compute(np.arange(len(self.table)))
+        self._last_user_id = int(self.table.user_ids[:len(self.table)].max()) if len(self.table) else 0
+        self._rows = {name: i for i, name in enumerate(self.table.usernames)}  # username -> table row
+        self._pending = set()  # usernames seen by sync before they had both profiles
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.table)
+
+    def __contains__(self, username):
+        return username in self._rows
+
+    @property
+    def features(self):
+        return self._features[:len(self.table)]
+
+    def add(self, user_id, username, knowledge_profile, learner_profile):
+        with self._lock:
+            row = self.table.append(user_id, username, knowledge_profile, learner_profile)
+            if row >= len(self._features):
+                grown = np.zeros((2 * len(self._features), FEATURE_DIM), dtype=np.float32)
+                grown[:len(self._features)] = self._features
+                self._features = grown
+
+            self._features[row] = self._compute(np.array([row]))[0]
+            self._rows[username] = row
+            self._pending.discard(username)
+            self._last_user_id = max(self._last_user_id, user_id)
+
+    def sync(self, page_size=1000):
+        """
+        Adds the complete profiles of users created after the last user seen, and of the users that were still
+        missing a profile then. Returns how many were added.
+        """
+        added = 0
+        if self._pending:
+            contexts = load_full_user_contexts(sorted(self._pending))
+            # Deleted users are dropped too
+            self._pending.intersection_update(contexts)
+            for context in contexts.values():
+                if context.knowledge_profile is not None and context.learner_profile is not None:
+                    self.add(context.user_id, context.username, context.knowledge_profile, context.learner_profile)
+                    added += 1
+
+        while True:
+            page = get_user_contexts_page(self._last_user_id, page_size)
+            for context in page:
+                if context.knowledge_profile is not None and context.learner_profile is not None:
+                    self.add(context.user_id, context.username, context.knowledge_profile, context.learner_profile)
+                    added += 1
+                elif context.username not in self._rows:
+                    self._pending.add(context.username)
+
+            if page:
+                self._last_user_id = max(self._last_user_id, page[-1].user_id)
+            if len(page) < page_size:
+                return added
+
+    def similar(self, username, k=5):
+        """The k learners most similar to `username`, as [(username, similarity)]."""
+        return self.similar_batch([username], k)[username]
+
+    def similar_batch(self, usernames, k=5):
+        """{username: [(username, similarity)]} for every known username in `usernames`."""
+        rows = self._rows
+        query_rows = np.array([rows[name] for name in usernames if name in rows], dtype=int)
+        k = min(k, len(self.table) - 1)
+        if len(query_rows) == 0 or k <= 0:
+            return {name: [] for name in usernames if name in rows}
+
+        results = {}
+        features = self.features
+        for start in range(0, len(query_rows), QUERY_CHUNK_ROWS):
+            chunk = query_rows[start:start + QUERY_CHUNK_ROWS]
+            scores = features[chunk] @ features.T
+            scores[np.arange(len(chunk)), chunk] = -np.inf
+
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1)
+            top, top_scores = np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
+
+            for row, neighbours, neighbour_scores in zip(chunk, top, top_scores):
+                results[self.table.usernames[row]] = [
+                    (self.table.usernames[j], float(s)) for j, s in zip(neighbours, neighbour_scores)
+                ]
+
+        return results
+
+    def cluster(self, n_clusters=8, iterations=25, seed=0):
+        """
+        k-means over the feature matrix. Returns (labels, clusters) where labels[i] is the cluster of
+        table row i and clusters lists, per cluster, its size and the mean of each slider.
+        """
+        features = self.features
+        n_clusters = min(n_clusters, len(features))
+        if n_clusters == 0:
+            return np.zeros(0, dtype=int), []
+
+        rng = np.random.default_rng(seed)
+        centroids = features[rng.choice(len(features), n_clusters, replace=False)].copy()
+        labels = np.zeros(len(features), dtype=int)
+        for iteration in range(iterations):
+            # ||x - c||^2 = ||x||^2 - 2 x.c + ||c||^2, and ||x||^2 does not change the argmin
+            distances = (centroids * centroids).sum(axis=1) - 2 * features @ centroids.T
+            new_labels = distances.argmin(axis=1)
+            if iteration > 0 and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+
+            # Per-cluster sums as a (k, n) @ (n, d) product, much faster than np.add.at
+            members = np.eye(n_clusters, dtype=np.float32)[labels].T
+            counts = members.sum(axis=1)
+            nonempty = counts > 0
+            centroids[nonempty] = (members @ features)[nonempty] / counts[nonempty, None]
+
+        members = np.eye(n_clusters, dtype=np.float32)[labels].T
+        counts = members.sum(axis=1).astype(int)
+        means = (members @ self.table.numeric.astype(np.float32)) / np.maximum(counts, 1)[:, None]
+
+        clusters = [
+            {"cluster": i, "size": int(counts[i]), **{name: round(float(means[i, j]), 2)
+                                                      for j, name in enumerate(NUMERIC_FIELDS)}}
+            for i in range(n_clusters)
+        ]
+        return labels, clusters
+
+    def pair_mentors(self, mentors, mentees, capacity=1):
+        """
+        Assigns each mentee to the most similar mentor with room left (at most `capacity` mentees each).
+        Mentees propose to their best available mentor in rounds, and an over-subscribed mentor keeps its
+        most similar proposers. Returns [(mentor, mentee, similarity)], best matches first.
+        """
+        rows = self._rows
+        mentors = list(dict.fromkeys(name for name in mentors if name in rows))
+        mentor_names = set(mentors)
+        mentees = [name for name in dict.fromkeys(mentees) if name in rows and name not in mentor_names]
+        mentor_rows = np.array([rows[name] for name in mentors], dtype=int)
+        mentee_rows = np.array([rows[name] for name in mentees], dtype=int)
+        if len(mentor_rows) == 0 or len(mentee_rows) == 0:
+            return []
+
+        features = self.features
+        mentor_features = features[mentor_rows]
+        remaining = np.full(len(mentor_rows), capacity)
+        waiting = np.arange(len(mentee_rows))
+        pairs = []
+
+        while len(waiting) and remaining.any():
+            scores = features[mentee_rows[waiting]] @ mentor_features.T
+            scores[:, remaining == 0] = -np.inf
+            choice = scores.argmax(axis=1)
+            best = scores[np.arange(len(waiting)), choice]
+
+            # Group proposals by mentor, most similar first, and accept as many as each mentor has room for
+            order = np.lexsort((-best, choice))
+            grouped = choice[order]
+            starts = np.searchsorted(grouped, grouped, side="left")
+            accepted = order[(np.arange(len(order)) - starts) < remaining[grouped]]
+
+            for i in accepted:
+                pairs.append((self.table.usernames[mentor_rows[choice[i]]],
+                              self.table.usernames[mentee_rows[waiting[i]]], float(best[i])))
+            remaining -= np.bincount(choice[accepted], minlength=len(mentor_rows))
+            waiting = np.delete(waiting, accepted)
+
+        return sorted(pairs, key=lambda pair: -pair[2])
+
+    def _compute(self, rows):
+        table = self.table
+        features = np.zeros((len(rows), FEATURE_DIM), dtype=np.float32)
+        features[:, :len(NUMERIC_FIELDS)] = table.numeric[rows] / 10.0
+
+        offset = len(NUMERIC_FIELDS)
+        for name in CATEGORICAL_FIELDS:
+            buckets = np.array([_bucket(f"{name}={value}", CATEGORY_BUCKETS) for value in table.categories[name]],
+                               dtype=int)
+            if len(buckets):
+                features[np.arange(len(rows)), offset + buckets[table.codes(name)[rows]]] += CATEGORY_WEIGHT
+
+        offset += CATEGORY_BUCKETS
+        tag_buckets = np.array([_bucket(tag, TAG_BUCKETS) for tag in table.tags], dtype=int)
+        for j, bucket in enumerate(tag_buckets):
+            features[:, offset + bucket] += TAG_WEIGHT * table.support_needs[rows, j]
+
+        norms = np.linalg.norm(features, axis=1, keepdims=True)
+        return features / np.maximum(norms, 1e-12)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_matching_index(db_path=None):
+    """The matching index of a project database, built on first use and caught up with new users after."""
+    db_path = db_path or constants.DB_PATH
+    with _indexes_lock:
+        index = _indexes.get(db_path)
+        if index is None:
+            index = _indexes[db_path] = MatchingIndex()
+
+    index.sync()
+    return index
+
+
+def update_matching_index(username):
+    index = _indexes.get(constants.DB_PATH)
+    if index is None:
+        return
+
+    context = load_full_user_context(username)
+    if context and context.knowledge_profile is not None and context.learner_profile is not None:
+        index.add(context.user_id, context.username, context.knowledge_profile, context.learner_profile)
+
+
+profile_change_listeners.append(update_matching_index)
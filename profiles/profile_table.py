@@ -0,0 +1,170 @@
+import numpy as np
+
+from db.db_table_management import iter_user_contexts
+
+KNOWLEDGE_NUMERIC_FIELDS = ["math_eq", "programming_comfort", "confidence_asking"]
+LEARNER_NUMERIC_FIELDS = ["goal_understanding", "precision_level", "analogies", "conciseness", "learning_mode"]
+NUMERIC_FIELDS = KNOWLEDGE_NUMERIC_FIELDS + LEARNER_NUMERIC_FIELDS
+
+CATEGORICAL_FIELDS = ["explanation_style", "interactivity", "tone", "humor", "motivation", "adaptability"]
+
+
+class ProfileTable:
+    """
+    Columnar, in-memory view of users that have both a knowledge and a learner profile.
+
+    The 0-10 sliders are stored as one uint8 matrix (one row per user, one column per field in
+    NUMERIC_FIELDS), the categorical answers as integer codes into a per-field list of values, and the
+    support needs as a boolean (user, tag) matrix: a few dozen bytes per user plus the usernames.
+    Rows can be appended one at a time; storage grows by doubling, so appends are amortized O(1).
+    """
+
+    def __init__(self, capacity=1024):
+        capacity = max(capacity, 1)
+        self._size = 0
+        self.user_ids = np.zeros(capacity, dtype=np.int64)
+        self.usernames = []
+        self._numeric = np.zeros((capacity, len(NUMERIC_FIELDS)), dtype=np.uint8)
+        self._codes = np.zeros((capacity, len(CATEGORICAL_FIELDS)), dtype=np.uint16)
+        self._support_needs = np.zeros((capacity, 8), dtype=bool)
+
+        self.categories = {name: [] for name in CATEGORICAL_FIELDS}
+        self._category_codes = {name: {} for name in CATEGORICAL_FIELDS}
+        self.tags = []
+        self._tag_codes = {}
+        self._rows = {}  # user_id -> row
+
+    @classmethod
+    def from_contexts(cls, contexts, capacity=1024):
+        """Builds a table from UserContext objects; users missing either profile are skipped."""
+        table = cls(capacity)
+        for context in contexts:
+            if context.knowledge_profile is not None and context.learner_profile is not None:
+                table.append(context.user_id, context.username, context.knowledge_profile, context.learner_profile)
+
+        return table
+
+    @classmethod
+    def from_database(cls, page_size=1000):
+        return cls.from_contexts(iter_user_contexts(page_size=page_size))
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, user_id):
+        return user_id in self._rows
+
+    @property
+    def numeric(self):
+        """(n, len(NUMERIC_FIELDS)) uint8 view of the sliders."""
+        return self._numeric[:self._size]
+
+    @property
+    def support_needs(self):
+        """(n, len(tags)) boolean view: support_needs[i, j] is True when row i needs tags[j]."""
+        return self._support_needs[:self._size, :len(self.tags)]
+
+    @property
+    def nbytes(self):
+        return self.user_ids.nbytes + self._numeric.nbytes + self._codes.nbytes + self._support_needs.nbytes
+
+    def row(self, user_id):
+        return self._rows[user_id]
+
+    def column(self, name):
+        return self.numeric[:, NUMERIC_FIELDS.index(name)]
+
+    def codes(self, name):
+        return self._codes[:self._size, CATEGORICAL_FIELDS.index(name)]
+
+    def append(self, user_id, username, knowledge_profile, learner_profile):
+        """Adds a user, or overwrites their row if they are already in the table. Returns the row index."""
+        row = self._rows.get(user_id)
+        if row is None:
+            row = self._size
+            if row == len(self.user_ids):
+                self._grow(2 * len(self.user_ids))
+            self._size += 1
+            self._rows[user_id] = row
+            self.usernames.append(username)
+
+        self.user_ids[row] = user_id
+        self.usernames[row] = username
+        self._numeric[row] = [getattr(knowledge_profile, name) or 0 for name in KNOWLEDGE_NUMERIC_FIELDS] \
+            + [getattr(learner_profile, name) or 0 for name in LEARNER_NUMERIC_FIELDS]
+        self._codes[row] = [self._encode(name, getattr(learner_profile, name)) for name in CATEGORICAL_FIELDS]
+
+        self._support_needs[row] = False
+        for tag in knowledge_profile.support_needs:
+            self._support_needs[row, self._tag_code(tag)] = True
+
+        return row
+
+    def mask(self, name, value):
+        """Boolean row mask for a categorical value, e.g. mask("tone", "Casual")."""
+        code = self._category_codes[name].get(value)
+        if code is None:
+            return np.zeros(self._size, dtype=bool)
+
+        return self.codes(name) == code
+
+    def describe(self, mask=None):
+        """{field: {mean, std, min, max}} over the numeric fields, optionally for the rows in `mask`."""
+        values = self.numeric if mask is None else self.numeric[mask]
+        if len(values) == 0:
+            return {}
+
+        values = values.astype(np.float32)
+        mean, std = values.mean(axis=0), values.std(axis=0)
+        low, high = values.min(axis=0), values.max(axis=0)
+
+        return {
+            name: {"mean": float(mean[i]), "std": float(std[i]), "min": int(low[i]), "max": int(high[i])}
+            for i, name in enumerate(NUMERIC_FIELDS)
+        }
+
+    def histogram(self, name, mask=None):
+        """Number of users for each slider value 0-10."""
+        values = self.column(name) if mask is None else self.column(name)[mask]
+        return np.bincount(values, minlength=11)
+
+    def value_counts(self, name, mask=None):
+        codes = self.codes(name) if mask is None else self.codes(name)[mask]
+        counts = np.bincount(codes, minlength=len(self.categories[name]))
+        return dict(zip(self.categories[name], counts.tolist()))
+
+    def support_need_counts(self, mask=None):
+        needs = self.support_needs if mask is None else self.support_needs[mask]
+        return dict(zip(self.tags, needs.sum(axis=0).tolist()))
+
+    def _encode(self, name, value):
+        codes = self._category_codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.categories[name])
+            self.categories[name].append(value)
+
+        return code
+
+    def _tag_code(self, tag):
+        code = self._tag_codes.get(tag)
+        if code is None:
+            code = self._tag_codes[tag] = len(self.tags)
+            self.tags.append(tag)
+            if code == self._support_needs.shape[1]:
+                grown = np.zeros((len(self._support_needs), 2 * code), dtype=bool)
+                grown[:, :code] = self._support_needs
+                self._support_needs = grown
+
+        return code
+
+    def _grow(self, capacity):
+        def resized(array):
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+
+        self.user_ids = resized(self.user_ids)
+        self._numeric = resized(self._numeric)
+        self._codes = resized(self._codes)
+        self._support_needs = resized(self._support_needs)
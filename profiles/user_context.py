@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+
+@dataclass(slots=True)
+class UserContext:
+    user_id: int
+    username: str
+    knowledge_profile: Optional[KnowledgeProfile] = None
+    learner_profile: Optional[LearnerProfile] = None
\ No newline at end of file
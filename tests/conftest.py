@@ -0,0 +1,49 @@
+import os
+import pytest
+
+from db import constants
+from db.connection_pool import close_all_pools
+from db.db_management import init_db
+from llm.prompt_cache import close_prompt_caches
+from llm.response_cache import clear_response_caches
+from llm.transcripts import close_transcript_stores
+from db.db_table_management import create_user, create_knowledge_profile, create_learner_profile
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = os.path.join(tmp_path, "test.db")
+    monkeypatch.setattr(constants, "DB_PATH", path)
+    init_db()
+
+    yield path
+
+    close_transcript_stores()
+    close_all_pools()
+    close_prompt_caches()
+
+
+@pytest.fixture
+def make_user(db_path):
+    def make(username, with_profiles=True):
+        create_user(username)
+        if with_profiles:
+            create_knowledge_profile(username, KnowledgeProfile(
+                name=username.title(), age="24", background="Software Engineering", familiarity_kw="Calculus",
+                math_eq=7, programming_comfort=6, confidence_asking=5, support_needs=["Mathematics"]
+            ))
+            create_learner_profile(username, LearnerProfile(
+                goal_understanding=5, problematic="None", explanation_style="Step-by-step", precision_level=2,
+                analogies=1, conciseness=3, interactivity="Yes", tone="Casual", humor="Serious/Focused",
+                motivation="Yes", learning_mode=4, adaptability="No"
+            ))
+
+    return make
+
+
+@pytest.fixture(autouse=True)
+def fresh_response_caches():
+    yield
+    clear_response_caches()
@@ -0,0 +1,51 @@
+import json
+
+import gradio as gr
+import pytest
+
+from db import constants
+from llm.profile_clusters import build_cluster_map, export_cluster_map
+from ui.gradio.admin import show_profile_map
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    maps = tmp_path / "maps"
+    maps.mkdir()
+    monkeypatch.setattr(constants, "MAP_EXPORT_DIR", str(maps))
+    return maps
+
+
+def test_exported_map_is_rendered(export_dir):
+    profiles = [(i, {"name": f"P{i}", "main_field": "Chimie", "prereq_level": 0.5}) for i in range(5)]
+    export_cluster_map(build_cluster_map(profiles), str(export_dir / "projet.map.json"))
+
+    svg, summary = show_profile_map("projet.map.json")
+
+    assert svg.startswith("<svg")
+    assert summary[0]["domain"] == "Chimie" and summary[0]["count"] == 5
+
+
+@pytest.mark.parametrize("name", ["../secret.json", "/etc/passwd.json", "notes.svg"])
+def test_files_outside_the_export_directory_are_refused(export_dir, name):
+    (export_dir.parent / "secret.json").write_text("{}", encoding="utf-8")
+
+    with pytest.raises(gr.Error):
+        show_profile_map(name)
+
+
+@pytest.mark.parametrize("content", ["{not json", json.dumps({"points": {}}), json.dumps([1, 2])])
+def test_malformed_exports_are_reported(export_dir, content):
+    (export_dir / "broken.json").write_text(content, encoding="utf-8")
+
+    with pytest.raises(gr.Error):
+        show_profile_map("broken.json")
+
+
+def test_markup_in_exports_is_escaped(export_dir):
+    profiles = [(1, {"name": "<script>alert(1)</script>", "main_field": "<b>Chimie</b>", "prereq_level": 0.5})]
+    export_cluster_map(build_cluster_map(profiles), str(export_dir / "projet.map.json"))
+
+    svg, _ = show_profile_map("projet.map.json")
+
+    assert "<script>" not in svg and "<b>" not in svg
@@ -0,0 +1,120 @@
+import pytest
+
+from llm.agent_registry import AgentRegistry
+from llm.chat_history import ChatHistory
+
+
+class FakeAgent:
+    def __init__(self, username):
+        self.username = username
+        self.chat_history = ChatHistory()
+
+    def system_prompt(self):
+        self.chat_history.append({"role": "system", "content": f"prompt for {self.username}"})
+
+    def resume(self):
+        self.chat_history.append({"role": "user", "content": "from the transcript"})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sessions_get_their_own_agent():
+    registry = AgentRegistry(factory=FakeAgent)
+
+    first = registry.create("session-a", "estefania")
+    second = registry.create("session-b", "maxyo")
+
+    assert registry.get("session-a") is first
+    assert registry.get("session-b") is second
+    assert first is not second
+
+
+def test_least_recently_used_agent_is_evicted():
+    registry = AgentRegistry(max_agents=2, factory=FakeAgent)
+
+    registry.create("a", "estefania")
+    registry.create("b", "maxyo")
+    registry.get("a")
+    registry.create("c", "third")
+
+    assert len(registry) == 2
+    with pytest.raises(KeyError):
+        registry.get("b")
+
+
+def test_idle_agents_expire():
+    clock = FakeClock()
+    registry = AgentRegistry(ttl_seconds=10, factory=FakeAgent, clock=clock)
+
+    registry.create("a", "estefania")
+    clock.now = 11
+
+    with pytest.raises(KeyError):
+        registry.get("a")
+
+
+def test_memory_cap_evicts_oldest_histories():
+    registry = AgentRegistry(max_memory_bytes=60, factory=FakeAgent)
+
+    registry.create("a", "estefania").chat_history.append({"role": "user", "content": "x" * 40})
+    registry.create("b", "maxyo")
+
+    assert len(registry) == 1
+    assert registry.memory_usage() <= 60
+
+
+def test_memory_cap_is_checked_as_histories_grow():
+    registry = AgentRegistry(max_memory_bytes=100, factory=FakeAgent)
+    registry.create("a", "estefania")
+    registry.create("b", "maxyo")
+
+    # "a" keeps chatting: its history outgrows the cap without any new agent being created
+    registry.get("a").chat_history.append({"role": "assistant", "content": "x" * 90})
+    registry.get("a")
+
+    assert len(registry) == 1
+    assert registry.get("a").username == "estefania"
+
+
+def test_evicted_agent_is_rehydrated_with_client_history():
+    registry = AgentRegistry(max_agents=1, factory=FakeAgent)
+    registry.create("a", "estefania")
+    registry.create("b", "maxyo")
+
+    history = [
+        {"role": "user", "content": "What is the project about?", "metadata": None},
+        {"role": "assistant", "content": "It is about learning."},
+    ]
+    agent = registry.get("a", "estefania", history)
+
+    assert agent.username == "estefania"
+    assert agent.chat_history[0]["role"] == "system"
+    assert agent.chat_history[1:] == [
+        {"role": "user", "content": "What is the project about?"},
+        {"role": "assistant", "content": "It is about learning."},
+    ]
+    assert registry.stats()["rehydrations"] == 1
+
+
+@pytest.mark.parametrize("history", [None, []])
+def test_evicted_agent_without_client_history_resumes_transcript(history):
+    registry = AgentRegistry(max_agents=1, factory=FakeAgent)
+    registry.create("a", "estefania")
+    registry.create("b", "maxyo")
+
+    agent = registry.get("a", "estefania", history)
+
+    assert agent.chat_history[-1]["content"] == "from the transcript"
+
+
+def test_started_chat_resumes_transcript():
+    registry = AgentRegistry(factory=FakeAgent)
+
+    assert len(registry.create("a", "estefania").chat_history) == 1
+    assert registry.create("b", "estefania", resume=True).chat_history[-1]["content"] == "from the transcript"
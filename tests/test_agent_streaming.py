@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("huggingface_hub")
+
+from llm.agent import Agent, stream_reply
+from llm.stub_server import StubInferenceServer
+
+
+async def collect(agent, message):
+    return [token async for token in agent.stream_message(message)]
+
+
+def test_stream_message_yields_tokens_in_order(make_user):
+    make_user("estefania")
+
+    with StubInferenceServer(chunks=["Bon", "jour", " !"]) as server:
+        agent = Agent("estefania", base_url=server.base_url + "/v1")
+        agent.system_prompt()
+
+        tokens = asyncio.run(collect(agent, "Hello?"))
+
+    assert tokens == ["Bon", "jour", " !"]
+    assert agent.chat_history[-1] == {"role": "assistant", "content": "Bonjour !"}
+
+    request = server.requests[0]
+    assert request["path"] == "/v1/chat/completions"
+    assert request["body"]["stream"] is True
+    assert request["body"]["messages"][0]["role"] == "system"
+    assert request["body"]["messages"][-1] == {"role": "user", "content": "Hello?"}
+
+
+def test_unknown_user_is_rejected(db_path):
+    with pytest.raises(ValueError):
+        Agent("nobody", base_url="http://127.0.0.1:9/v1")
+
+
+def test_stream_reply_for_project_profile():
+    profile = {"name": "Ada", "main_field": "Physique", "prereq_level": 0.4}
+
+    async def collect_reply(server):
+        messages = [{"role": "user", "content": "Bonjour ?"}]
+        return [token async for token in stream_reply(profile, messages, base_url=server.base_url + "/v1")]
+
+    with StubInferenceServer(chunks=["Salut", " Ada"]) as server:
+        tokens = asyncio.run(collect_reply(server))
+
+    assert tokens == ["Salut", " Ada"]
+    messages = server.requests[0]["body"]["messages"]
+    assert messages[0]["role"] == "system" and "main_field: Physique" in messages[0]["content"]
+    assert messages[1] == {"role": "user", "content": "Bonjour ?"}
@@ -0,0 +1,24 @@
+from benchmarks import data
+from benchmarks.suite import compare, run
+
+
+def test_synthetic_data_is_seeded():
+    assert data.users(5, seed=3) == data.users(5, seed=3)
+    assert data.project_profiles(5) != data.project_profiles(5, seed=1)
+
+
+def test_compare_flags_slowdowns_above_threshold():
+    baseline = {"db_insert[10]": 100.0, "db_lookup[10]": 10.0}
+    results = {"db_insert[10]": 120.0, "db_lookup[10]": 20.0, "new[10]": 1.0}
+
+    assert compare(results, baseline, threshold=0.25) == [("db_lookup[10]", 10.0, 20.0)]
+
+
+def test_run_small_db_benchmarks():
+    results = run(["db_insert", "db_lookup"], repeat=1, sizes=[10])
+
+    assert set(results) == {
+        "db_insert[10]", "db_lookup.get_knowledge_profile_by_username[10]",
+        "db_lookup.get_learner_profile_by_username[10]", "db_lookup.load_full_user_context[10]",
+    }
+    assert all(value > 0 for value in results.values())
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+import db.bulk
+from db.bulk import export_file, import_file, import_rows
+from db.db_management import clear_db_data
+from db.db_table_management import load_full_user_context, load_full_user_contexts
+
+
+def row(username, **overrides):
+    values = {
+        "username": username, "name": username.title(), "age": "30", "background": "Physics",
+        "familiarity_kw": "Optics", "math_eq": "8", "programming_comfort": "3", "confidence_asking": "6",
+        "support_needs": "Mathematics;Programming", "goal_understanding": "7", "problematic": "None",
+        "explanation_style": "Examples", "precision_level": "5", "analogies": "4", "conciseness": "6",
+        "interactivity": "Yes", "tone": "Formal", "humor": "Light", "motivation": "Yes",
+        "learning_mode": "2", "adaptability": "Yes",
+    }
+    values.update(overrides)
+    return values
+
+
+def test_import_rows_in_chunks(db_path):
+    rows = [(i + 1, row(f"learner{i}")) for i in range(25)]
+
+    report = import_rows(rows, chunk_size=10)
+
+    assert report.rows == 25
+    assert report.users_created == 25
+    assert report.knowledge_profiles == report.learner_profiles == 25
+    assert report.errors == []
+
+    contexts = load_full_user_contexts([f"learner{i}" for i in range(25)])
+    assert len(contexts) == 25
+    assert contexts["learner3"].knowledge_profile.math_eq == 8
+    assert contexts["learner3"].learner_profile.tone == "Formal"
+
+
+def test_import_reports_row_errors_without_aborting(db_path, make_user):
+    make_user("existing")
+    rows = [
+        (1, row("good")),
+        (2, row("", name="Nobody")),
+        (3, row("bad_slider", math_eq="11")),
+        (4, row("existing")),
+        (5, row("good")),
+        (6, {"username": "bare"}),
+    ]
+
+    report = import_rows(rows)
+
+    errors = {(number, message.split(" ")[0]) for number, _, message in report.errors}
+    assert {number for number, _ in errors} == {2, 3, 4, 5}
+    assert report.users_created == 2  # good, bare
+    assert report.knowledge_profiles == report.learner_profiles == 1
+    assert load_full_user_context("bare").knowledge_profile is None
+    assert load_full_user_context("bad_slider") is None
+
+
+@pytest.mark.parametrize("extension", ["csv", "jsonl"])
+def test_export_import_round_trip(db_path, make_user, tmp_path, extension):
+    make_user("estefania")
+    make_user("maxyo", with_profiles=False)
+    path = str(tmp_path / f"export.{extension}")
+
+    assert export_file(path) == 2
+    if extension == "jsonl":
+        with open(path) as f:
+            first = json.loads(f.readline())
+        assert first["support_needs"] == ["Mathematics"]
+
+    clear_db_data()
+    report = import_file(path)
+
+    assert report.errors == []
+    assert report.users_created == 2
+    context = load_full_user_context("estefania")
+    assert context.knowledge_profile.programming_comfort == 6
+    assert context.learner_profile.adaptability == "No"
+    assert load_full_user_context("maxyo").learner_profile is None
+
+
+def test_malformed_jsonl_lines_are_reported(db_path, tmp_path):
+    path = tmp_path / "learners.jsonl"
+    lines = [json.dumps(row("first")), "{not json", json.dumps(["a", "list"]), json.dumps(row("last"))]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    report = import_file(str(path), chunk_size=10)
+
+    assert [number for number, _, _ in report.errors] == [2, 3]
+    assert report.rows == 4
+    assert report.users_created == 2
+
+
+def test_support_needs_that_are_not_strings_are_reported(db_path, tmp_path):
+    path = tmp_path / "learners.jsonl"
+    lines = [
+        json.dumps(row("null_need", support_needs=[None])),
+        json.dumps(row("object_need", support_needs=[{"x": 1}])),
+        json.dumps(row("valid", support_needs=["Mathematics"])),
+    ]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    report = import_file(str(path), chunk_size=10)
+
+    assert [(number, username) for number, username, _ in report.errors] == [(1, "null_need"), (2, "object_need")]
+    assert load_full_user_context("valid").knowledge_profile.support_needs == ["Mathematics"]
+
+
+def test_chunks_larger_than_the_in_list_cap(db_path, monkeypatch):
+    monkeypatch.setattr(db.bulk, "MAX_USERNAMES_PER_QUERY", 4)
+    rows = [(i + 1, row(f"learner{i}")) for i in range(10)]
+
+    report = import_rows(rows + [(11, row("learner3"))], chunk_size=20)
+
+    assert report.users_created == 10
+    assert report.knowledge_profiles == 10
+    assert [number for number, _, _ in report.errors] == [11, 11]
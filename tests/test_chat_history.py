@@ -0,0 +1,64 @@
+from llm.chat_history import ChatHistory, count_tokens
+
+
+def build_history(turns, budget):
+    history = ChatHistory(token_budget=budget, summary_budget=40)
+    history.append({"role": "system", "content": "You are a tutor."})
+    for i in range(turns):
+        history.append({"role": "user", "content": f"question number {i} about the project"})
+        history.append({"role": "assistant", "content": f"answer number {i} with some detail"})
+
+    return history
+
+
+def test_small_history_is_sent_whole():
+    history = build_history(turns=2, budget=1000)
+
+    assert history.window() == list(history)
+    assert history.metrics()["compactions"] == 0
+
+
+def test_window_stays_under_budget_and_keeps_latest_turns():
+    history = build_history(turns=50, budget=120)
+    history.append({"role": "user", "content": "latest question"})
+
+    window = history.window()
+    window_tokens = sum(count_tokens(m["content"]) for m in window)
+
+    assert window[0] == {"role": "system", "content": "You are a tutor."}
+    assert window[1]["role"] == "system" and window[1]["content"].startswith("Summary")
+    assert window[-1] == {"role": "user", "content": "latest question"}
+    assert window_tokens <= 120 + 10  # summary header is not budgeted
+    assert len(history) == 102  # the full transcript is kept
+
+
+def test_rolling_summary_keeps_most_recent_folded_turns():
+    history = build_history(turns=50, budget=120)
+    history.window()
+
+    assert "number 0 " not in history.summary
+    assert history.summary.splitlines()[-1].startswith("- Assistant: answer number")
+
+
+def test_metrics_track_savings():
+    history = build_history(turns=50, budget=120)
+    history.window()
+    history.window()
+
+    metrics = history.metrics()
+    assert metrics["tokens_saved"] > metrics["tokens_sent"]
+    assert metrics["compactions"] == 1
+
+
+def test_popping_a_folded_turn_refolds_the_summary():
+    history = build_history(turns=50, budget=120)
+    history.window()
+    folded = history.metrics()["folded_messages"]
+    last_folded = history[folded]["content"]  # index 0 is the system prompt
+    assert last_folded in history.summary
+
+    history.pop(folded)
+    history.window()
+
+    assert last_folded not in history.summary
+    assert history.metrics()["folded_messages"] <= len(history) - 1
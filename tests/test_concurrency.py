@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+
+import gradio as gr
+import pytest
+
+from ui.gradio.concurrency import Busy, ConcurrencyGroup
+
+
+def test_full_line_is_shed_at_once():
+    group = ConcurrencyGroup("test", limit=1, max_waiting=0)
+    group.acquire()
+
+    with pytest.raises(Busy):
+        group.acquire()
+    group.release()
+
+    assert group.stats()["shed"] == 1
+    assert group.stats()["served"] == 1
+
+
+def test_waiting_request_runs_when_a_slot_frees():
+    group = ConcurrencyGroup("test", limit=1, max_waiting=1, max_wait=5)
+    group.acquire()
+
+    waiter = threading.Thread(target=lambda: (group.acquire(), group.release()))
+    waiter.start()
+    while group.stats()["waiting"] == 0:
+        pass
+    time.sleep(0.02)
+    group.release()
+    waiter.join()
+
+    stats = group.stats()
+    assert (stats["served"], stats["shed"], stats["waiting"], stats["running"]) == (2, 0, 0, 0)
+    assert stats["max_wait_ms"] >= 10
+
+
+def test_guarded_handler_answers_busy():
+    group = ConcurrencyGroup("test", limit=1, max_waiting=1, max_wait=0.05)
+    handler = group.guard(lambda username: username)
+    group.acquire()
+
+    with pytest.raises(gr.Error):
+        handler("max")
+    group.release()
+
+    assert handler("max") == "max"
+    assert group.stats()["shed"] == 1
+
+
+def test_guarded_stream():
+    group = ConcurrencyGroup("test", limit=1, max_waiting=0)
+
+    async def stream(message):
+        for token in message.split():
+            yield token
+
+    async def run():
+        handler = group.guard(stream)
+        first = handler("a b")
+        assert await first.__anext__() == "a"
+
+        with pytest.raises(gr.Error):
+            await handler("c").__anext__()
+
+        assert [token async for token in first] == ["b"]
+        assert [token async for token in handler("c d")] == ["c", "d"]
+
+    asyncio.run(run())
+    assert group.stats()["served"] == 2
+    assert group.stats()["shed"] == 1
+
+
+def test_cancelled_waiter_leaves_the_line():
+    group = ConcurrencyGroup("test", limit=1, max_waiting=1, max_wait=5)
+
+    async def run():
+        await group.acquire_async()
+        waiter = asyncio.create_task(group.acquire_async())
+        await asyncio.sleep(0.02)
+        assert group.stats()["waiting"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert group.stats()["waiting"] == 0
+
+        # The line has room again: the next waiter gets the slot once it is released
+        next_waiter = asyncio.create_task(group.acquire_async())
+        await asyncio.sleep(0.02)
+        group.release_async()
+        await next_waiter
+        group.release_async()
+
+    asyncio.run(run())
+
+    assert group.stats()["shed"] == 0
+    assert group.stats()["running"] == 0
+
+
+def test_group_events_are_not_limited_by_gradio():
+    # Requests held in Gradio's own (unbounded) queue would never reach the group to be shed
+    from ui.gradio import chat, user_account
+
+    guarded = {"_submit_fn", "create_agent", "Usubmit_form"}
+    events = [fn for page in (chat, user_account) for fn in page.demo.fns.values() if fn.name in guarded]
+
+    assert {fn.name for fn in events} == guarded
+    assert all(fn.concurrency_limit is None for fn in events)
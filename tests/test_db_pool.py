@@ -0,0 +1,84 @@
+import sqlite3 as sql
+import threading
+
+import pytest
+
+from db.connection_pool import ConnectionPool, get_connection, get_pool
+from db.db_table_management import create_user, get_all_users, get_user_id_by_username
+
+
+def test_pool_uses_wal_and_pragmas(db_path):
+    with get_connection() as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -8000
+
+
+def test_nested_calls_share_connection_and_transaction(db_path):
+    with get_connection() as outer:
+        create_user("estefania")
+        with get_connection() as inner:
+            assert inner is outer
+        assert get_user_id_by_username("estefania") is not None
+
+    assert len(get_all_users()) == 1
+
+
+def test_error_rolls_back_outermost_block(db_path):
+    with pytest.raises(sql.IntegrityError):
+        with get_connection():
+            create_user("maxyo")
+            create_user("maxyo")
+
+    assert get_user_id_by_username("maxyo") is None
+
+
+def test_connections_are_reused(db_path):
+    with get_connection() as first:
+        pass
+    with get_connection() as second:
+        pass
+
+    assert first is second
+
+
+def test_pool_size_bounds_concurrent_connections(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "bounded.db"), size=1, timeout=0.1)
+    acquired = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        with pool.connection():
+            acquired.set()
+            release.wait()
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    acquired.wait()
+
+    with pytest.raises(TimeoutError):
+        with pool.connection():
+            pass
+
+    release.set()
+    worker.join()
+    pool.close()
+
+
+def test_threads_get_distinct_connections(db_path):
+    seen = []
+
+    def work():
+        with get_connection() as conn:
+            seen.append(id(conn))
+            barrier.wait()
+
+    barrier = threading.Barrier(3)
+    threads = [threading.Thread(target=work) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(seen)) == 3
+    assert get_pool().size >= 3
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("networkx")
+matplotlib = pytest.importorskip("matplotlib")
+matplotlib.use("Agg")
+
+from db.connection_pool import close_all_pools, get_connection
+from db.projects import DESKTOP_PROJECT, get_project_registry
+from llm.graphvisualization import create_graph, load_layout
+
+
+@pytest.fixture
+def project_path(tmp_path):
+    path = get_project_registry().open(str(tmp_path / "projet.db"), DESKTOP_PROJECT)
+    yield path
+    close_all_pools()
+
+
+def make_profiles(count, start=0):
+    fields = ["Chimie", "Physique", "Biologie"]
+    return [
+        (i, {"name": f"P{i}", "main_field": fields[i % len(fields)], "prereq_level": (i % 10) / 10})
+        for i in range(start, start + count)
+    ]
+
+
+def test_layout_is_persisted_and_reused(project_path):
+    profiles = make_profiles(12)
+
+    create_graph(profiles, db_path=project_path)
+    first = load_layout(project_path)
+    create_graph(profiles, db_path=project_path)
+
+    assert load_layout(project_path) == first
+    assert first["Projet"] == (0.0, 0.0)
+    assert len(first) == 1 + 3 + 12
+    assert all(-1.0 <= c <= 1.0 for x, y in first.values() for c in (x, y))
+
+
+def test_new_profiles_are_placed_without_moving_existing_ones(project_path):
+    create_graph(make_profiles(12), db_path=project_path)
+    before = load_layout(project_path)
+
+    create_graph(make_profiles(12) + make_profiles(3, start=100), db_path=project_path)
+    after = load_layout(project_path)
+
+    assert {k: after[k] for k in before} == before
+    assert {"profil:100", "profil:101", "profil:102"} <= set(after)
+
+
+def test_removed_profiles_are_dropped_from_the_cache(project_path):
+    create_graph(make_profiles(12), db_path=project_path)
+    create_graph(make_profiles(6), db_path=project_path)
+
+    assert "profil:11" not in load_layout(project_path)
+
+
+def test_layout_table_belongs_to_desktop_projects_only(db_path, project_path):
+    def tables(path):
+        with get_connection(path) as conn:
+            return {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    assert "graph_layout" in tables(project_path)
+    assert "graph_layout" not in tables(db_path)
@@ -0,0 +1,46 @@
+from db.db_table_management import (
+    get_knowledge_profiles_page, get_users_page, iter_knowledge_profiles, iter_learner_profiles, iter_user_contexts,
+    iter_users
+)
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+
+
+def test_users_keyset_pages(make_user):
+    for i in range(5):
+        make_user(f"user{i}", with_profiles=False)
+
+    first = get_users_page(limit=2)
+    second = get_users_page(after_user_id=first[-1][0], limit=2)
+    last = get_users_page(after_user_id=second[-1][0], limit=2)
+
+    assert [name for _, name in first + second + last] == [f"user{i}" for i in range(5)]
+    assert len(last) == 1
+
+
+def test_iterators_yield_typed_profiles_lazily(make_user):
+    for i in range(7):
+        make_user(f"user{i}", with_profiles=i % 2 == 0)
+
+    users = iter_users(page_size=3)
+    assert next(users)[1] == "user0"
+    assert len(list(users)) == 6
+
+    knowledge = list(iter_knowledge_profiles(page_size=2))
+    assert [username for _, username, _ in knowledge] == ["user0", "user2", "user4", "user6"]
+    assert all(isinstance(kp, KnowledgeProfile) for _, _, kp in knowledge)
+    assert knowledge[1][2].name == "User2"
+
+    learner = list(iter_learner_profiles(page_size=4))
+    assert len(learner) == 4
+    assert isinstance(learner[0][2], LearnerProfile)
+
+    contexts = list(iter_user_contexts(page_size=2))
+    assert len(contexts) == 7
+    assert contexts[1].knowledge_profile is None
+    assert contexts[2].learner_profile.tone == "Casual"
+
+
+def test_empty_page(db_path):
+    assert get_knowledge_profiles_page() == []
+    assert list(iter_users()) == []
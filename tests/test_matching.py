@@ -0,0 +1,91 @@
+import numpy as np
+
+from db.db_table_management import create_knowledge_profile, create_learner_profile, create_user
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+from profiles.matching import MatchingIndex, get_matching_index
+from profiles.profile_table import ProfileTable
+
+
+def profiles(level, tone="Casual", needs=("Mathematics",)):
+    knowledge = KnowledgeProfile(math_eq=level, programming_comfort=level, confidence_asking=level,
+                                 support_needs=list(needs))
+    learner = LearnerProfile(goal_understanding=level, precision_level=level, analogies=level, conciseness=level,
+                             learning_mode=level, tone=tone, explanation_style="Examples")
+    return knowledge, learner
+
+
+def build_index():
+    index = MatchingIndex(ProfileTable())
+    for i, (level, tone) in enumerate([(1, "Casual"), (2, "Casual"), (9, "Formal"), (10, "Formal"), (8, "Formal")]):
+        index.add(i + 1, f"user{i}", *profiles(level, tone))
+
+    return index
+
+
+def test_features_are_unit_vectors():
+    index = build_index()
+
+    assert index.features.shape[0] == 5
+    assert np.allclose(np.linalg.norm(index.features, axis=1), 1.0)
+
+
+def test_similar_learners():
+    index = build_index()
+
+    similar = index.similar("user0", k=2)
+
+    assert [name for name, _ in similar] == ["user1", "user4"]
+    assert similar[0][1] > similar[1][1]
+    assert "user0" not in dict(index.similar("user0", k=10))
+    assert set(index.similar_batch(["user2", "ghost"], k=1)) == {"user2"}
+
+
+def test_cluster_separates_groups():
+    labels, clusters = build_index().cluster(n_clusters=2)
+
+    assert labels[0] == labels[1]
+    assert labels[2] == labels[3] == labels[4]
+    assert labels[0] != labels[2]
+    assert sorted(c["size"] for c in clusters) == [2, 3]
+
+
+def test_pair_mentors_respects_capacity():
+    index = build_index()
+
+    pairs = index.pair_mentors(["user2", "user3"], ["user0", "user1", "user4"], capacity=2)
+
+    assert sorted(mentee for _, mentee, _ in pairs) == ["user0", "user1", "user4"]
+    mentors = [mentor for mentor, _, _ in pairs]
+    assert max(mentors.count("user2"), mentors.count("user3")) == 2
+    assert index.pair_mentors(["user2"], ["user0", "user1"], capacity=1)[0][0] == "user2"
+    assert len(index.pair_mentors(["user2"], ["user0", "user1"], capacity=1)) == 1
+
+
+def test_index_follows_new_signups(make_user):
+    make_user("estefania")
+    index = get_matching_index()
+    assert len(index) == 1
+
+    # Profiles created through the API are added by the change listener, bulk inserts by sync()
+    create_user("maxyo")
+    create_knowledge_profile("maxyo", profiles(3)[0])
+    create_learner_profile("maxyo", profiles(3)[1])
+    assert "maxyo" in index
+
+    make_user("ana")
+    assert get_matching_index() is index
+    assert len(index) == 3
+
+
+def test_sync_adds_users_once_their_profiles_exist(make_user):
+    index = MatchingIndex(ProfileTable())
+    make_user("estefania", with_profiles=False)
+    assert index.sync() == 0
+
+    create_knowledge_profile("estefania", profiles(3)[0])
+    create_learner_profile("estefania", profiles(3)[1])
+
+    assert index.sync() == 1
+    assert "estefania" in index
+    assert index.sync() == 0
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from instrumentation import metrics
+
+
+def test_histogram_quantiles():
+    histogram = metrics.Histogram((), buckets=(0.1, 1.0))
+    for value in [0.05] * 90 + [0.5] * 10:
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert snapshot["p50"] <= 0.1 < snapshot["p99"] <= 1.0
+
+
+def test_timed_functions_and_streams():
+    @metrics.timed("test_timed_seconds", label="fn")
+    def add(a, b):
+        return a + b
+
+    @metrics.timed("test_timed_seconds", label="fn")
+    async def tokens():
+        yield "a"
+        yield "b"
+
+    async def consume():
+        return [token async for token in tokens()]
+
+    assert add(1, 2) == 3
+    assert asyncio.run(consume()) == ["a", "b"]
+
+    series = {s["labels"]["fn"]: s["count"] for s in metrics.snapshot()["test_timed_seconds"]["series"]}
+    assert series == {"add": 1, "tokens": 1}
+
+
+def test_prometheus_and_json_export(tmp_path):
+    metrics.counter("test_export_total", "Test counter", kind='a"b').inc(2)
+    with metrics.timer("test_export_seconds", "Test timer"):
+        pass
+
+    text = metrics.prometheus_text()
+    assert '# TYPE test_export_total counter\ntest_export_total{kind="a\\"b"} 2' in text
+    assert 'test_export_seconds_bucket{le="+Inf"} 1' in text
+    assert "test_export_seconds_count 1" in text
+
+    metrics.write(str(tmp_path / "metrics.json"))
+    with open(tmp_path / "metrics.json") as f:
+        assert json.load(f)["test_export_total"]["series"][0]["value"] == 2
+
+
+def test_disabled_metrics_leave_functions_untouched(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+
+    def fn():
+        return 1
+
+    assert metrics.timed("test_disabled_seconds")(fn) is fn
+    metrics.counter("test_disabled_total").inc()
+    assert "test_disabled_total" not in metrics.snapshot()
+
+
+def test_db_queries_are_timed(make_user):
+    from db.db_table_management import get_user_by_username
+
+    make_user("max")
+    get_user_by_username("max")
+
+    series = metrics.snapshot()["mindmesh_db_query_seconds"]["series"]
+    assert any(s["labels"]["query"] == "get_user_by_username" and s["count"] >= 1 for s in series)
+
+
+def test_failed_streams_are_not_counted_as_llm_replies(make_user):
+    pytest.importorskip("huggingface_hub")
+    import llm.agent
+    import llm.scheduler
+    from llm.agent import Agent
+    from llm.stub_server import StubInferenceServer
+
+    make_user("max")
+    llm_replies, errors = llm.agent.replies["llm"].value, llm.agent.unfinished_replies["error"].value
+
+    async def ask(agent):
+        return [token async for token in agent.stream_message("Hello?")]
+
+    with StubInferenceServer(fail_first=100) as server:
+        agent = Agent("max", base_url=server.base_url + "/v1")
+        agent.scheduler = llm.scheduler.InferenceScheduler(max_retries=0)
+        agent.system_prompt()
+        with pytest.raises(Exception):
+            asyncio.run(ask(agent))
+        agent.scheduler.close()
+
+    assert llm.agent.replies["llm"].value == llm_replies
+    assert llm.agent.unfinished_replies["error"].value == errors + 1
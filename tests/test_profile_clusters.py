@@ -0,0 +1,63 @@
+import json
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from llm.profile_clusters import build_cluster_map, cluster_map_svg, export_cluster_map, load_cluster_map
+
+
+PROFILES = [
+    (1, {"name": "Max", "main_field": "Chimie", "prereq_level": 0.69}),
+    (2, {"name": "Ramzi", "main_field": "Chimie", "prereq_level": 0.74}),
+    (3, {"name": "Audrey", "main_field": "Chimie", "prereq_level": 0.9}),
+    (4, {"name": "Léa", "main_field": "Physique", "prereq_level": 0.1}),
+    (5, {"name": "Sans domaine", "main_field": "", "prereq_level": 0.5}),
+]
+
+
+def test_profiles_are_aggregated_per_domain():
+    cluster_map = build_cluster_map(PROFILES, "Projet IC")
+    clusters = {c["domain"]: c for c in cluster_map["clusters"]}
+
+    assert set(clusters) == {"Autre", "Chimie", "Physique"}
+    assert clusters["Chimie"]["count"] == 3
+    assert clusters["Chimie"]["mean_prereq"] == pytest.approx((0.69 + 0.74 + 0.9) / 3)
+    assert sum(clusters["Chimie"]["histogram"]) == 3
+    assert clusters["Chimie"]["histogram"][9] == 1
+    assert clusters["Chimie"]["radius"] > clusters["Physique"]["radius"]
+
+
+def test_points_stay_inside_their_cluster():
+    cluster_map = build_cluster_map(PROFILES)
+    points = cluster_map["points"]
+
+    for x, y, index in zip(points["x"], points["y"], points["cluster"]):
+        cluster = cluster_map["clusters"][index]
+        assert (x - cluster["x"]) ** 2 + (y - cluster["y"]) ** 2 <= cluster["radius"] ** 2 + 1e-6
+
+
+def test_exports_round_trip(tmp_path):
+    cluster_map = build_cluster_map(PROFILES, "Projet IC")
+
+    export_cluster_map(cluster_map, str(tmp_path / "map.json"))
+    export_cluster_map(cluster_map, str(tmp_path / "map.svg"))
+
+    assert load_cluster_map(str(tmp_path / "map.json")) == json.loads(json.dumps(cluster_map))
+    svg = (tmp_path / "map.svg").read_text(encoding="utf-8")
+    assert svg.startswith("<svg") and "Léa (0.10)" in svg
+    assert svg == cluster_map_svg(cluster_map)
+
+    with pytest.raises(ValueError):
+        export_cluster_map(cluster_map, str(tmp_path / "map.png"))
+
+
+def test_large_projects_switch_to_the_scalable_view():
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    from llm.graphvisualization import create_graph
+
+    profiles = [(i, {"name": f"P{i}", "main_field": "Chimie", "prereq_level": 0.5}) for i in range(1000)]
+    fig = create_graph(profiles)
+
+    assert len(fig.axes[0].collections) == 1  # every profile in a single scatter
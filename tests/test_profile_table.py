@@ -0,0 +1,83 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+from profiles.profile_table import NUMERIC_FIELDS, ProfileTable
+from profiles.user_context import UserContext
+
+
+def profiles(i):
+    knowledge = KnowledgeProfile(name=f"user{i}", math_eq=i % 11, programming_comfort=3, confidence_asking=5,
+                                 support_needs=["Mathematics"] if i % 2 else ["Statistics", "Programming"])
+    learner = LearnerProfile(goal_understanding=7, precision_level=i % 3, tone="Casual" if i % 4 else "Formal",
+                             explanation_style="Examples", learning_mode=10)
+    return knowledge, learner
+
+
+def test_profiles_are_slotted_and_freezable():
+    knowledge, learner = profiles(1)
+
+    assert not hasattr(knowledge, "__dict__")
+    assert not hasattr(learner, "__dict__")
+
+    frozen = knowledge.freeze()
+    assert frozen.support_needs == ("Mathematics",)
+    assert hash(frozen) == hash(knowledge.freeze())
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        frozen.math_eq = 3
+    assert learner.freeze().tone == "Casual"
+
+
+def test_table_columns_and_statistics():
+    table = ProfileTable(capacity=2)
+    for i in range(10):
+        table.append(i + 1, f"user{i}", *profiles(i))
+
+    assert len(table) == 10
+    assert table.numeric.shape == (10, len(NUMERIC_FIELDS))
+    assert table.column("math_eq").tolist() == list(range(10))
+
+    stats = table.describe()
+    assert stats["math_eq"]["mean"] == pytest.approx(4.5)
+    assert stats["learning_mode"] == {"mean": 10.0, "std": 0.0, "min": 10, "max": 10}
+
+    assert table.value_counts("tone") == {"Formal": 3, "Casual": 7}
+    assert table.support_need_counts() == {"Statistics": 5, "Programming": 5, "Mathematics": 5}
+
+    formal = table.mask("tone", "Formal")
+    assert table.describe(formal)["math_eq"]["mean"] == pytest.approx(4.0)
+    assert table.histogram("precision_level", formal).tolist()[:3] == [1, 1, 1]
+    assert not table.mask("tone", "Unknown").any()
+
+
+def test_append_overwrites_existing_user():
+    table = ProfileTable()
+    table.append(1, "estefania", *profiles(1))
+    knowledge, learner = profiles(2)
+    table.append(1, "estefania", knowledge, learner)
+
+    assert len(table) == 1
+    assert table.column("math_eq").tolist() == [2]
+    assert table.support_need_counts() == {"Mathematics": 0, "Statistics": 1, "Programming": 1}
+
+
+def test_from_database(make_user):
+    make_user("estefania")
+    make_user("maxyo", with_profiles=False)
+
+    table = ProfileTable.from_database()
+
+    assert table.usernames == ["estefania"]
+    assert table.column("programming_comfort").tolist() == [6]
+
+
+def test_large_cohort_is_compact():
+    contexts = (UserContext(i, f"user{i}", *profiles(i)) for i in range(100_000))
+    table = ProfileTable.from_contexts(contexts, capacity=100_000)
+
+    assert len(table) == 100_000
+    assert table.nbytes < 5 * 1024 * 1024
+    assert np.isclose(table.describe()["math_eq"]["mean"], (np.arange(100_000) % 11).mean())
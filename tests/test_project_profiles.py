@@ -0,0 +1,62 @@
+import os
+import shutil
+
+from db.connection_pool import close_all_pools, get_connection
+from db.project_profiles import load_profiles, save_profile
+from db.projects import open_project_profiles
+
+
+def profile(name, main_field="Chimie"):
+    return {"name": name, "prereq_level": 0.5, "main_field": main_field}
+
+
+def test_model_loads_once_and_appends_saved_profiles(tmp_path):
+    profiles = open_project_profiles(str(tmp_path / "projet.db"))
+    rid = profiles.add(profile("Max"))
+
+    assert profiles.refresh() is False
+    assert profiles.reloads == 1
+    assert profiles[0] == (rid, profile("Max"))
+    profiles.close()
+
+
+def test_model_reloads_after_external_write(tmp_path):
+    path = str(tmp_path / "projet.db")
+    profiles = open_project_profiles(path)
+    profiles.add(profile("Max"))
+
+    save_profile(profile("Ada", "Physique"), path)
+
+    assert profiles.refresh() is True
+    assert [prof["name"] for _, prof in profiles.profiles] == ["Max", "Ada"]
+    assert profiles.refresh() is False
+    profiles.close()
+    close_all_pools()
+
+
+def test_model_ignores_writes_to_other_tables(tmp_path):
+    path = str(tmp_path / "projet.db")
+    profiles = open_project_profiles(path)
+    profiles.add(profile("Max"))
+
+    # What graphvisualization.save_layout does when the map is drawn
+    with get_connection(path) as conn:
+        conn.execute("INSERT INTO graph_layout (node_key, x, y) VALUES ('Projet', 0, 0)")
+
+    assert profiles.refresh() is False
+    assert profiles.reloads == 1
+    profiles.close()
+    close_all_pools()
+
+
+def test_reads_existing_project_file(tmp_path):
+    path = str(tmp_path / "Projet IC.db")
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "llm", "Projet IC.db"), path)
+
+    rid, prof = load_profiles(path)[0]
+    profiles = open_project_profiles(path)
+
+    assert prof["name"] == "Max"
+    assert profiles[0] == (rid, prof)
+    profiles.close()
+    close_all_pools()
@@ -0,0 +1,76 @@
+import pytest
+
+from db import connection_pool, constants
+from db.connection_pool import close_all_pools, get_connection, get_pool
+from db.db_management import MIGRATIONS, get_schema_version
+from db.projects import DESKTOP_PROJECT, WEB_PROJECT, ProjectRegistry
+
+
+@pytest.fixture
+def registry():
+    yield ProjectRegistry()
+    close_all_pools()
+
+
+def test_schema_is_initialized_once_per_file(tmp_path, registry):
+    path = registry.open(str(tmp_path / "a.db"))
+    assert registry.migrations_applied == len(MIGRATIONS)
+
+    registry.open(path)
+    with registry.connection(path) as conn:
+        assert get_schema_version(conn) == MIGRATIONS[-1][0]
+    assert registry.migrations_applied == len(MIGRATIONS)
+    assert registry.stats()["projects"] == 1
+
+
+def test_project_kind_cannot_change(tmp_path, registry):
+    path = registry.open(str(tmp_path / "projet.db"), DESKTOP_PROJECT)
+    with get_connection(path) as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert "users" not in tables and "learner_profiles" in tables
+
+    with pytest.raises(ValueError):
+        registry.open(path, WEB_PROJECT)
+
+
+def test_least_recently_used_pools_are_closed(tmp_path, registry, monkeypatch):
+    monkeypatch.setattr(constants, "DB_MAX_OPEN_PROJECTS", 2)
+    paths = [registry.open(str(tmp_path / f"{i}.db"), DESKTOP_PROJECT) for i in range(3)]
+
+    assert list(connection_pool._pools) == paths[1:]
+    assert registry.stats()["open"] == 2
+
+    # Reopening a closed project only needs a new pool, not its schema again
+    applied = registry.migrations_applied
+    registry.open(paths[0], DESKTOP_PROJECT)
+    with registry.connection(paths[0], DESKTOP_PROJECT):
+        pass
+    assert registry.migrations_applied == applied
+
+
+def test_pool_in_use_is_not_closed(tmp_path, registry, monkeypatch):
+    monkeypatch.setattr(constants, "DB_MAX_OPEN_PROJECTS", 1)
+    first, second = (registry.open(str(tmp_path / f"{i}.db"), DESKTOP_PROJECT) for i in range(2))
+
+    with get_connection(first) as conn:
+        get_pool(second)
+        assert first in connection_pool._pools
+        conn.execute("SELECT 1")
+
+    get_pool(second)
+    assert list(connection_pool._pools) == [second]
+
+
+def test_pool_is_not_closed_between_lookup_and_borrow(tmp_path, registry, monkeypatch):
+    monkeypatch.setattr(constants, "DB_MAX_OPEN_PROJECTS", 1)
+    first, second = (registry.open(str(tmp_path / f"{i}.db"), DESKTOP_PROJECT) for i in range(2))
+    borrow = connection_pool.ConnectionPool.connection
+
+    def open_other_project_first(pool):
+        # Another thread opens a project right after get_connection found this pool
+        get_pool(second if pool.db_path == first else first)
+        return borrow(pool)
+
+    monkeypatch.setattr(connection_pool.ConnectionPool, "connection", open_other_project_first)
+    with get_connection(first) as conn:
+        conn.execute("SELECT 1")
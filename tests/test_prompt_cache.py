@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("huggingface_hub")
+
+from db.connection_pool import get_connection
+from db.db_table_management import notify_profile_change
+from llm.agent import Agent
+from llm.prompt_cache import PromptCache, get_prompt_cache
+
+
+def test_warm_agent_start_skips_rendering(make_user, monkeypatch):
+    make_user("estefania")
+    cold = Agent("estefania", base_url="http://127.0.0.1:9/v1")
+    cold.system_prompt()
+
+    def fail(self):
+        raise AssertionError("the prompt should not be rendered again on a warm start")
+
+    monkeypatch.setattr(Agent, "build_knowledge_profile_description", fail)
+    warm = Agent("estefania", base_url="http://127.0.0.1:9/v1")
+    warm.system_prompt()
+    warm.delete_chat_history()
+
+    assert warm.chat_history[0] == cold.chat_history[0]
+    assert "Estefania" in warm.chat_history[0]["content"]
+
+
+def test_profile_change_invalidates_prompt(make_user):
+    make_user("estefania")
+    agent = Agent("estefania", base_url="http://127.0.0.1:9/v1")
+    agent.system_prompt()
+    assert get_prompt_cache().get("estefania", agent._revision) is not None
+
+    notify_profile_change("estefania")
+
+    assert get_prompt_cache().get("estefania", agent._revision) is None
+
+
+def test_prompt_for_an_older_revision_is_a_miss(make_user):
+    make_user("estefania")
+    Agent("estefania", base_url="http://127.0.0.1:9/v1").system_prompt()
+
+    # Written behind the cache's back: no change listener runs
+    with get_connection() as conn:
+        conn.execute("UPDATE knowledge_profiles SET background = 'Astronomy'")
+
+    agent = Agent("estefania", base_url="http://127.0.0.1:9/v1")
+    agent.system_prompt()
+
+    assert "Astronomy" in agent.chat_history[0]["content"]
+
+
+def test_invalidation_is_shared_across_processes(tmp_path):
+    path = str(tmp_path / "shared.prompts.db")
+    writer, reader = PromptCache(path), PromptCache(path)
+
+    writer.put("maxyo", "rev-1", "prompt v1")
+    assert reader.get("maxyo", "rev-1") == "prompt v1"
+    assert reader.get("maxyo", "rev-2") is None
+
+    writer.invalidate("maxyo")
+    assert reader.get("maxyo", "rev-1") is None
+
+    writer.close()
+    reader.close()
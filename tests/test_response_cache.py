@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from llm.response_cache import ResponseCache, get_response_cache, normalize_question, prompt_fingerprint
+from db.db_table_management import create_knowledge_profile, create_learner_profile, create_user
+from profiles.knowledge_profile import KnowledgeProfile
+from profiles.learner_profile import LearnerProfile
+
+
+def test_normalize_question():
+    assert normalize_question("  What's the PROBLEMATIC?? ") == "what s the problematic"
+
+
+def test_fingerprint_depends_on_prompt_and_model():
+    assert prompt_fingerprint("You help Estefania.", "m") == prompt_fingerprint("You help Estefania.", "m")
+    assert prompt_fingerprint("You help Estefania.", "m") != prompt_fingerprint("You help Maxyo.", "m")
+    assert prompt_fingerprint("You help Estefania.", "m") != prompt_fingerprint("You help Estefania.", "other")
+
+
+def test_exact_hit_ignores_case_and_punctuation():
+    cache = ResponseCache()
+    cache.put("fp", "What is the project's problematic?", "It is about X.")
+
+    assert cache.get("fp", "what is the project's problematic") == "It is about X."
+    assert cache.get("other-fp", "What is the project's problematic?") is None
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_similar_question_hits_semantic_index():
+    pytest.importorskip("numpy")
+    cache = ResponseCache(similarity_threshold=0.75)
+    cache.put("fp", "What are the main goals of the project?", "The goals are...")
+
+    assert cache.get("fp", "what are the main goals of this project") == "The goals are..."
+    assert cache.get("fp", "How do I install Python?") is None
+    assert cache.stats()["similar_hits"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put("fp", "first question", "1")
+    cache.put("fp", "second question", "2")
+    cache.get("fp", "first question")
+    cache.put("fp", "third question", "3")
+
+    assert len(cache) == 2
+    assert cache.get("fp", "second question") is None
+    assert cache.get("fp", "third question") == "3"
+
+
+def test_sessions_of_a_learner_share_opening_answers(make_user):
+    pytest.importorskip("huggingface_hub")
+    from llm.agent import Agent
+    from llm.stub_server import StubInferenceServer
+
+    make_user("estefania")
+
+    with StubInferenceServer(chunks=["The project", " studies learning."]) as server:
+        first = Agent("estefania", base_url=server.base_url + "/v1")
+        first.system_prompt()
+        assert first.send_message("What is the problematic?") == "The project studies learning."
+
+        second = Agent("estefania", base_url=server.base_url + "/v1")
+        second.system_prompt()
+
+        async def ask():
+            return [token async for token in second.stream_message("what is the problematic")]
+
+        assert asyncio.run(ask()) == ["The project studies learning."]
+
+        # Follow-up questions always go to the model
+        second.send_message("Tell me more")
+
+    assert len(server.requests) == 2
+
+
+def test_learners_with_different_projects_do_not_share_answers(db_path):
+    pytest.importorskip("huggingface_hub")
+    from llm.agent import Agent
+    from llm.stub_server import StubInferenceServer
+
+    for username, problematic in (("estefania", "Protein folding"), ("maxyo", "Graph layouts")):
+        create_user(username)
+        create_knowledge_profile(username, KnowledgeProfile(name="Alex", support_needs=["Mathematics"]))
+        create_learner_profile(username, LearnerProfile(problematic=problematic, tone="Casual"))
+
+    with StubInferenceServer(chunks=["Your project is about protein folding."]) as server:
+        for username in ("estefania", "maxyo"):
+            agent = Agent(username, base_url=server.base_url + "/v1")
+            agent.system_prompt()
+            agent.send_message("What is the problematic?")
+
+    assert len(server.requests) == 2
+
+
+def test_each_project_database_has_its_own_cache(tmp_path):
+    first = get_response_cache(str(tmp_path / "first.db"))
+    first.put("fp", "What is the problematic?", "First project's answer.")
+
+    assert get_response_cache(str(tmp_path / "first.db")) is first
+    assert get_response_cache(str(tmp_path / "second.db")).get("fp", "What is the problematic?") is None
@@ -0,0 +1,144 @@
+import asyncio
+import socket
+import threading
+
+import pytest
+
+pytest.importorskip("huggingface_hub")
+
+import httpx
+from llm.backends import LLMBackend
+from llm.scheduler import PRIORITY_HIGH, PRIORITY_LOW, InferenceScheduler
+from llm.stub_server import StubInferenceServer
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+class RecordingBackend(LLMBackend):
+    """Fake backend whose calls block until released, recording the order they started in."""
+
+    def __init__(self):
+        self.started = []
+        self.release = threading.Event()
+
+    async def complete(self, model, messages, **params):
+        self.started.append(messages[0]["content"])
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        return "ok"
+
+
+@pytest.fixture
+def server():
+    with StubInferenceServer(chunks=["a", "b", "c"], delay=0.05) as fake:
+        yield fake
+
+
+def test_concurrency_is_bounded(server):
+    scheduler = InferenceScheduler(max_concurrency=2, per_user_concurrency=4)
+    base_url = server.base_url + "/v1"
+
+    async def burst():
+        return await asyncio.gather(*[
+            scheduler.complete(f"user{i}", [{"role": "user", "content": str(i)}], model="m", base_url=base_url)
+            for i in range(6)
+        ])
+
+    assert asyncio.run(burst()) == ["abc"] * 6
+    assert server.max_active <= 2
+    scheduler.close()
+
+
+def test_identical_requests_are_coalesced(server):
+    scheduler = InferenceScheduler()
+    base_url = server.base_url + "/v1"
+
+    async def burst():
+        return await asyncio.gather(*[
+            scheduler.complete(f"user{i}", MESSAGES, model="m", base_url=base_url) for i in range(5)
+        ])
+
+    assert asyncio.run(burst()) == ["abc"] * 5
+    assert len(server.requests) == 1
+    assert scheduler.stats()["coalesced"] == 4
+    scheduler.close()
+
+
+def test_rate_limited_requests_are_retried():
+    scheduler = InferenceScheduler(base_delay=0.01, max_delay=0.05)
+
+    with StubInferenceServer(chunks=["fine"], fail_first=2) as server:
+        result = scheduler.complete_sync("estefania", MESSAGES, model="m", base_url=server.base_url + "/v1")
+
+    assert result == "fine"
+    assert scheduler.stats()["retries"] == 2
+    scheduler.close()
+
+
+def test_stream_yields_tokens(server):
+    scheduler = InferenceScheduler()
+
+    async def consume():
+        return [t async for t in scheduler.stream("estefania", MESSAGES, model="m", base_url=server.base_url + "/v1")]
+
+    assert asyncio.run(consume()) == ["a", "b", "c"]
+    scheduler.close()
+
+
+def test_queue_serves_priority_then_least_served_user():
+    backend = RecordingBackend()
+    scheduler = InferenceScheduler(max_concurrency=1, per_user_concurrency=1, backend_factory=lambda _: backend)
+
+    async def burst():
+        # "busy" holds the only slot while the others queue up behind it
+        first = asyncio.create_task(scheduler.complete("busy", [{"role": "user", "content": "busy-1"}], model="m"))
+        await asyncio.sleep(0.05)
+        queued = [
+            scheduler.complete("busy", [{"role": "user", "content": "busy-2"}], model="m"),
+            scheduler.complete("quiet", [{"role": "user", "content": "quiet-1"}], model="m"),
+            scheduler.complete("low", [{"role": "user", "content": "low-1"}], model="m", priority=PRIORITY_LOW),
+            scheduler.complete("vip", [{"role": "user", "content": "vip-1"}], model="m", priority=PRIORITY_HIGH),
+        ]
+        tasks = [asyncio.create_task(call) for call in queued]
+        await asyncio.sleep(0.05)
+        backend.release.set()
+        await asyncio.gather(first, *tasks)
+
+    asyncio.run(burst())
+
+    assert backend.started == ["busy-1", "vip-1", "quiet-1", "busy-2", "low-1"]
+    scheduler.close()
+
+
+def test_refused_connections_are_retried():
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    scheduler = InferenceScheduler(max_retries=2, base_delay=0.01, max_delay=0.02)
+
+    with pytest.raises(httpx.TransportError):
+        scheduler.complete_sync("estefania", MESSAGES, model="m", base_url=f"http://127.0.0.1:{port}/v1")
+
+    assert scheduler.stats()["retries"] == 2
+    assert scheduler.stats()["failed"] == 1
+    scheduler.close()
+
+
+def test_served_counts_decay_instead_of_resetting(server):
+    now = [0.0]
+    scheduler = InferenceScheduler(fairness_half_life=10, clock=lambda: now[0])
+    base_url = server.base_url + "/v1"
+
+    # Going idle between messages keeps the user's share
+    for _ in range(3):
+        scheduler.complete_sync("heavy", MESSAGES, model="m", base_url=base_url)
+    assert scheduler._served("heavy", now[0]) == 3
+
+    now[0] = 10
+    assert scheduler._served("heavy", now[0]) == 1.5
+
+    # Long idle users are forgotten on a later release
+    now[0] = 100
+    scheduler.complete_sync("other", MESSAGES, model="m", base_url=base_url)
+    assert set(scheduler._served_by_user) == {"other"}
+    scheduler.close()
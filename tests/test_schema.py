@@ -0,0 +1,115 @@
+import sqlite3 as sql
+
+import pytest
+
+from db.connection_pool import get_connection
+from db.db_management import MIGRATIONS, clear_db, get_schema_version, init_db, migrate
+from db.db_table_management import USER_CONTEXT_QUERY
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def query_plan(query, params=()):
+    with get_connection() as conn:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + query, params).fetchall()
+
+    return [row[-1] for row in rows]
+
+
+def assert_no_full_scan(plan, *tables):
+    for table in tables:
+        assert not any(step.startswith(f"SCAN {table}") for step in plan), plan
+
+
+def test_fresh_database_is_at_latest_version(db_path):
+    with get_connection() as conn:
+        assert get_schema_version(conn) == LATEST_VERSION
+        assert migrate(conn) == []
+
+
+def test_migrates_unversioned_database_in_place(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sql.connect(path)
+    conn.execute("CREATE TABLE users (user_id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL UNIQUE)")
+    conn.execute("INSERT INTO users (username) VALUES ('estefania')")
+    conn.commit()
+
+    applied = migrate(conn)
+    conn.commit()
+
+    assert applied == [version for version, _, _ in MIGRATIONS]
+    assert conn.execute("SELECT username FROM users").fetchall() == [("estefania",)]
+    assert get_schema_version(conn) == LATEST_VERSION
+    conn.close()
+
+
+def test_failed_migration_rolls_back(tmp_path):
+    conn = sql.connect(str(tmp_path / "broken.db"))
+
+    def broken(cur):
+        cur.execute("CREATE TABLE half_done (id INTEGER)")
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        migrate(conn, MIGRATIONS + [(LATEST_VERSION + 1, "Broken", broken)])
+    conn.rollback()
+
+    assert get_schema_version(conn) == 0
+    assert conn.execute("SELECT name FROM sqlite_master WHERE name = 'half_done'").fetchall() == []
+    conn.close()
+
+
+def test_clear_db_resets_version(db_path):
+    clear_db()
+    with get_connection() as conn:
+        assert get_schema_version(conn) == 0
+
+    init_db()
+    with get_connection() as conn:
+        assert get_schema_version(conn) == LATEST_VERSION
+
+
+@pytest.mark.parametrize("query, params, index", [
+    ("SELECT user_id FROM users WHERE username = ?", ("estefania",), "sqlite_autoindex_users_1"),
+    ("SELECT * FROM knowledge_profiles WHERE user_id = ?", (1,), "sqlite_autoindex_knowledge_profiles_1"),
+    ("SELECT * FROM learner_profiles WHERE user_id = ?", (1,), "sqlite_autoindex_learner_profiles_1"),
+    ("SELECT user_id FROM knowledge_profiles WHERE name = ?", ("Estefania",), "idx_knowledge_profiles_name"),
+    ("SELECT user_id FROM knowledge_profiles WHERE background = ?", ("Physics",), "idx_knowledge_profiles_background"),
+])
+def test_lookups_use_indexes(db_path, query, params, index):
+    plan = query_plan(query, params)
+
+    assert any(f"USING INDEX {index}" in step or f"USING COVERING INDEX {index}" in step for step in plan), plan
+
+
+def test_user_context_join_uses_indexes(db_path):
+    plan = query_plan(USER_CONTEXT_QUERY + " WHERE u.username = ?", ("estefania",))
+
+    assert_no_full_scan(plan, "u", "kp", "lp")
+
+
+def test_support_need_lookup_uses_tag_index(db_path):
+    plan = query_plan("""
+        SELECT u.username
+        FROM support_needs t
+        JOIN knowledge_profile_support_needs s ON s.tag_id = t.tag_id
+        JOIN users u ON u.user_id = s.user_id
+        WHERE t.tag = ?
+    """, ("Statistics",))
+
+    assert any("idx_knowledge_profile_support_needs_tag" in step for step in plan), plan
+    assert_no_full_scan(plan, "t", "s", "u")
+
+
+def test_keyset_pages_need_no_sort(db_path):
+    plan = query_plan("""
+        SELECT u.user_id, u.username, kp.*
+        FROM knowledge_profiles kp
+        JOIN users u ON u.user_id = kp.user_id
+        WHERE kp.user_id > ?
+        ORDER BY kp.user_id
+        LIMIT ?
+    """, (0, 100))
+
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert_no_full_scan(plan, "u")
@@ -0,0 +1,31 @@
+import pytest
+
+from benchmarks.import_time import parse_importtime, self_time_by_package
+from ui.gradio.app import ROUTES, served_routes
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     db.constants
+import time:       300 |        420 |   db.connection_pool
+import time:      1000 |       1420 | db.projects
+"""
+
+
+def test_parse_importtime():
+    rows = parse_importtime(IMPORTTIME)
+
+    assert rows[-1] == ("db.projects", 1000, 1420, 0)
+    assert rows[0] == ("db.constants", 120, 120, 2)
+    assert self_time_by_package(rows) == [("db", 1420)]
+
+
+def test_served_routes(monkeypatch):
+    monkeypatch.delenv("MINDMESH_GRADIO_ROUTES", raising=False)
+    assert served_routes() == list(ROUTES)
+
+    monkeypatch.setenv("MINDMESH_GRADIO_ROUTES", "Chat, User")
+    assert served_routes() == ["Chat", "User"]
+
+    monkeypatch.setenv("MINDMESH_GRADIO_ROUTES", "Chat,Nope")
+    with pytest.raises(ValueError):
+        served_routes()
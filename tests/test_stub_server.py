@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("huggingface_hub")
+
+from llm.backends import HuggingFaceBackend, create_backend
+from llm.scheduler import InferenceScheduler
+from llm.stub_server import StubInferenceServer, lorem_tokens
+
+MESSAGES = [{"role": "user", "content": "Hi"}]
+
+
+def test_backend_streams_and_completes():
+    async def call(base_url):
+        backend = HuggingFaceBackend(base_url)
+        try:
+            tokens = [token async for token in backend.stream("m", MESSAGES)]
+            return tokens, await backend.complete("m", MESSAGES)
+        finally:
+            await backend.close()
+
+    with StubInferenceServer(chunks=lorem_tokens(3)) as server:
+        tokens, reply = asyncio.run(call(server.base_url + "/v1"))
+
+    assert tokens == ["the", " learner", " asks"]
+    assert reply == "the learner asks"
+
+
+def test_tokens_are_paced():
+    scheduler = InferenceScheduler()
+
+    async def consume(base_url):
+        return [t async for t in scheduler.stream("ada", MESSAGES, model="m", base_url=base_url)]
+
+    with StubInferenceServer(chunks=lorem_tokens(5), tokens_per_second=50) as server:
+        start = time.perf_counter()
+        assert len(asyncio.run(consume(server.base_url + "/v1"))) == 5
+
+    assert time.perf_counter() - start >= 4 / 50
+    scheduler.close()
+
+
+def test_errors_are_retried_then_raised():
+    scheduler = InferenceScheduler(max_retries=2, base_delay=0.01, max_delay=0.02)
+
+    with StubInferenceServer(error_rate=1.0, seed=0) as server:
+        with pytest.raises(Exception):
+            scheduler.complete_sync("ada", MESSAGES, model="m", base_url=server.base_url + "/v1")
+
+    assert server.errors == 3
+    assert scheduler.stats()["retries"] == 2
+    scheduler.close()
+
+
+def test_backend_from_environment(monkeypatch):
+    monkeypatch.setenv("MINDMESH_LLM_BASE_URL", "http://127.0.0.1:8099/v1")
+    assert create_backend().client.model == "http://127.0.0.1:8099/v1"
+
+    monkeypatch.setenv("MINDMESH_LLM_BACKEND", "nope")
+    with pytest.raises(ValueError):
+        create_backend()
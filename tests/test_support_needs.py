@@ -0,0 +1,60 @@
+import json
+import sqlite3 as sql
+
+from db.db_management import MIGRATIONS, migrate
+from db.db_table_management import (
+    create_knowledge_profile, create_user, get_knowledge_profile_by_username, get_usernames_by_support_need,
+    rank_users_by_support_needs
+)
+from profiles.knowledge_profile import KnowledgeProfile
+
+
+def add_learner(username, support_needs):
+    create_user(username)
+    create_knowledge_profile(username, KnowledgeProfile(name=username, age="20", support_needs=support_needs))
+
+
+def test_support_needs_round_trip(db_path):
+    needs = ["Statistics", "Reading, writing", "Mathematics"]
+    add_learner("estefania", needs)
+
+    assert get_knowledge_profile_by_username("estefania").support_needs == needs
+
+
+def test_find_and_rank_by_support_need(db_path):
+    add_learner("ana", ["Statistics", "Programming"])
+    add_learner("ben", ["Statistics", "Programming", "Mathematics"])
+    add_learner("carl", ["Mathematics"])
+    add_learner("dana", [])
+
+    assert get_usernames_by_support_need("Statistics") == ["ana", "ben"]
+    assert get_usernames_by_support_need("Biology") == []
+
+    assert rank_users_by_support_needs(["Mathematics", "Programming", "Statistics"]) == [
+        ("ben", 3), ("ana", 2), ("carl", 1)
+    ]
+    assert rank_users_by_support_needs(["Mathematics"], limit=1) == [("ben", 1)]
+    assert rank_users_by_support_needs([]) == []
+
+
+def test_migration_splits_legacy_strings(tmp_path):
+    conn = sql.connect(str(tmp_path / "legacy.db"))
+    migrate(conn, MIGRATIONS[:2])
+    conn.execute("INSERT INTO users (username) VALUES ('estefania')")
+    conn.execute("""
+        INSERT INTO knowledge_profiles (user_id, name, age, background, familiarity_kw, math_eq, programming_comfort,
+                                        confidence_asking, support_needs)
+        VALUES (1, 'Estefania', 24, '', '', 0, 0, 0, 'Mathematics, Programming')
+    """)
+    conn.commit()
+
+    assert migrate(conn, MIGRATIONS[:3]) == [3]
+    conn.commit()
+
+    stored = conn.execute("SELECT support_needs FROM knowledge_profiles").fetchone()[0]
+    assert json.loads(stored) == ["Mathematics", "Programming"]
+    tags = conn.execute("""
+        SELECT t.tag FROM knowledge_profile_support_needs s JOIN support_needs t ON t.tag_id = s.tag_id ORDER BY t.tag
+    """).fetchall()
+    assert tags == [("Mathematics",), ("Programming",)]
+    conn.close()
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("huggingface_hub")
+
+from llm.agent import Agent
+from llm.transcripts import TranscriptStore, get_transcript_store
+from llm.stub_server import StubInferenceServer
+
+
+@pytest.fixture
+def store(db_path):
+    store = TranscriptStore(db_path, flush_interval=60)
+    yield store
+    store.close()
+
+
+def test_appends_are_group_committed(store):
+    for i in range(100):
+        store.append("estefania", "user", f"message {i}")
+
+    assert store.commits == 0
+    # Still queued: tail commits them before reading
+    assert store.tail("estefania", 2) == [
+        {"role": "user", "content": "message 98"},
+        {"role": "user", "content": "message 99"},
+    ]
+    assert store.commits == 1
+
+
+def test_full_batch_is_written_without_waiting(db_path):
+    store = TranscriptStore(db_path, flush_interval=60, batch_size=10)
+    for i in range(10):
+        store.append("estefania", "user", f"message {i}")
+
+    # No flush and no close: the writer commits the full batch on its own
+    deadline = time.monotonic() + 5
+    while store.commits == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert store.commits == 1
+    assert len(get_transcript_store().tail("estefania", 50)) == 10
+    store.close()
+
+
+def test_compact_keeps_the_latest_messages_per_user(store):
+    for i in range(5):
+        store.append("estefania", "user", f"e{i}")
+        store.append("maxyo", "user", f"m{i}")
+
+    assert store.compact(keep=2) == 6
+    assert [m["content"] for m in store.tail("estefania", 10)] == ["e3", "e4"]
+    assert [m["content"] for m in store.tail("maxyo", 10)] == ["m3", "m4"]
+
+
+def test_agent_records_and_resumes_last_turns(make_user, store):
+    make_user("estefania")
+
+    with StubInferenceServer(chunks=["Hi", "!"]) as server:
+        agent = Agent("estefania", base_url=server.base_url + "/v1")
+        agent.transcripts = store
+        agent.system_prompt()
+        for question in ["First?", "Second?", "Third?"]:
+            asyncio.run(_consume(agent, question))
+
+    assert store.commits == 0  # the turns are still queued when the agent resumes
+    resumed = Agent("estefania")
+    resumed.transcripts = store
+    resumed.system_prompt()
+    resumed.resume(turns=2)
+
+    assert [m["content"] for m in resumed.chat_history][1:] == ["Second?", "Hi!", "Third?", "Hi!"]
+
+
+async def _consume(agent, message):
+    async for _ in agent.stream_message(message):
+        pass
@@ -0,0 +1,33 @@
+from db.db_table_management import load_full_user_context, load_full_user_contexts
+
+
+def test_load_full_user_context(make_user):
+    make_user("estefania")
+
+    context = load_full_user_context("estefania")
+
+    assert context.username == "estefania"
+    assert context.knowledge_profile.name == "Estefania"
+    assert context.knowledge_profile.programming_comfort == 6
+    assert context.learner_profile.learning_mode == 4
+    assert context.learner_profile.adaptability == "No"
+
+
+def test_load_full_user_context_missing(make_user):
+    make_user("maxyo", with_profiles=False)
+
+    assert load_full_user_context("nobody") is None
+
+    context = load_full_user_context("maxyo")
+    assert context.knowledge_profile is None
+    assert context.learner_profile is None
+
+
+def test_load_full_user_contexts_batched(make_user):
+    for i in range(3):
+        make_user(f"user{i}")
+
+    contexts = load_full_user_contexts(["user0", "user2", "user2", "ghost"])
+
+    assert sorted(contexts) == ["user0", "user2"]
+    assert contexts["user2"].knowledge_profile.name == "User2"
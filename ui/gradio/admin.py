@@ -1,8 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Sep 11 23:56:25 2025
+
+@author: maxyo
+"""
+
+import os
+
 import gradio as gr
+from db import constants
+from llm.profile_clusters import cluster_map_svg, load_cluster_map
+from profiles.matching import get_matching_index
+from profiles.profile_table import NUMERIC_FIELDS
+from ui.gradio.concurrency import queue_stats
+
+
+def export_path(name):
+    """Chemin réel d'un export de carte, refusé s'il sort du dossier configuré (MINDMESH_MAP_EXPORT_DIR)."""
+    export_dir = os.path.realpath(constants.MAP_EXPORT_DIR)
+    path = os.path.realpath(os.path.join(export_dir, name))
+    if os.path.commonpath([export_dir, path]) != export_dir:
+        raise gr.Error(f"'{name}' is not in the profile map export directory.")
+
+    return path
+
+
+def show_profile_map(name):
+    name = (name or "").strip()
+    if not name:
+        raise gr.Error("Enter the file name of an exported profile map (.json).")
+    if not name.lower().endswith(".json"):
+        raise gr.Error("Only .json profile map exports can be shown.")
+
+    path = export_path(name)
+    # Always rendered from the JSON data, never passed through as markup
+    try:
+        cluster_map = load_cluster_map(path)
+        summary = [{k: c[k] for k in ("domain", "count", "mean_prereq", "histogram")} for c in cluster_map["clusters"]]
+        svg = cluster_map_svg(cluster_map)
+    except OSError as e:
+        raise gr.Error(f"Could not read '{name}': {e.strerror}")
+    except (ValueError, KeyError, TypeError) as e:
+        raise gr.Error(f"'{name}' is not a valid profile map export ({type(e).__name__}: {e}).")
+
+    return svg, summary
+
+
+def find_similar_learners(username, k):
+    index = get_matching_index()
+    if username not in index:
+        raise gr.Error(f"'{username}' has no complete knowledge and learning profile.")
+
+    return [[name, round(score, 3)] for name, score in index.similar(username, int(k))]
+
+
+def cluster_cohort(n_clusters):
+    _, clusters = get_matching_index().cluster(int(n_clusters))
+    return [[c["cluster"], c["size"]] + [c[name] for name in NUMERIC_FIELDS] for c in clusters]
+
+
+def pair_cohort(field, threshold, capacity):
+    # Learners at or above the threshold on the chosen slider mentor the others
+    index = get_matching_index()
+    levels = index.table.column(field)
+    mentors = [name for name, level in zip(index.table.usernames, levels) if level >= threshold]
+    mentees = [name for name, level in zip(index.table.usernames, levels) if level < threshold]
+
+    return [[mentor, mentee, round(score, 3)]
+            for mentor, mentee, score in index.pair_mentors(mentors, mentees, int(capacity))]
+
+
+def warm_up():
+    # Builds the matching index before the first admin request needs it
+    get_matching_index()
+
 
 with gr.Blocks() as demo:
     t = gr.Textbox()
     demo.load(lambda : "Loaded", None, t)
 
+    gr.Markdown("### Profile map")
+    with gr.Row():
+        map_path = gr.Textbox(label="Exported profile map", placeholder="project.map.json")
+        map_button = gr.Button("Show map")
+    map_view = gr.HTML()
+    map_summary = gr.JSON(label="Domains")
+
+    map_button.click(fn=show_profile_map, inputs=[map_path], outputs=[map_view, map_summary])
+
+    gr.Markdown("### Learner matching")
+    with gr.Row():
+        similar_username = gr.Textbox(label="Username")
+        similar_k = gr.Slider(1, 50, value=5, step=1, label="Number of similar learners")
+        similar_button = gr.Button("Find similar learners")
+    similar_table = gr.Dataframe(headers=["Learner", "Similarity"], interactive=False)
+
+    with gr.Row():
+        n_clusters = gr.Slider(2, 20, value=6, step=1, label="Number of groups")
+        cluster_button = gr.Button("Group the cohort")
+    cluster_table = gr.Dataframe(headers=["Group", "Learners"] + NUMERIC_FIELDS, interactive=False)
+
+    with gr.Row():
+        mentor_field = gr.Dropdown(NUMERIC_FIELDS, value="programming_comfort", label="Mentors are learners high on")
+        mentor_threshold = gr.Slider(0, 10, value=7, step=1, label="Mentor threshold")
+        mentor_capacity = gr.Slider(1, 10, value=3, step=1, label="Mentees per mentor")
+        pair_button = gr.Button("Pair mentors and mentees")
+    pair_table = gr.Dataframe(headers=["Mentor", "Mentee", "Similarity"], interactive=False)
+
+    similar_button.click(fn=find_similar_learners, inputs=[similar_username, similar_k], outputs=[similar_table])
+    cluster_button.click(fn=cluster_cohort, inputs=[n_clusters], outputs=[cluster_table])
+    pair_button.click(fn=pair_cohort, inputs=[mentor_field, mentor_threshold, mentor_capacity], outputs=[pair_table])
+
+    gr.Markdown("### Server load")
+    load_button = gr.Button("Refresh")
+    # Running and waiting requests, wait times and requests shed per concurrency group
+    load_view = gr.JSON(label="Concurrency groups")
+    load_button.click(fn=queue_stats, outputs=[load_view])
+
 if __name__ == "__main__":
     demo.launch()
\ No newline at end of file
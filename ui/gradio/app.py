@@ -1,29 +1,96 @@
+import importlib
+import os
+import threading
+
 import gradio as gr
-import ui.gradio.main_page as main_page
-import ui.gradio.admin as admin
-import ui.gradio.knowledge_profile as knowledge_profile
-import ui.gradio.learning_profile as learning_profile
-import ui.gradio.user_account as user_account
-import ui.gradio.chat as chat
-from db.db_management import init_db, clear_db_data, clear_db
-
-
-with gr.Blocks() as demo:
-    main_page.demo.render()
-with demo.route("Admin"):
-    admin.demo.render()
-with demo.route("User"):
-    user_account.demo.render()
-with demo.route("Knowledge Profile"):
-    knowledge_profile.demo.render()
-with demo.route("Learning Profile"):
-    learning_profile.demo.render()
-with demo.route("Chat"):
-    chat.demo.render()
+from db.projects import get_project_registry
+from instrumentation import metrics
+from ui.gradio import concurrency
+
+# Route name -> page module, imported only if the route is served. The main page is always served.
+ROUTES = {
+    "Admin": "ui.gradio.admin",
+    "User": "ui.gradio.user_account",
+    "Knowledge Profile": "ui.gradio.knowledge_profile",
+    "Learning Profile": "ui.gradio.learning_profile",
+    "Chat": "ui.gradio.chat",
+}
+
+
+def served_routes():
+    """Routes listed in MINDMESH_GRADIO_ROUTES (comma separated), or all of them."""
+    names = os.environ.get("MINDMESH_GRADIO_ROUTES")
+    if not names:
+        return list(ROUTES)
+
+    names = [name.strip() for name in names.split(",") if name.strip()]
+    unknown = [name for name in names if name not in ROUTES]
+    if unknown:
+        raise ValueError(f"Unknown routes {unknown}, expected some of {list(ROUTES)}.")
+    return names
+
+
+def build_app(routes=None):
+    """Builds the multipage app. Returns (demo, page modules)."""
+    routes = served_routes() if routes is None else routes
+    main_page = importlib.import_module("ui.gradio.main_page")
+    pages = [importlib.import_module(ROUTES[name]) for name in routes]
+
+    with gr.Blocks() as demo:
+        main_page.demo.render()
+    for name, page in zip(routes, pages):
+        with demo.route(name):
+            page.demo.render()
+
+    return demo, pages
+
+
+def warm_up(pages):
+    """
+    Runs once, in the background, after the server starts: each page's optional `warm_up()` loads what
+    its first request would otherwise wait for (LLM client, matching index, ...).
+    """
+    for page in pages:
+        hook = getattr(page, "warm_up", None)
+        if hook is None:
+            continue
+        try:
+            hook()
+        except Exception as e:
+            print(f"Error warming up {page.__name__}: ", e)
+
+
+def add_metrics_routes(app):
+    """GET /metrics (Prometheus text format) and /metrics.json on the app's server."""
+    from fastapi.responses import JSONResponse, PlainTextResponse
+
+    app.add_api_route("/metrics", lambda: PlainTextResponse(metrics.prometheus_text()), methods=["GET"])
+    app.add_api_route("/metrics.json", lambda: JSONResponse(metrics.snapshot()), methods=["GET"])
+
+
+_demo = None
+
+
+def __getattr__(name):
+    # `from ui.gradio.app import demo` (and `gradio ui/gradio/app.py`) still work, building the app on demand
+    global _demo
+    if name == "demo":
+        if _demo is None:
+            _demo = build_app()[0]
+        return _demo
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
 
 
 if __name__ == "__main__":
+    # from db.db_management import clear_db_data, clear_db
     # clear_db_data()
     # clear_db()
-    init_db()
-    demo.launch()
+    get_project_registry().open()
+    demo, pages = build_app()
+    threading.Thread(target=warm_up, args=(pages,), name="gradio-warm-up", daemon=True).start()
+    if os.environ.get("MINDMESH_METRICS_FILE"):
+        metrics.start_file_export(os.environ["MINDMESH_METRICS_FILE"])
+
+    app, _, _ = demo.launch(prevent_thread_lock=True, max_threads=concurrency.worker_threads())
+    add_metrics_routes(app)
+    demo.block_thread()
@@ -1,36 +1,56 @@
 import gradio as gr
-from llm.agent import Agent
+import ui.gradio.concurrency as concurrency
 
-agent = None
+_agents = None
 
-def create_agent(username):
-    global agent
-    agent = Agent(username)
-    agent.system_prompt()
-    return gr.update(visible=True)
 
-def agent_chat(message, history):
-    response = agent.send_message(message)
-    return response
+def get_agents():
+    # The LLM stack is imported by the first chat, not when the app starts
+    global _agents
+    if _agents is None:
+        from llm.agent_registry import AgentRegistry
+        _agents = AgentRegistry()
+    return _agents
+
+
+def warm_up():
+    get_agents()
+
+
+def create_agent(username, request: gr.Request):
+    get_agents().create(request.session_hash, username, resume=True)
+    return gr.update(visible=True), username
+
+async def agent_chat(message, history, username, request: gr.Request):
+    agent = get_agents().get(request.session_hash, username, history)
+
+    response = ""
+    async for token in agent.stream_message(message):
+        response += token
+        yield response
 
 with gr.Blocks() as demo:
     gr.Markdown("## MindMeSH Chat Agent")
 
     username_textbox = gr.Textbox(label="Enter your username", placeholder="Username")
     start_button = gr.Button("Start Chat")
+    session_username = gr.State()
 
     with gr.Group(visible=False) as chat_ui_group:
         chat_ui = gr.ChatInterface(
-            fn=agent_chat,
+            fn=concurrency.chat.guard(agent_chat),
             title="Chat",
+            concurrency_limit=None,  # the chat group limits and sheds, see ui.gradio.concurrency
             type="messages",
             save_history=True,
+            additional_inputs=[session_username],
         )
 
     start_button.click(
-        fn=create_agent,
+        fn=concurrency.forms.guard(create_agent),
         inputs=[username_textbox],
-        outputs=[chat_ui_group]
+        outputs=[chat_ui_group, session_username],
+        concurrency_limit=None,
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+import asyncio
+import functools
+import inspect
+import os
+import threading
+import time
+
+import gradio as gr
+from instrumentation.metrics import counter, histogram, timed
+
+BUSY_MESSAGE = "MindMesh is busy right now, please try again in a few seconds."
+
+handler_timed = timed("mindmesh_gradio_handler_seconds", "Duration of Gradio handlers, without queueing",
+                      label="handler")
+
+
+class Busy(Exception):
+    pass
+
+
+class ConcurrencyGroup:
+    """
+    Admission control for the handlers of one kind of work (chat, profile forms, ...).
+
+    At most `limit` handlers of the group run at once and at most `max_waiting` wait for a slot. A request
+    arriving when the waiting line is full, or still waiting after `max_wait` seconds, is shed: the user
+    gets BUSY_MESSAGE at once instead of a request that times out. The group's events are registered
+    with `concurrency_limit=None`, so Gradio hands every arrival straight to the group instead of holding
+    it in its own unbounded queue, and the app starts enough worker threads for the blocked sync handlers
+    (see worker_threads).
+
+    Sync handlers (run by Gradio in worker threads) and async handlers (run on Gradio's event loop) use
+    separate slots; a group is meant to guard one of the two kinds.
+    """
+
+    def __init__(self, name, limit, max_waiting, max_wait=10.0):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.max_wait = max_wait
+
+        self._slots = threading.BoundedSemaphore(limit)
+        self._async_slots = None
+        self._lock = threading.Lock()
+        self.running = 0
+        self.waiting = 0
+        self.served = 0
+        self.shed = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._wait_seconds = histogram("mindmesh_gradio_queue_wait_seconds", "Time spent waiting for a slot",
+                                       group=name)
+        self._shed_total = counter("mindmesh_gradio_shed_total", "Requests answered busy", group=name)
+
+    @property
+    def admitted(self):
+        return self.limit + self.max_waiting
+
+    def _enter_line(self):
+        with self._lock:
+            if self.waiting >= self.max_waiting:
+                self.shed += 1
+                self._shed_total.inc()
+                raise Busy(self.name)
+            self.waiting += 1
+
+    def _leave_line(self, shed=False):
+        with self._lock:
+            self.waiting -= 1
+            if shed:
+                self.shed += 1
+                self._shed_total.inc()
+                raise Busy(self.name)
+
+    def _admit(self, wait):
+        self._wait_seconds.observe(wait)
+        with self._lock:
+            self.running += 1
+            self._total_wait += wait
+            self._max_wait_seen = max(self._max_wait_seen, wait)
+
+    def _done(self):
+        with self._lock:
+            self.running -= 1
+            self.served += 1
+
+    def acquire(self):
+        """Takes a slot, waiting in line if none is free. Raises Busy if the request is shed."""
+        started = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self._enter_line()
+            self._leave_line(shed=not self._slots.acquire(timeout=self.max_wait))
+        self._admit(time.perf_counter() - started)
+
+    def release(self):
+        self._done()
+        self._slots.release()
+
+    async def acquire_async(self):
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.limit)
+
+        started = time.perf_counter()
+        if self._async_slots.locked():
+            self._enter_line()
+            try:
+                await asyncio.wait_for(self._async_slots.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self._leave_line(shed=True)
+            except BaseException:
+                # Cancelled while waiting (client disconnect, Stop button): give the place in line back
+                self._leave_line()
+                raise
+            self._leave_line()
+        else:
+            await self._async_slots.acquire()
+        self._admit(time.perf_counter() - started)
+
+    def release_async(self):
+        self._done()
+        self._async_slots.release()
+
+    def guard(self, fn):
+        """Wraps a Gradio handler (function, coroutine or async generator) so it runs within the group."""
+        fn = handler_timed(fn)
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def guarded(*args, **kwargs):
+                await self._acquire_or_busy_async()
+                try:
+                    async for value in fn(*args, **kwargs):
+                        yield value
+                finally:
+                    self.release_async()
+        elif inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def guarded(*args, **kwargs):
+                await self._acquire_or_busy_async()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.release_async()
+        else:
+            @functools.wraps(fn)
+            def guarded(*args, **kwargs):
+                try:
+                    self.acquire()
+                except Busy:
+                    raise gr.Error(BUSY_MESSAGE)
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.release()
+
+        return guarded
+
+    async def _acquire_or_busy_async(self):
+        try:
+            await self.acquire_async()
+        except Busy:
+            raise gr.Error(BUSY_MESSAGE)
+
+    def stats(self):
+        with self._lock:
+            admitted = self.served + self.running
+            return {
+                "limit": self.limit,
+                "max_waiting": self.max_waiting,
+                "running": self.running,
+                "waiting": self.waiting,
+                "served": self.served,
+                "shed": self.shed,
+                "mean_wait_ms": round(1000 * self._total_wait / admitted, 1) if admitted else 0.0,
+                "max_wait_ms": round(1000 * self._max_wait_seen, 1),
+            }
+
+
+# LLM chats are slow and bounded by the inference provider; profile forms are short database writes.
+# Separate groups keep signups responsive while every chat slot is taken.
+chat = ConcurrencyGroup(
+    "chat",
+    limit=int(os.environ.get("MINDMESH_CHAT_CONCURRENCY", 8)),
+    max_waiting=int(os.environ.get("MINDMESH_CHAT_MAX_WAITING", 16)),
+    max_wait=float(os.environ.get("MINDMESH_CHAT_MAX_WAIT", 15)),
+)
+forms = ConcurrencyGroup(
+    "forms",
+    limit=int(os.environ.get("MINDMESH_FORMS_CONCURRENCY", 16)),
+    max_waiting=int(os.environ.get("MINDMESH_FORMS_MAX_WAITING", 64)),
+    max_wait=float(os.environ.get("MINDMESH_FORMS_MAX_WAIT", 5)),
+)
+
+GROUPS = {group.name: group for group in (chat, forms)}
+
+
+def worker_threads():
+    """Gradio worker threads (launch's max_threads) so that every admitted sync handler gets one."""
+    return max(40, sum(group.admitted for group in GROUPS.values()))
+
+
+def queue_stats():
+    return {name: group.stats() for name, group in GROUPS.items()}
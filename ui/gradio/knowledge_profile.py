@@ -1,5 +1,6 @@
 import gradio as gr
-from db.db_table_management import create_knowledge_profile, get_all_knowledge_profiles
+from ui.gradio.concurrency import forms
+from db.db_table_management import create_knowledge_profile
 from profiles.knowledge_profile import KnowledgeProfile
 
 
@@ -18,8 +19,6 @@ def KPsubmit_form(
     )
     create_knowledge_profile(username, kp)
 
-    print(get_all_knowledge_profiles())
-
 
 with gr.Blocks() as demo:
     gr.Markdown("## 🧠 Knowledge Profile Questionnaire")
@@ -46,10 +45,11 @@ with gr.Blocks() as demo:
     submit_btn = gr.Button("Submit Profile")
 
     submit_btn.click(
-        fn=KPsubmit_form,
+        fn=forms.guard(KPsubmit_form),
         inputs=[username, name, age, background, familiarity_kw,
                 math_eq, programming_comfort, confidence_asking,
-                support_needs]
+                support_needs],
+        concurrency_limit=None,  # the forms group limits and sheds, see ui.gradio.concurrency
     )
 
 
@@ -1,6 +1,7 @@
 import gradio as gr
+from ui.gradio.concurrency import forms
 from profiles.learner_profile import LearnerProfile
-from db.db_table_management import create_learner_profile, get_all_learner_profiles
+from db.db_table_management import create_learner_profile
 
 
 def LPsubmit_form(
@@ -22,8 +23,6 @@ def LPsubmit_form(
     )
     create_learner_profile(username, lp)
 
-    print(get_all_learner_profiles())
-
 
 with gr.Blocks() as demo:
     gr.Markdown("## 🧠 Learning Profile Questionnaire")
@@ -57,9 +56,10 @@ with gr.Blocks() as demo:
     submit_btn = gr.Button("Submit Profile")
 
     submit_btn.click(
-        fn=LPsubmit_form,
+        fn=forms.guard(LPsubmit_form),
         inputs=[username, problematic, goal_understanding, precision_level, analogies, conciseness, learning_mode,
                 explanation_style, interactivity, tone, humor, motivation, adaptability],
+        concurrency_limit=None,  # the forms group limits and sheds, see ui.gradio.concurrency
         )
 
 
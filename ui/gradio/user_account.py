@@ -1,5 +1,6 @@
 import gradio as gr
-from db.db_table_management import create_user, get_user_by_username, get_all_users
+from ui.gradio.concurrency import forms
+from db.db_table_management import create_user, get_user_by_username
 
 
 def Usubmit_form(
@@ -7,8 +8,6 @@ def Usubmit_form(
 ):
     create_user(username)
 
-    print(get_all_users())
-
 
 with gr.Blocks() as demo:
     gr.Markdown("## User")
@@ -19,8 +18,9 @@ with gr.Blocks() as demo:
     submit_button = gr.Button(value="Submit")
 
     submit_button.click(
-        fn=Usubmit_form,
-        inputs=[username]
+        fn=forms.guard(Usubmit_form),
+        inputs=[username],
+        concurrency_limit=None,  # the forms group limits and sheds, see ui.gradio.concurrency
     )
 
 
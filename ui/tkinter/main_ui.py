@@ -7,11 +7,12 @@ Created on Thu Sep 11 15:11:10 2025
 
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-from db.db_management import init_db, load_profiles
-from llm.graphvisualization import create_graph
-from ui.tkinter.secondary.chat_ui import ChatWindow
+from db.projects import open_project_profiles
+from llm.profile_clusters import build_cluster_map, export_cluster_map
 from ui.tkinter.secondary.profile_creation_ui import ProfileWindow
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+# Lignes ajoutées à la liste par passage de la boucle Tk: les grands projets s'affichent sans figer la fenêtre
+LIST_CHUNK_SIZE = 500
 
 
 # ---------------- Main App ----------------
@@ -21,6 +22,8 @@ class LearnerApp:
         self.root.title("Learning Style Manager")
         self.db_path = None
         self.project_name = "Projet"
+        self.profiles = None  # ProjectProfiles du projet ouvert
+        self._fill_job = None
 
         # --- project frame ---
         project_frame = ttk.LabelFrame(root, text="Projet")
@@ -29,6 +32,7 @@ class LearnerApp:
         ttk.Button(project_frame, text="Créer un projet", command=self.create_project).pack(side="left", padx=5, pady=5)
         ttk.Button(project_frame, text="Ouvrir un projet", command=self.open_project).pack(side="left", padx=5, pady=5)
         ttk.Button(project_frame, text="Carte des profils", command=self.show_bubble_map).pack(side="left", padx=5, pady=5)
+        ttk.Button(project_frame, text="Exporter la carte", command=self.export_bubble_map).pack(side="left", padx=5, pady=5)
 
         # --- profiles frame ---
         self.profile_frame = ttk.LabelFrame(root, text="Profils")
@@ -45,32 +49,59 @@ class LearnerApp:
     def create_project(self):
         fname = filedialog.asksaveasfilename(defaultextension=".db", filetypes=[("SQLite DB","*.db")])
         if fname:
-            init_db(fname)
-            self.db_path = fname
-            self.project_name = fname.split("/")[-1].replace(".db","")
-            self.refresh_profiles()
+            self.load_project(fname)
             messagebox.showinfo("Projet", f"Projet créé: {fname}")
 
     def open_project(self):
         fname = filedialog.askopenfilename(filetypes=[("SQLite DB","*.db")])
         if fname:
-            self.db_path = fname
-            self.project_name = fname.split("/")[-1].replace(".db","")
-            init_db(fname)
-            self.refresh_profiles()
+            self.load_project(fname)
             messagebox.showinfo("Projet", f"Projet ouvert: {fname}")
 
+    def load_project(self, fname):
+        if self.profiles is not None:
+            self.profiles.close()
+        self.db_path = fname
+        self.project_name = fname.split("/")[-1].replace(".db","")
+        # Les profils sont lus une seule fois ici, puis gardés en mémoire; le schéma n'est vérifié qu'à la
+        # première ouverture du fichier, revenir à un projet déjà ouvert est donc immédiat
+        self.profiles = open_project_profiles(fname)
+        self.refresh_profiles()
+
+    def sync_profiles(self):
+        """Recharge les profils seulement si le fichier a été modifié ailleurs (PRAGMA data_version)."""
+        if self.profiles.refresh():
+            self.refresh_profiles()
+
     def refresh_profiles(self):
         if not self.db_path: return
+        if self._fill_job is not None:
+            self.root.after_cancel(self._fill_job)
         self.profile_list.delete(0, tk.END)
-        for rid, prof in load_profiles(self.db_path):
-            self.profile_list.insert(tk.END, f"ID {rid} | {prof['name']} | Domaine: {prof['main_field']} | Prérequis: {prof['prereq_level']:.2f}")
+        self._fill_list(0)
+
+    def _fill_list(self, start):
+        chunk = self.profiles.profiles[start:start + LIST_CHUNK_SIZE]
+        self.profile_list.insert(tk.END, *[self._profile_label(rid, prof) for rid, prof in chunk])
+        if start + LIST_CHUNK_SIZE < len(self.profiles):
+            self._fill_job = self.root.after(1, self._fill_list, start + LIST_CHUNK_SIZE)
+        else:
+            self._fill_job = None
+
+    @staticmethod
+    def _profile_label(rid, prof):
+        return f"ID {rid} | {prof['name']} | Domaine: {prof['main_field']} | Prérequis: {prof['prereq_level']:.2f}"
+
+    def profile_added(self, rid, prof):
+        # Le modèle a déjà ajouté le profil: une seule ligne à insérer, sans relire la base
+        if self._fill_job is None:
+            self.profile_list.insert(tk.END, self._profile_label(rid, prof))
 
     def add_profile(self):
         if not self.db_path:
             messagebox.showerror("Erreur", "Ouvrez ou créez d'abord un projet.")
             return
-        ProfileWindow(self.root, self.db_path, self.refresh_profiles)
+        ProfileWindow(self.root, self.profiles, self.profile_added)
 
     def select_profile(self):
         selection = self.profile_list.curselection()
@@ -78,23 +109,45 @@ class LearnerApp:
             messagebox.showwarning("Sélection", "Choisissez un profil dans la liste.")
             return
         index = selection[0]
-        rid, prof = load_profiles(self.db_path)[index]
+        rid, prof = self.profiles[index]
+        # Importé au premier chat seulement: le client LLM n'est pas chargé au démarrage
+        from ui.tkinter.secondary.chat_ui import ChatWindow
         ChatWindow(self.root, rid, prof)
 
     def show_bubble_map(self):
         if not self.db_path:
             messagebox.showerror("Erreur", "Ouvrez un projet avant d'afficher la carte.")
             return
-        profiles = load_profiles(self.db_path)
+        self.sync_profiles()
+        profiles = self.profiles.profiles
         if not profiles:
             messagebox.showwarning("Carte vide", "Aucun profil enregistré.")
             return
 
+        # networkx et matplotlib ne sont chargés qu'à la première carte affichée
+        from llm.graphvisualization import create_graph
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
         win = tk.Toplevel(self.root)
         win.title(f"Carte des profils - {self.project_name}")
         win.geometry("1200x900")
 
-        fig = create_graph(profiles, self.project_name)
+        fig = create_graph(profiles, self.project_name, self.db_path)
         canvas = FigureCanvasTkAgg(fig, master=win)
         canvas.draw()
         canvas.get_tk_widget().pack(fill="both", expand=True)
+
+    def export_bubble_map(self):
+        if not self.db_path:
+            messagebox.showerror("Erreur", "Ouvrez un projet avant d'exporter la carte.")
+            return
+        self.sync_profiles()
+        profiles = self.profiles.profiles
+        if not profiles:
+            messagebox.showwarning("Carte vide", "Aucun profil enregistré.")
+            return
+
+        fname = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON","*.json"), ("SVG","*.svg")])
+        if fname:
+            export_cluster_map(build_cluster_map(profiles, self.project_name), fname)
+            messagebox.showinfo("Carte", f"Carte exportée: {fname}")
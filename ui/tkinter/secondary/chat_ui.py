@@ -5,9 +5,43 @@ Created on Thu Sep 11 15:33:15 2025
 @author: maxyo
 """
 
+import asyncio
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk
-from llm.agent import reply
+from llm.agent import stream_reply
+
+# Intervalle (ms) entre deux lectures des tokens reçus par la fenêtre
+POLL_INTERVAL_MS = 30
+
+_END = object()
+
+
+class ChatWorker:
+    """
+    Boucle asyncio dans un thread à part, partagée par toutes les fenêtres de chat.
+    Les appels au LLM y tournent, jamais dans la boucle Tk: l'interface reste réactive.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="tk-chat-worker", daemon=True)
+        self._thread.start()
+
+    def submit(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+
+_worker = None
+
+
+def get_worker():
+    global _worker
+    if _worker is None:
+        _worker = ChatWorker()
+    return _worker
+
 
 # ---------------- Chat Window ----------------
 class ChatWindow(tk.Toplevel):
@@ -18,6 +52,10 @@ class ChatWindow(tk.Toplevel):
 
         self.learner_id = learner_id
         self.profile = profile
+        self.messages = []  # conversation envoyée au LLM (rôles user / assistant)
+        self._future = None
+        self._tokens = None
+        self._reply = []
 
         self.chat_history = tk.Text(self, wrap="word", state="disabled", bg="white")
         self.chat_history.pack(fill="both", expand=True, padx=5, pady=5)
@@ -29,22 +67,93 @@ class ChatWindow(tk.Toplevel):
         self.user_input.pack(side="left", fill="x", expand=True, padx=(0,5))
         self.user_input.bind("<Return>", self.send_message)
 
-        send_btn = ttk.Button(entry_frame, text="Envoyer", command=self.send_message)
-        send_btn.pack(side="right")
+        self.stop_btn = ttk.Button(entry_frame, text="Arrêter", command=self.cancel, state="disabled")
+        self.stop_btn.pack(side="right")
+        self.send_btn = ttk.Button(entry_frame, text="Envoyer", command=self.send_message)
+        self.send_btn.pack(side="right", padx=(0,5))
+
+        self.protocol("WM_DELETE_WINDOW", self.close)
 
         self._append_message("System", f"Chat lancé pour {profile['main_field']} | Prérequis: {profile['prereq_level']:.2f}")
 
     def _append_message(self, sender, message):
+        self._insert(f"{sender}: {message}\n")
+
+    def _insert(self, text):
         self.chat_history.config(state="normal")
-        self.chat_history.insert("end", f"{sender}: {message}\n")
+        self.chat_history.insert("end", text)
         self.chat_history.config(state="disabled")
         self.chat_history.see("end")
 
     def send_message(self, event=None):
         msg = self.user_input.get().strip()
-        if not msg:
+        if not msg or self._future is not None:
             return
         self._append_message("Vous", msg)
         self.user_input.delete(0, "end")
-        reply_text = reply(self.profile, msg)   # calls backend agent
-        self._append_message("Agent", reply_text)
\ No newline at end of file
+        self.messages.append({"role": "user", "content": msg})
+
+        # La réponse est produite dans le thread du worker; les tokens passent par une file lue avec after()
+        self._tokens = queue.Queue()
+        self._reply = []
+        self._future = get_worker().submit(self._stream(list(self.messages), self._tokens))
+        self.send_btn.config(state="disabled")
+        self.stop_btn.config(state="normal")
+        self._insert("Agent: ")
+        self.after(POLL_INTERVAL_MS, self._poll)
+
+    async def _stream(self, messages, tokens):
+        try:
+            # Une clé par fenêtre: plusieurs chats ouverts ne se bloquent pas entre eux dans le scheduler
+            async for token in stream_reply(self.profile, messages, user=f"tk:{self.learner_id}:{id(self)}"):
+                tokens.put(token)
+        except Exception as e:
+            tokens.put(e)
+        finally:
+            tokens.put(_END)
+
+    def _poll(self):
+        if not self.winfo_exists():
+            return
+
+        while True:
+            try:
+                item = self._tokens.get_nowait()
+            except queue.Empty:
+                # Annulé avant même d'avoir démarré: aucun _END ne viendra
+                if self._future.done():
+                    self._finish()
+                else:
+                    self.after(POLL_INTERVAL_MS, self._poll)
+                return
+
+            if item is _END:
+                self._finish()
+                return
+            if isinstance(item, Exception):
+                self._insert(f"[erreur: {item}]")
+            else:
+                self._reply.append(item)
+                self._insert(item)
+
+    def _finish(self):
+        if self._future.cancelled():
+            self._insert(" [interrompu]")
+        self._insert("\n")
+
+        if self._reply:
+            self.messages.append({"role": "assistant", "content": "".join(self._reply)})
+        else:
+            self.messages.pop()
+
+        self._future = None
+        self.send_btn.config(state="normal")
+        self.stop_btn.config(state="disabled")
+
+    def cancel(self):
+        if self._future is not None:
+            self._future.cancel()
+
+    def close(self):
+        self.cancel()
+        self.destroy()
@@ -6,16 +6,15 @@ Created on Thu Sep 11 15:28:24 2025
 """
 
 import tkinter as tk
-from db.db_management import save_profile
-from llm.questionnaire import LearnerProfile
+from tkinter import ttk, messagebox
 
 # ---------------- Profile Creation Window ----------------
 class ProfileWindow(tk.Toplevel):
-    def __init__(self, master, db_path, refresh_callback):
+    def __init__(self, master, profiles, added_callback):
         super().__init__(master)
         self.title("Créer un profil")
-        self.db_path = db_path
-        self.refresh_callback = refresh_callback
+        self.profiles = profiles
+        self.added_callback = added_callback
 
         self.sliders = {}
         self.text_entries = {}
@@ -82,7 +81,7 @@ class ProfileWindow(tk.Toplevel):
         save_btn.grid(row=row, column=0, columnspan=2, pady=10)
 
     def save_profile(self):
-        prof = LearnerProfile(
+        prof = dict(
             name=self.expert_name.get("1.0","end").strip(),
             prereq_level=self.sliders["prereq_level"].get(),
             granularity=self.sliders["granularity"].get(),
@@ -95,7 +94,7 @@ class ProfileWindow(tk.Toplevel):
             main_field=self.main_field_var.get(),
             domain_expertise=self.domain_expertise_text.get("1.0","end").strip()
         )
-        rid = save_profile(prof, self.db_path)
+        rid = self.profiles.add(prof)
         messagebox.showinfo("Profil", f"Profil enregistré avec ID {rid}")
-        self.refresh_callback()
+        self.added_callback(rid, prof)
         self.destroy()
\ No newline at end of file